@@ -66,12 +66,11 @@ class GenerationAgent(BaseAgent):
         Generate complete presentation with GPT-4
         
         Steps:
-        1. Check user credits
+        1. Reserve user credits
         2. Generate presentation structure with AI
         3. Generate images for image cards
-        4. Save to database
-        5. Deduct credits
-        6. Track usage
+        4. Save to database (credits are refunded if 2-4 fail)
+        5. Track usage
         """
         
         prompt = data['prompt']
@@ -79,26 +78,27 @@ class GenerationAgent(BaseAgent):
         num_cards = data.get('num_cards', 10)
         style = data.get('style', 'professional')
         
-        # Check user credits
-        if not await self._check_credits(user_id, settings.CREDIT_COST_FULL_GENERATION):
-            raise Exception(f"Insufficient credits. Required: {settings.CREDIT_COST_FULL_GENERATION}")
+        # Reserve credits before the AI call so concurrent requests can't overspend
+        await self._reserve_credits(user_id, settings.CREDIT_COST_FULL_GENERATION)
         
-        # Generate with AI
-        result = await self.ai_service.generate_presentation(
-            prompt=prompt,
-            num_cards=num_cards,
-            style=style
-        )
-        
-        # Save to database
-        presentation_id = await self._save_presentation(
-            user_id=user_id,
-            data=result,
-            prompt=prompt
-        )
-        
-        # Deduct credits
-        await self._deduct_credits(user_id, settings.CREDIT_COST_FULL_GENERATION)
+        try:
+            # Generate with AI
+            result = await self.ai_service.generate_presentation(
+                prompt=prompt,
+                num_cards=num_cards,
+                style=style
+            )
+            
+            # Save to database
+            presentation_id = await self._save_presentation(
+                user_id=user_id,
+                data=result,
+                prompt=prompt
+            )
+        except Exception:
+            await self._refund_credits(user_id, settings.CREDIT_COST_FULL_GENERATION)
+            raise
+        await self._count_generation(user_id)
         
         # Track generation
         await self._track_generation(
@@ -132,15 +132,16 @@ class GenerationAgent(BaseAgent):
         instruction = data.get('instruction', 'improve')
         user_id = data['user_id']
         
-        # Check credits
-        if not await self._check_credits(user_id, settings.CREDIT_COST_REWRITE):
-            raise Exception(f"Insufficient credits. Required: {settings.CREDIT_COST_REWRITE}")
+        # Reserve credits
+        await self._reserve_credits(user_id, settings.CREDIT_COST_REWRITE)
         
         # Rewrite
-        rewritten = await self.ai_service.rewrite_text(text, instruction)
-        
-        # Deduct credits
-        await self._deduct_credits(user_id, settings.CREDIT_COST_REWRITE)
+        try:
+            rewritten = await self.ai_service.rewrite_text(text, instruction, scope=user_id)
+        except Exception:
+            await self._refund_credits(user_id, settings.CREDIT_COST_REWRITE)
+            raise
+        await self._count_generation(user_id)
         
         return {
             'success': True,
@@ -166,19 +167,20 @@ class GenerationAgent(BaseAgent):
         size = data.get('size', '1024x1024')
         quality = data.get('quality', 'standard')
         
-        # Check credits (images cost more)
-        if not await self._check_credits(user_id, settings.CREDIT_COST_IMAGE):
-            raise Exception(f"Insufficient credits. Required: {settings.CREDIT_COST_IMAGE}")
+        # Reserve credits (images cost more)
+        await self._reserve_credits(user_id, settings.CREDIT_COST_IMAGE)
         
         # Generate
-        image_url = await self.ai_service._generate_image(
-            prompt=prompt,
-            size=size,
-            quality=quality
-        )
-        
-        # Deduct credits
-        await self._deduct_credits(user_id, settings.CREDIT_COST_IMAGE)
+        try:
+            image_url = await self.ai_service._generate_image(
+                prompt=prompt,
+                size=size,
+                quality=quality
+            )
+        except Exception:
+            await self._refund_credits(user_id, settings.CREDIT_COST_IMAGE)
+            raise
+        await self._count_generation(user_id)
         
         return {
             'success': True,
@@ -202,15 +204,16 @@ class GenerationAgent(BaseAgent):
         target_language = data['target_language']
         user_id = data['user_id']
         
-        # Check credits
-        if not await self._check_credits(user_id, settings.CREDIT_COST_TRANSLATE):
-            raise Exception(f"Insufficient credits. Required: {settings.CREDIT_COST_TRANSLATE}")
+        # Reserve credits
+        await self._reserve_credits(user_id, settings.CREDIT_COST_TRANSLATE)
         
         # Translate
-        translated = await self.ai_service.translate_text(text, target_language)
-        
-        # Deduct credits
-        await self._deduct_credits(user_id, settings.CREDIT_COST_TRANSLATE)
+        try:
+            translated = await self.ai_service.translate_text(text, target_language, scope=user_id)
+        except Exception:
+            await self._refund_credits(user_id, settings.CREDIT_COST_TRANSLATE)
+            raise
+        await self._count_generation(user_id)
         
         return {
             'success': True,
@@ -221,15 +224,31 @@ class GenerationAgent(BaseAgent):
             'credits_remaining': await self._get_credits(user_id)
         }
     
-    async def _check_credits(self, user_id: str, required: int = 1) -> bool:
-        """Check if user has enough credits"""
+    async def _reserve_credits(self, user_id: str, amount: int):
+        """Deduct credits with one conditional UPDATE; raises if the balance is insufficient"""
+        from backend.db.base import SessionLocal
+        from backend.models.user import User
+        from backend.utils.credits import reserve_credits
+        
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.id == user_id).first()
+            if user is None or reserve_credits(user, amount, db) is None:
+                raise Exception(f"Insufficient credits. Required: {amount}")
+        finally:
+            db.close()
+    
+    async def _refund_credits(self, user_id: str, amount: int):
+        """Give back credits taken by _reserve_credits when the operation failed"""
         from backend.db.base import SessionLocal
         from backend.models.user import User
+        from backend.utils.credits import refund_credits
         
         db = SessionLocal()
         try:
             user = db.query(User).filter(User.id == user_id).first()
-            return user and user.credits_remaining >= required
+            if user is not None:
+                refund_credits(user, amount, db)
         finally:
             db.close()
     
@@ -245,19 +264,21 @@ class GenerationAgent(BaseAgent):
         finally:
             db.close()
     
-    async def _deduct_credits(self, user_id: str, amount: int):
-        """Deduct credits from user"""
+    async def _count_generation(self, user_id: str):
+        """Count a successful AI generation against the user"""
         from backend.db.base import SessionLocal
         from backend.models.user import User
+        from sqlalchemy import func, update
         
         db = SessionLocal()
         try:
-            user = db.query(User).filter(User.id == user_id).first()
-            if user:
-                user.credits_remaining -= amount
-                user.credits_used = (user.credits_used or 0) + amount
-                user.total_ai_generations = (user.total_ai_generations or 0) + 1
-                db.commit()
+            db.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(total_ai_generations=func.coalesce(User.total_ai_generations, 0) + 1),
+                execution_options={"synchronize_session": False}
+            )
+            db.commit()
         finally:
             db.close()
     
@@ -266,7 +287,6 @@ class GenerationAgent(BaseAgent):
         from backend.db.base import SessionLocal
         from backend.models.presentation import Presentation
         from backend.models.user import User
-        import uuid
         
         # Simple slug generation
         def slugify(text: str) -> str:
@@ -279,7 +299,6 @@ class GenerationAgent(BaseAgent):
         db = SessionLocal()
         try:
             presentation = Presentation(
-                id=uuid.uuid4(),
                 title=data.get('title', 'Untitled Presentation'),
                 slug=slugify(data.get('title', 'untitled-presentation')),
                 owner_id=user_id,
@@ -3,14 +3,16 @@ Analytics API Endpoints
 Provides analytics and statistics for presentations, users, and workspaces
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import Optional
+from datetime import datetime, timedelta
 
 from backend.db.base import get_db
 from backend.models.user import User
 from backend.models.presentation import Presentation
 from backend.utils.auth import get_current_user
-from backend.services.analytics_service import analytics_service
+from backend.services.analytics_service import analytics_service, naive_utc
 
 router = APIRouter(prefix="/api/v1/analytics", tags=["Analytics"])
 
@@ -68,7 +70,8 @@ async def get_user_dashboard(
     if not analytics:
         raise HTTPException(status_code=404, detail="Analytics not found")
     
-    return analytics
+    # Rows are slotted dataclasses; orjson encodes them without jsonable_encoder
+    return ORJSONResponse(analytics)
 
 
 # Get Quick Dashboard Stats
@@ -85,7 +88,7 @@ async def get_quick_stats(
     if not stats:
         raise HTTPException(status_code=404, detail="Stats not found")
     
-    return stats
+    return ORJSONResponse(stats)
 
 
 # Get Workspace Analytics (Team plans only)
@@ -110,6 +113,9 @@ async def get_workspace_analytics(
         workspace_id, days, db
     )
     
+    if not analytics:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+    
     return analytics
 
 
@@ -141,7 +147,35 @@ async def track_event(
         db=db
     )
     
-    return {"status": "tracked", "event": event}
+    # Straight to orjson: the timestamp is encoded in C, not via jsonable_encoder
+    return ORJSONResponse({"status": "tracked", "event": event})
+
+
+# Event Histogram
+@router.get("/histogram")
+async def get_event_histogram(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bins: int = Query(600, ge=1, le=2000),
+    event_type: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Event counts binned over time for the current user
+    
+    - **start** / **end**: Range to bin (defaults to the last 30 days)
+    - **bins**: Number of bins (e.g. chart width in pixels)
+    - **event_type**: Restrict to one event type
+    """
+    end = naive_utc(end) if end else datetime.utcnow()
+    start = naive_utc(start) if start else end - timedelta(days=30)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    return analytics_service.get_event_histogram(
+        current_user.id, start, end, bins, event_type, db
+    )
 
 
 # Get Views Trend
@@ -112,6 +112,7 @@ async def subscribe(
         # Update user
         current_user.plan = data.plan
         current_user.stripe_subscription_id = subscription["id"]
+        current_user.stripe_subscription_item_id = subscription["item_id"]
         
         # Update credits based on plan
         current_user.credits = PLAN_CONFIGS[data.plan]["credits_per_month"]
@@ -160,11 +161,13 @@ async def change_plan(
         # Update subscription
         subscription = billing_service.update_subscription(
             current_user.stripe_subscription_id,
-            data.plan
+            data.plan,
+            subscription_item_id=current_user.stripe_subscription_item_id
         )
         
         # Update user
         current_user.plan = data.plan
+        current_user.stripe_subscription_item_id = subscription["item_id"]
         current_user.credits = PLAN_CONFIGS[data.plan]["credits_per_month"]
         
         db.commit()
@@ -205,6 +208,7 @@ async def cancel_subscription(
             current_user.plan = "free"
             current_user.credits = PLAN_CONFIGS["free"]["credits_per_month"]
             current_user.stripe_subscription_id = None
+            current_user.stripe_subscription_item_id = None
             db.commit()
         
         return {
@@ -259,7 +263,7 @@ async def get_payment_methods(
         return {"payment_methods": []}
     
     try:
-        methods = billing_service.get_payment_methods(
+        methods = await billing_service.get_payment_methods(
             current_user.stripe_customer_id
         )
         return {"payment_methods": methods}
@@ -281,7 +285,7 @@ async def get_invoices(
         return {"invoices": []}
     
     try:
-        invoices = billing_service.get_invoices(
+        invoices = await billing_service.get_invoices(
             current_user.stripe_customer_id,
             limit=limit
         )
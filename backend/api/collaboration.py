@@ -361,7 +361,7 @@ async def get_comments(
             "user_name": user.name if user else "Unknown",
             "content": comment.text,
             "created_at": comment.created_at.isoformat() if comment.created_at else None,
-            "resolved": bool(comment.is_resolved)
+            "resolved": comment.is_resolved
         })
     
     return {
@@ -407,7 +407,7 @@ async def resolve_comment(
         raise HTTPException(status_code=403, detail="Permission denied")
     
     # Resolve comment
-    comment.is_resolved = 1
+    comment.is_resolved = True
     comment.resolved_by = current_user.id
     comment.resolved_at = datetime.utcnow()
     db.commit()
@@ -145,14 +145,7 @@ Generate content as structured JSON with these sections:
         else:
             content_dict = generated_content
         
-        # Calculate word count
-        word_count = sum(
-            len(section.get("content", "").split())
-            for section in content_dict.get("sections", [])
-        )
-        reading_time = max(1, word_count // 200)  # Average reading speed: 200 wpm
-        
-        # Create document
+        # Create document (word count is maintained by the model on flush)
         document = Document(
             user_id=current_user.id,
             title=content_dict.get("title", request.prompt[:100]),
@@ -160,8 +153,6 @@ Generate content as structured JSON with these sections:
             content=content_dict,
             description=content_dict.get("metadata", {}).get("summary"),
             tags=content_dict.get("metadata", {}).get("keywords", []),
-            word_count=word_count,
-            reading_time_minutes=reading_time,
             folder_id=request.folder_id
         )
         
@@ -200,13 +191,6 @@ async def create_document(
         if not folder:
             raise HTTPException(status_code=404, detail="Folder not found")
     
-    # Calculate word count
-    word_count = sum(
-        len(section.get("content", "").split())
-        for section in request.content.get("sections", [])
-    )
-    reading_time = max(1, word_count // 200)
-    
     document = Document(
         user_id=current_user.id,
         title=request.title,
@@ -214,8 +198,6 @@ async def create_document(
         content=request.content,
         description=request.description,
         tags=request.tags or [],
-        word_count=word_count,
-        reading_time_minutes=reading_time,
         folder_id=request.folder_id
     )
     
@@ -305,13 +287,7 @@ async def update_document(
     if request.title is not None:
         document.title = request.title
     if request.content is not None:
-        document.content = request.content
-        # Recalculate word count
-        document.word_count = sum(
-            len(section.get("content", "").split())
-            for section in request.content.get("sections", [])
-        )
-        document.reading_time_minutes = max(1, document.word_count // 200)
+        document.content = request.content  # Changed sections are recounted on flush
     if request.description is not None:
         document.description = request.description
     if request.tags is not None:
@@ -437,7 +413,6 @@ async def duplicate_document(
         description=original.description,
         tags=original.tags.copy() if original.tags else [],
         word_count=original.word_count,
-        reading_time_minutes=original.reading_time_minutes,
         folder_id=original.folder_id
     )
     
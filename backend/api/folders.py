@@ -354,7 +354,7 @@ async def move_item_to_folder(
     elif item_type == "webpage":
         item = db.query(Webpage).filter(
             Webpage.id == request.item_id,
-            Webpage.user_id == current_user.id,
+            Webpage.author_id == current_user.id,
             Webpage.is_deleted == False
         ).first()
     elif item_type == "social_post":
@@ -424,7 +424,7 @@ async def get_folder_contents(
     # Get webpages
     webpages = db.query(Webpage).filter(
         Webpage.folder_id == folder_id,
-        Webpage.user_id == current_user.id,
+        Webpage.author_id == current_user.id,
         Webpage.is_deleted == False
     ).order_by(Webpage.updated_at.desc()).all()
     
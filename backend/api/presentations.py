@@ -14,6 +14,7 @@ from backend.models.user import User
 from backend.models.presentation import Presentation
 from backend.models.template import Template
 from backend.models.theme import Theme
+from backend.services.analytics_service import analytics_service
 from backend.utils.auth import get_current_user
 from backend.config import settings
 
@@ -147,6 +148,7 @@ async def create_presentation(
     db.add(presentation)
     db.commit()
     db.refresh(presentation)
+    analytics_service.invalidate(presentation_id=presentation.id, user_id=current_user.id)
     
     return presentation
 
@@ -256,6 +258,7 @@ async def update_presentation(
     
     db.commit()
     db.refresh(presentation)
+    analytics_service.invalidate(presentation_id=presentation_id, user_id=current_user.id)
     
     return presentation
 
@@ -281,6 +284,7 @@ async def delete_presentation(
     # Soft delete
     presentation.is_archived = True
     db.commit()
+    analytics_service.invalidate(presentation_id=presentation_id, user_id=current_user.id)
     
     return {"message": "Presentation archived successfully"}
 
@@ -306,6 +310,7 @@ async def permanently_delete_presentation(
     # Hard delete
     db.delete(presentation)
     db.commit()
+    analytics_service.invalidate(presentation_id=presentation_id, user_id=current_user.id)
     
     return {"message": "Presentation permanently deleted"}
 
@@ -331,6 +336,7 @@ async def restore_presentation(
     
     presentation.is_archived = False
     db.commit()
+    analytics_service.invalidate(presentation_id=presentation_id, user_id=current_user.id)
     
     return {"message": "Presentation restored successfully"}
 
@@ -369,6 +375,7 @@ async def duplicate_presentation(
     db.add(duplicate)
     db.commit()
     db.refresh(duplicate)
+    analytics_service.invalidate(presentation_id=duplicate.id, user_id=current_user.id)
     
     return duplicate
 
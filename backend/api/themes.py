@@ -3,11 +3,12 @@ Theme Management API Endpoints
 Handles theme listing, searching, and custom theme creation
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, select, update, func
 from typing import List, Optional
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from backend.db.base import get_db
 from backend.models.user import User
@@ -32,8 +33,7 @@ class ThemeResponse(BaseModel):
     usage_count: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra='ignore')
 
 
 class ThemeListResponse(BaseModel):
@@ -47,8 +47,7 @@ class ThemeListResponse(BaseModel):
     is_premium: bool
     usage_count: int
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra='ignore')
 
 
 class ThemeCreate(BaseModel):
@@ -62,6 +61,26 @@ class ThemeCreate(BaseModel):
     is_premium: bool = False
 
 
+# Columns backing ThemeListResponse - list routes select these directly and
+# hand the rows to orjson instead of validating ORM objects one by one
+THEME_LIST_COLUMNS = (
+    Theme.id,
+    Theme.name,
+    Theme.description,
+    Theme.category,
+    Theme.colors,
+    Theme.preview_url,
+    Theme.is_featured,
+    Theme.is_premium,
+    Theme.usage_count,
+)
+
+
+def theme_list_response(db: Session, stmt) -> ORJSONResponse:
+    """Serialize ThemeListResponse rows straight from the driver"""
+    return ORJSONResponse([dict(row) for row in db.execute(stmt).mappings()])
+
+
 # List All Themes
 @router.get("/", response_model=List[ThemeListResponse])
 async def list_themes(
@@ -83,16 +102,16 @@ async def list_themes(
     - **premium**: Filter by premium status
     - **sort_by**: Sort by 'popular' or 'recent'
     """
-    query = db.query(Theme)
+    query = select(*THEME_LIST_COLUMNS).where(Theme.is_deleted == False)
     
     # Filter by category
     if category:
-        query = query.filter(Theme.category == category)
+        query = query.where(Theme.category == category)
     
     # Search functionality
     if search:
         search_term = f"%{search}%"
-        query = query.filter(
+        query = query.where(
             or_(
                 Theme.name.ilike(search_term),
                 Theme.description.ilike(search_term)
@@ -101,11 +120,11 @@ async def list_themes(
     
     # Filter by featured
     if featured is not None:
-        query = query.filter(Theme.is_featured == featured)
+        query = query.where(Theme.is_featured == featured)
     
     # Filter by premium
     if premium is not None:
-        query = query.filter(Theme.is_premium == premium)
+        query = query.where(Theme.is_premium == premium)
     
     # Sorting
     if sort_by == "popular":
@@ -113,8 +132,7 @@ async def list_themes(
     elif sort_by == "recent":
         query = query.order_by(Theme.created_at.desc())
     
-    themes = query.offset(skip).limit(limit).all()
-    return themes
+    return theme_list_response(db, query.offset(skip).limit(limit))
 
 
 # Get Single Theme
@@ -126,7 +144,10 @@ async def get_theme(
     """
     Get a specific theme by ID
     """
-    theme = db.query(Theme).filter(Theme.id == theme_id).first()
+    theme = db.query(Theme).filter(
+        Theme.id == theme_id,
+        Theme.is_deleted == False
+    ).first()
     
     if not theme:
         raise HTTPException(status_code=404, detail="Theme not found")
@@ -157,13 +178,12 @@ async def get_themes_by_category(
             detail=f"Invalid category. Must be one of: {', '.join(valid_categories)}"
         )
     
-    themes = db.query(Theme).filter(
-        Theme.category == category
+    return theme_list_response(db, select(*THEME_LIST_COLUMNS).where(
+        Theme.category == category,
+        Theme.is_deleted == False
     ).order_by(
         Theme.usage_count.desc()
-    ).offset(skip).limit(limit).all()
-    
-    return themes
+    ).offset(skip).limit(limit))
 
 
 # Get Featured Themes
@@ -175,13 +195,12 @@ async def get_featured_themes(
     """
     Get featured themes
     """
-    themes = db.query(Theme).filter(
-        Theme.is_featured == True
+    return theme_list_response(db, select(*THEME_LIST_COLUMNS).where(
+        Theme.is_featured == True,
+        Theme.is_deleted == False
     ).order_by(
         Theme.usage_count.desc()
-    ).limit(limit).all()
-    
-    return themes
+    ).limit(limit))
 
 
 # Get Theme Categories
@@ -217,16 +236,15 @@ async def search_themes(
     """
     search_term = f"%{q}%"
     
-    themes = db.query(Theme).filter(
+    return theme_list_response(db, select(*THEME_LIST_COLUMNS).where(
         or_(
             Theme.name.ilike(search_term),
             Theme.description.ilike(search_term)
-        )
+        ),
+        Theme.is_deleted == False
     ).order_by(
         Theme.usage_count.desc()
-    ).offset(skip).limit(limit).all()
-    
-    return themes
+    ).offset(skip).limit(limit))
 
 
 # Create Custom Theme (Pro users only)
@@ -285,7 +303,6 @@ async def create_theme(
     
     db.add(theme)
     db.commit()
-    db.refresh(theme)
     
     return theme
 
@@ -299,13 +316,12 @@ async def get_user_themes(
     """
     Get all custom themes created by the current user
     """
-    themes = db.query(Theme).filter(
-        Theme.created_by_user_id == current_user.id
+    return theme_list_response(db, select(*THEME_LIST_COLUMNS).where(
+        Theme.created_by_user_id == current_user.id,
+        Theme.is_deleted == False
     ).order_by(
         Theme.created_at.desc()
-    ).all()
-    
-    return themes
+    ))
 
 
 # Update Custom Theme
@@ -321,7 +337,8 @@ async def update_theme(
     """
     theme = db.query(Theme).filter(
         Theme.id == theme_id,
-        Theme.created_by_user_id == current_user.id
+        Theme.created_by_user_id == current_user.id,
+        Theme.is_deleted == False
     ).first()
     
     if not theme:
@@ -340,7 +357,6 @@ async def update_theme(
         theme.preview_url = data.preview_url
     
     db.commit()
-    db.refresh(theme)
     
     return theme
 
@@ -353,20 +369,25 @@ async def delete_theme(
     db: Session = Depends(get_db)
 ):
     """
-    Delete a custom theme (only owner can delete)
+    Delete a custom theme (only owner can delete).
+    Soft delete in a single UPDATE; the nightly purge task removes the row.
     """
-    theme = db.query(Theme).filter(
-        Theme.id == theme_id,
-        Theme.created_by_user_id == current_user.id
-    ).first()
+    result = db.execute(
+        update(Theme).where(
+            Theme.id == theme_id,
+            Theme.created_by_user_id == current_user.id,
+            Theme.is_deleted == False
+        ).values(is_deleted=True, deleted_at=func.now()),
+        execution_options={"synchronize_session": False}
+    )
     
-    if not theme:
+    if result.rowcount != 1:
+        db.rollback()
         raise HTTPException(
             status_code=404,
             detail="Theme not found or you don't have permission to delete it"
         )
     
-    db.delete(theme)
     db.commit()
     
     return {"message": "Theme deleted successfully"}
@@ -381,7 +402,10 @@ async def get_theme_stats(
     """
     Get statistics for a theme
     """
-    theme = db.query(Theme).filter(Theme.id == theme_id).first()
+    theme = db.query(Theme).filter(
+        Theme.id == theme_id,
+        Theme.is_deleted == False
+    ).first()
     
     if not theme:
         raise HTTPException(status_code=404, detail="Theme not found")
@@ -405,8 +429,8 @@ async def get_popular_themes(
     """
     Get most popular themes based on usage count
     """
-    themes = db.query(Theme).order_by(
+    return theme_list_response(db, select(*THEME_LIST_COLUMNS).where(
+        Theme.is_deleted == False
+    ).order_by(
         Theme.usage_count.desc()
-    ).limit(limit).all()
-    
-    return themes
+    ).limit(limit))
@@ -2,24 +2,65 @@
 Webpages API endpoints for Gamma Clone
 Handles public-facing webpages with custom domain support
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, exists, literal, update, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+from typing import Dict, Final, Iterator, List, Optional
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, Json, computed_field
+import hashlib
+import orjson
+import secrets
 
 from backend.db.base import get_db
+from backend.db.counters import webpage_counters
 from backend.models.user import User
-from backend.models.webpage import Webpage, WebpageType
+from backend.models.webpage import Webpage, WebpageStatus, WebpageType
 from backend.models.folder import Folder
 from backend.models.custom_domain import CustomDomain, DomainStatus
 from backend.utils.auth import get_current_user
+from backend.utils.credits import reserve_credits, refund_credits
 from backend.services.ai_service import AIService
 from backend.config import settings
 
 router = APIRouter(prefix="/api/v1/webpages", tags=["Webpages"])
 
 
+# Published webpages live at https://<subdomain>.<PUBLIC_HOST>
+PUBLIC_HOST_SUFFIX: Final[str] = "." + settings.PUBLIC_HOST
+
+# Rows fetched per round-trip when streaming webpage listings
+STREAM_BATCH_SIZE: Final[int] = 50
+
+# Generation prompt pieces - built once at import, formatted per request
+TYPE_INSTRUCTIONS: Final[Dict[WebpageType, str]] = {
+    WebpageType.LANDING_PAGE: "Create a high-converting landing page with hero section, features, benefits, social proof, and strong CTA.",
+    WebpageType.PORTFOLIO: "Design a professional portfolio showcasing work samples, skills, testimonials, and contact information.",
+    WebpageType.ABOUT: "Compose an about page telling the story, mission, team, and values.",
+    WebpageType.PRODUCT: "Develop a product page with features, specifications, pricing, reviews, and purchase options.",
+    WebpageType.SERVICE: "Present a service page with offerings, process, pricing, testimonials, and a booking or contact CTA.",
+    WebpageType.EVENT: "Build an event page with details, agenda, speakers, registration, and venue information.",
+    WebpageType.BLOG_POST: "Write a blog post with an engaging introduction, well-structured sections, and a clear conclusion."
+}
+
+WEBPAGE_PROMPT_TEMPLATE: Final[str] = """Create a {webpage_type} webpage.
+
+Topic: {topic}
+Target Audience: {audience}
+Tone: {tone}
+Include Call-to-Action: {include_cta}
+
+Instructions: {instructions}
+
+Generate content as structured JSON with:
+- title: Page title
+- sections: Array of objects with {{"type": str, "heading": str, "content": str, "cta": optional}}
+- seo: Object with {{"title": str, "description": str, "keywords": []}}
+"""
+
+
 # Request/Response Models
 class GenerateWebpageRequest(BaseModel):
     prompt: str
@@ -59,27 +100,85 @@ class PublishWebpageRequest(BaseModel):
 
 
 class WebpageResponse(BaseModel):
-    id: str
+    id: int
     title: str
     webpage_type: str
-    content: dict
-    description: Optional[str]
+    content: Json[dict] = Field(validation_alias="content_json")
+    description: Optional[str] = None
     subdomain: Optional[str]
-    custom_domain_id: Optional[str]
-    is_published: bool
-    public_url: Optional[str]
-    seo_title: Optional[str]
-    seo_description: Optional[str]
-    seo_keywords: List[str]
-    og_image_url: Optional[str]
+    custom_domain_id: Optional[int]
+    status: WebpageStatus = Field(exclude=True)
+    public_url: Optional[str] = Field(validation_alias="full_url")
+    seo_title: Optional[str] = None
+    seo_description: Optional[str] = Field(None, validation_alias="meta_description")
+    seo_keywords: Optional[List[str]] = None
+    og_image_url: Optional[str] = None
     view_count: int
     unique_visitors: int
-    folder_id: Optional[str]
+    folder_id: Optional[int]
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, extra='ignore')
+
+    @computed_field
+    @property
+    def is_published(self) -> bool:
+        return self.status == WebpageStatus.PUBLISHED
+
+
+# Helpers
+def folder_owned_clause(folder_id: str, user_id):
+    """EXISTS clause for a live folder owned by the user"""
+    return exists().where(
+        Folder.id == folder_id,
+        Folder.user_id == user_id,
+        Folder.is_deleted == False
+    )
+
+
+def subdomain_taken_clause(subdomain: str, exclude_id: str):
+    """EXISTS clause for another live webpage using the subdomain"""
+    return exists().where(
+        Webpage.subdomain == subdomain,
+        Webpage.id != exclude_id,
+        Webpage.is_deleted == False
+    )
+
+
+def verified_domain_clause(domain_id: str, user_id):
+    """Scalar subquery returning the host of a verified domain owned by the user"""
+    return select(CustomDomain.domain).where(
+        CustomDomain.id == domain_id,
+        CustomDomain.user_id == user_id,
+        CustomDomain.status == DomainStatus.VERIFIED
+    ).scalar_subquery()
+
+
+def subdomain_url(subdomain: str) -> str:
+    """Public URL for a webpage published on a gamma subdomain"""
+    return "https://" + subdomain + PUBLIC_HOST_SUFFIX
+
+
+def stream_webpages(db: Session, query) -> Iterator[bytes]:
+    """
+    Yield a JSON array of WebpageResponse objects, fetching rows in batches.
+    Uses the request session: DBSessionMiddleware keeps it open until the
+    streamed body has been sent.
+    """
+    yield b"["
+    first = True
+    for webpage in db.scalars(query.execution_options(yield_per=STREAM_BATCH_SIZE)):
+        if not first:
+            yield b","
+        first = False
+        yield WebpageResponse.model_validate(webpage).model_dump_json().encode()
+    yield b"]"
+
+
+def folder_owned(db: Session, folder_id: str, user_id) -> bool:
+    """Check folder ownership with an EXISTS probe instead of loading the row"""
+    return db.scalar(select(folder_owned_clause(folder_id, user_id)))
 
 
 @router.post("/generate", response_model=WebpageResponse, status_code=status.HTTP_201_CREATED)
@@ -94,63 +193,42 @@ async def generate_webpage(
     """
     cost = 12
     
-    if current_user.credits < cost:
+    # Validate folder ownership if provided
+    if request.folder_id and not folder_owned(db, request.folder_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Folder not found")
+    
+    # Deduct credits up front in one conditional UPDATE so concurrent
+    # generations can't both spend the same balance during the AI call
+    if reserve_credits(current_user, cost, db) is None:
         raise HTTPException(
             status_code=status.HTTP_402_PAYMENT_REQUIRED,
-            detail=f"Insufficient credits. Need {cost}, have {current_user.credits}"
+            detail=f"Insufficient credits. Need {cost}, have {current_user.credits_remaining}"
         )
     
-    # Validate folder ownership if provided
-    if request.folder_id:
-        folder = db.query(Folder).filter(
-            Folder.id == request.folder_id,
-            Folder.user_id == current_user.id,
-            Folder.is_deleted == False
-        ).first()
-        if not folder:
-            raise HTTPException(status_code=404, detail="Folder not found")
-    
     try:
         ai_service = AIService()
         
         # Build generation prompt based on webpage type
-        type_instructions = {
-            WebpageType.LANDING_PAGE: "Create a high-converting landing page with hero section, features, benefits, social proof, and strong CTA.",
-            WebpageType.PORTFOLIO: "Design a professional portfolio showcasing work samples, skills, testimonials, and contact information.",
-            WebpageType.EVENT_PAGE: "Build an event page with details, agenda, speakers, registration, and venue information.",
-            WebpageType.PRODUCT_PAGE: "Develop a product page with features, specifications, pricing, reviews, and purchase options.",
-            WebpageType.ABOUT_PAGE: "Compose an about page telling the story, mission, team, and values.",
-            WebpageType.CONTACT_PAGE: "Create a contact page with form, location, hours, and multiple contact methods.",
-            WebpageType.CUSTOM: "Design a custom webpage based on the specific requirements provided."
-        }
-        
-        full_prompt = f"""Create a {request.webpage_type.value} webpage.
-
-Topic: {request.prompt}
-Target Audience: {request.target_audience or 'General audience'}
-Tone: {request.tone}
-Include Call-to-Action: {request.include_cta}
-
-Instructions: {type_instructions.get(request.webpage_type, '')}
-
-Generate content as structured JSON with:
-- title: Page title
-- sections: Array of objects with {{"type": str, "heading": str, "content": str, "cta": optional}}
-- seo: Object with {{"title": str, "description": str, "keywords": []}}
-"""
+        full_prompt = WEBPAGE_PROMPT_TEMPLATE.format(
+            webpage_type=request.webpage_type.value,
+            topic=request.prompt,
+            audience=request.target_audience or 'General audience',
+            tone=request.tone,
+            include_cta=request.include_cta,
+            instructions=TYPE_INSTRUCTIONS[request.webpage_type]
+        )
         
         generated_content = await ai_service.generate_presentation(
             topic=full_prompt,
-            user_id=current_user.id,
+            author_id=current_user.id,
             options={"output_format": "webpage", "include_cta": request.include_cta}
         )
         
         # Parse generated content
         if isinstance(generated_content, str):
-            import json
             try:
-                content_dict = json.loads(generated_content)
-            except:
+                content_dict = orjson.loads(generated_content)
+            except orjson.JSONDecodeError:
                 content_dict = {
                     "title": f"{request.webpage_type.value.title()} Page",
                     "sections": [{"type": "text", "heading": "Content", "content": generated_content}],
@@ -161,7 +239,7 @@ Generate content as structured JSON with:
         
         # Create webpage
         webpage = Webpage(
-            user_id=current_user.id,
+            author_id=current_user.id,
             title=content_dict.get("title", request.prompt[:100]),
             webpage_type=request.webpage_type,
             content=content_dict,
@@ -173,17 +251,13 @@ Generate content as structured JSON with:
         )
         
         db.add(webpage)
-        
-        # Deduct credits
-        current_user.credits -= cost
-        
         db.commit()
-        db.refresh(webpage)
         
         return webpage
         
     except Exception as e:
         db.rollback()
+        refund_credits(current_user, cost, db)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Webpage generation failed: {str(e)}"
@@ -198,17 +272,11 @@ async def create_webpage(
 ):
     """Create a new webpage manually"""
     # Validate folder ownership if provided
-    if request.folder_id:
-        folder = db.query(Folder).filter(
-            Folder.id == request.folder_id,
-            Folder.user_id == current_user.id,
-            Folder.is_deleted == False
-        ).first()
-        if not folder:
-            raise HTTPException(status_code=404, detail="Folder not found")
+    if request.folder_id and not folder_owned(db, request.folder_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Folder not found")
     
     webpage = Webpage(
-        user_id=current_user.id,
+        author_id=current_user.id,
         title=request.title,
         webpage_type=request.webpage_type,
         content=request.content,
@@ -222,7 +290,6 @@ async def create_webpage(
     
     db.add(webpage)
     db.commit()
-    db.refresh(webpage)
     
     return webpage
 
@@ -237,23 +304,35 @@ async def list_webpages(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """List all webpages for current user with optional filters"""
-    query = db.query(Webpage).filter(
-        Webpage.user_id == current_user.id,
-        Webpage.is_deleted == False
+    """
+    List all webpages for current user with optional filters.
+    Rows are streamed as a JSON array so large content payloads are never
+    buffered in memory all at once.
+    """
+    # Both are many-to-one, so a joined load adds no rows; unlike selectinload
+    # it also works with the yield_per streaming below
+    query = select(Webpage).options(
+        joinedload(Webpage.folder),
+        joinedload(Webpage.custom_domain)
+    ).where(
+        Webpage.author_id == current_user.id
     )
     
     if webpage_type:
-        query = query.filter(Webpage.webpage_type == webpage_type)
+        query = query.where(Webpage.webpage_type == webpage_type)
     
     if folder_id:
-        query = query.filter(Webpage.folder_id == folder_id)
+        query = query.where(Webpage.folder_id == folder_id)
     
     if is_published is not None:
-        query = query.filter(Webpage.is_published == is_published)
+        query = query.where(
+            Webpage.status == WebpageStatus.PUBLISHED if is_published
+            else Webpage.status != WebpageStatus.PUBLISHED
+        )
     
-    webpages = query.order_by(Webpage.updated_at.desc()).offset(skip).limit(limit).all()
-    return webpages
+    query = query.order_by(Webpage.updated_at.desc()).offset(skip).limit(limit)
+    
+    return StreamingResponse(stream_webpages(db, query), media_type="application/json")
 
 
 @router.get("/{webpage_id}", response_model=WebpageResponse)
@@ -265,8 +344,7 @@ async def get_webpage(
     """Get a specific webpage by ID"""
     webpage = db.query(Webpage).filter(
         Webpage.id == webpage_id,
-        Webpage.user_id == current_user.id,
-        Webpage.is_deleted == False
+        Webpage.author_id == current_user.id
     ).first()
     
     if not webpage:
@@ -283,24 +361,22 @@ async def update_webpage(
     db: Session = Depends(get_db)
 ):
     """Update an existing webpage"""
-    webpage = db.query(Webpage).filter(
+    # Load the webpage and validate folder ownership in one round-trip
+    folder_check = (
+        folder_owned_clause(request.folder_id, current_user.id)
+        if request.folder_id else literal(True)
+    )
+    row = db.query(Webpage, folder_check).filter(
         Webpage.id == webpage_id,
-        Webpage.user_id == current_user.id,
-        Webpage.is_deleted == False
+        Webpage.author_id == current_user.id
     ).first()
     
-    if not webpage:
+    if not row:
         raise HTTPException(status_code=404, detail="Webpage not found")
     
-    # Validate folder ownership if provided
-    if request.folder_id:
-        folder = db.query(Folder).filter(
-            Folder.id == request.folder_id,
-            Folder.user_id == current_user.id,
-            Folder.is_deleted == False
-        ).first()
-        if not folder:
-            raise HTTPException(status_code=404, detail="Folder not found")
+    webpage, folder_ok = row
+    if not folder_ok:
+        raise HTTPException(status_code=404, detail="Folder not found")
     
     # Update fields
     if request.title is not None:
@@ -323,7 +399,6 @@ async def update_webpage(
     webpage.updated_at = datetime.utcnow()
     
     db.commit()
-    db.refresh(webpage)
     
     return webpage
 
@@ -334,20 +409,22 @@ async def delete_webpage(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Soft delete a webpage"""
-    webpage = db.query(Webpage).filter(
-        Webpage.id == webpage_id,
-        Webpage.user_id == current_user.id,
-        Webpage.is_deleted == False
-    ).first()
+    """Soft delete a webpage in a single UPDATE (purged later by a nightly task)"""
+    result = db.execute(
+        update(Webpage).where(
+            Webpage.id == webpage_id,
+            Webpage.author_id == current_user.id,
+            Webpage.is_deleted == False
+        ).values(is_deleted=True, deleted_at=func.now()),
+        execution_options={"synchronize_session": False}
+    )
     
-    if not webpage:
+    if result.rowcount != 1:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Webpage not found")
     
-    webpage.is_deleted = True
-    webpage.deleted_at = datetime.utcnow()
-    
     db.commit()
+    webpage_counters.forget(int(webpage_id))
     
     return None
 
@@ -365,15 +442,25 @@ async def publish_webpage(
     Pro: Custom subdomain
     Ultra: Custom domain support
     """
-    webpage = db.query(Webpage).filter(
+    # Fetch the webpage together with the domain host / subdomain check
+    # the chosen publish mode needs, so publishing costs one round-trip
+    if request.custom_domain_id:
+        publish_check = verified_domain_clause(request.custom_domain_id, current_user.id)
+    elif request.subdomain:
+        publish_check = subdomain_taken_clause(request.subdomain, webpage_id)
+    else:
+        publish_check = literal(None)
+    
+    row = db.query(Webpage, publish_check).filter(
         Webpage.id == webpage_id,
-        Webpage.user_id == current_user.id,
-        Webpage.is_deleted == False
+        Webpage.author_id == current_user.id
     ).first()
     
-    if not webpage:
+    if not row:
         raise HTTPException(status_code=404, detail="Webpage not found")
     
+    webpage, publish_check_result = row
+    
     # Handle custom domain (Ultra only)
     if request.custom_domain_id:
         if current_user.plan != "ultra":
@@ -382,17 +469,12 @@ async def publish_webpage(
                 detail="Custom domains require Ultra plan"
             )
         
-        domain = db.query(CustomDomain).filter(
-            CustomDomain.id == request.custom_domain_id,
-            CustomDomain.user_id == current_user.id,
-            CustomDomain.status == DomainStatus.VERIFIED
-        ).first()
-        
-        if not domain:
+        domain_host = publish_check_result
+        if not domain_host:
             raise HTTPException(status_code=404, detail="Verified custom domain not found")
         
         webpage.custom_domain_id = request.custom_domain_id
-        webpage.public_url = f"https://{domain.domain}"
+        webpage.full_url = "https://" + domain_host
         webpage.subdomain = None
     
     # Handle custom subdomain (Pro/Ultra)
@@ -404,32 +486,30 @@ async def publish_webpage(
             )
         
         # Check subdomain availability
-        existing = db.query(Webpage).filter(
-            Webpage.subdomain == request.subdomain,
-            Webpage.id != webpage_id,
-            Webpage.is_deleted == False
-        ).first()
-        
-        if existing:
+        if publish_check_result:
             raise HTTPException(status_code=409, detail="Subdomain already taken")
         
         webpage.subdomain = request.subdomain
-        webpage.public_url = f"https://{request.subdomain}.gamma.app"
+        webpage.full_url = subdomain_url(request.subdomain)
         webpage.custom_domain_id = None
     
     # Default: Random subdomain (all plans)
     else:
         if not webpage.subdomain:
-            import secrets
-            webpage.subdomain = f"web-{secrets.token_urlsafe(8)}"
-        webpage.public_url = f"https://{webpage.subdomain}.gamma.app"
+            webpage.subdomain = f"web-{secrets.token_hex(6)}"
+        webpage.full_url = subdomain_url(webpage.subdomain)
         webpage.custom_domain_id = None
     
-    webpage.is_published = True
+    webpage.status = WebpageStatus.PUBLISHED
     webpage.published_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(webpage)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost a race for the same subdomain (webpages_subdomain_active)
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Subdomain already taken")
+    webpage_counters.forget(webpage.id)
     
     return webpage
 
@@ -443,22 +523,38 @@ async def unpublish_webpage(
     """Unpublish webpage (remove from public access)"""
     webpage = db.query(Webpage).filter(
         Webpage.id == webpage_id,
-        Webpage.user_id == current_user.id,
-        Webpage.is_deleted == False
+        Webpage.author_id == current_user.id
     ).first()
     
     if not webpage:
         raise HTTPException(status_code=404, detail="Webpage not found")
     
-    webpage.is_published = False
-    webpage.public_url = None
+    webpage.status = WebpageStatus.DRAFT
+    webpage.full_url = None
     
     db.commit()
-    db.refresh(webpage)
+    webpage_counters.forget(webpage.id)
     
     return webpage
 
 
+@router.post("/{webpage_id}/view", status_code=status.HTTP_204_NO_CONTENT)
+async def record_webpage_view(webpage_id: int, request: Request):
+    """
+    Count a public page view (no auth, no per-request database round-trip)
+    Views and unique visitors accumulate in Redis and are flushed to the
+    webpage row periodically, see backend/db/counters.py. 404 unless the
+    page is published.
+    """
+    client = request.client.host if request.client else ""
+    visitor = hashlib.blake2b(
+        f"{client}|{request.headers.get('user-agent', '')}".encode(), digest_size=16
+    ).hexdigest()
+    if not await webpage_counters.record_view(webpage_id, visitor):
+        raise HTTPException(status_code=404, detail="Webpage not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.post("/{webpage_id}/duplicate", response_model=WebpageResponse, status_code=status.HTTP_201_CREATED)
 async def duplicate_webpage(
     webpage_id: str,
@@ -468,8 +564,7 @@ async def duplicate_webpage(
     """Create a duplicate copy of an existing webpage"""
     original = db.query(Webpage).filter(
         Webpage.id == webpage_id,
-        Webpage.user_id == current_user.id,
-        Webpage.is_deleted == False
+        Webpage.author_id == current_user.id
     ).first()
     
     if not original:
@@ -477,7 +572,7 @@ async def duplicate_webpage(
     
     # Create duplicate
     duplicate = Webpage(
-        user_id=current_user.id,
+        author_id=current_user.id,
         title=f"{original.title} (Copy)",
         webpage_type=original.webpage_type,
         content=original.content.copy(),
@@ -491,6 +586,5 @@ async def duplicate_webpage(
     
     db.add(duplicate)
     db.commit()
-    db.refresh(duplicate)
     
     return duplicate
@@ -3,13 +3,23 @@ Gamma Clone Configuration
 Central configuration for all backend services
 """
 
-from pydantic_settings import BaseSettings
+from dataclasses import dataclass, field, fields
+from dotenv import dotenv_values
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Optional
+import json
 import os
+import warnings
 
 
-class Settings(BaseSettings):
-    """Application settings"""
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """
+    Application settings
+    Plain frozen dataclass - _load_settings() fills it from a single snapshot
+    of .env + os.environ, without pydantic validation at import time.
+    """
     
     # Application
     APP_NAME: str = "Gamma Clone"
@@ -18,22 +28,28 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     
     # Database
-    DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./gamma_clone.db")
-    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
-    MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+    DATABASE_URL: str = "sqlite:///./gamma_clone.db"
+    # Credential-free form of DATABASE_URL for logs (derived in __post_init__)
+    DATABASE_DISPLAY: str = field(init=False, default="local")
+    # DATABASE_URL points at PgBouncer (transaction pooling): no prepared
+    # statement caches and no startup parameters on server connections
+    PGBOUNCER: bool = False
+    REDIS_URL: str = "redis://localhost:6379"
+    MONGODB_URL: str = "mongodb://localhost:27017"
     
     # Security
-    SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production-min-32-chars")
+    SECRET_KEY: str = "your-secret-key-change-this-in-production-min-32-chars"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 43200  # 30 days
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
+    def __post_init__(self):
+        if "@" in self.DATABASE_URL:
+            object.__setattr__(self, "DATABASE_DISPLAY", self.DATABASE_URL.split("@")[-1])
+        
         # Warn if using default SECRET_KEY
         if self.SECRET_KEY == "your-secret-key-change-this-in-production":
-            import warnings
             warnings.warn(
                 "WARNING: Using default SECRET_KEY! "
                 "Set SECRET_KEY environment variable in production.",
@@ -42,11 +58,11 @@ class Settings(BaseSettings):
             )
     
     # CORS
-    BACKEND_CORS_ORIGINS: list = [
+    BACKEND_CORS_ORIGINS: list = field(default_factory=lambda: [
         "http://localhost:3000",
         "http://localhost:8000",
         "http://127.0.0.1:3000",
-    ]
+    ])
     
     # AI Services - OpenAI (Paid)
     OPENAI_API_KEY: Optional[str] = None
@@ -61,8 +77,8 @@ class Settings(BaseSettings):
     STABILITY_API_KEY: Optional[str] = None
     
     # OAuth Configuration
-    GOOGLE_CLIENT_ID: Optional[str] = os.getenv("GOOGLE_CLIENT_ID")
-    GOOGLE_CLIENT_SECRET: Optional[str] = os.getenv("GOOGLE_CLIENT_SECRET")
+    GOOGLE_CLIENT_ID: Optional[str] = None
+    GOOGLE_CLIENT_SECRET: Optional[str] = None
     
     # AI Provider Selection
     USE_FREE_PROVIDERS: bool = True  # Use free providers instead of OpenAI
@@ -70,6 +86,9 @@ class Settings(BaseSettings):
     # AI Model Configuration
     DEFAULT_TEXT_MODEL: str = "gpt-4-turbo-preview"
     DEFAULT_IMAGE_MODEL: str = "dall-e-3"
+    # Serve rewrite/translate from near-duplicate cached inputs (needs sentence-transformers)
+    AI_SEMANTIC_CACHE: bool = False
+    AI_SEMANTIC_CACHE_THRESHOLD: float = 0.95
     
     # Credits Configuration
     FREE_PLAN_CREDITS: int = 400
@@ -92,14 +111,14 @@ class Settings(BaseSettings):
     PRO_EXPORT_LIMIT: int = -1   # unlimited
     
     # Features Access
-    FREE_FEATURES: list = [
+    FREE_FEATURES: frozenset = frozenset({
         "basic_generation",
         "limited_templates",
         "basic_themes",
         "web_sharing"
-    ]
+    })
     
-    PLUS_FEATURES: list = [
+    PLUS_FEATURES: frozenset = frozenset({
         "unlimited_generation",
         "all_templates",
         "all_themes",
@@ -108,9 +127,9 @@ class Settings(BaseSettings):
         "custom_branding",
         "analytics",
         "team_collaboration"
-    ]
+    })
     
-    PRO_FEATURES: list = [
+    PRO_FEATURES: frozenset = frozenset({
         "unlimited_generation",
         "all_templates",
         "all_themes",
@@ -121,7 +140,7 @@ class Settings(BaseSettings):
         "api_access",
         "white_label",
         "unlimited_team_members"
-    ]
+    })
     
     # Credits Configuration (legacy compatibility)
     CREDITS_FREE_PLAN: int = 400
@@ -175,10 +194,10 @@ class Settings(BaseSettings):
     
     # File Upload
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
-    ALLOWED_EXTENSIONS: set = {
+    ALLOWED_EXTENSIONS: set = field(default_factory=lambda: {
         "png", "jpg", "jpeg", "gif", "webp",
         "pdf", "pptx", "docx", "txt", "md"
-    }
+    })
     
     # Export
     EXPORT_QUALITY_HIGH: str = "high"
@@ -187,28 +206,79 @@ class Settings(BaseSettings):
     
     # Frontend URLs
     FRONTEND_URL: str = "http://localhost:3000"
+    PUBLIC_HOST: str = "gamma.app"  # Published webpages: <subdomain>.PUBLIC_HOST
     
     # Monitoring
     SENTRY_DSN: Optional[str] = None
     LOG_LEVEL: str = "INFO"
+
+
+
+_TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+
+
+def _to_bool(value: str) -> bool:
+    return value.strip().lower() in _TRUE_VALUES
+
+
+def _to_list(value: str) -> list:
+    """Accept a JSON array (pydantic-settings format) or a comma-separated string"""
+    value = value.strip()
+    if value.startswith("["):
+        return json.loads(value)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+# Env values are strings; str and Optional[str] fields pass through as-is
+_COERCERS = {
+    bool: _to_bool,
+    int: int,
+    float: float,
+    list: _to_list,
+    set: lambda value: set(_to_list(value)),
+    frozenset: lambda value: frozenset(_to_list(value)),
+}
+
+
+def _coerce(field_type, value: str):
+    coerce = _COERCERS.get(field_type)
+    return coerce(value) if coerce else value
+
+
+def _load_settings() -> Settings:
+    """Build Settings from one snapshot of .env and the process environment"""
+    # Process environment wins over .env, matching pydantic-settings
+    env = {k: v for k, v in dotenv_values(".env").items() if v is not None}
+    env.update(os.environ)
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    values = {}
+    for f in fields(Settings):
+        if not f.init:
+            continue
+        raw = env.get(f.name)
+        if raw is not None:
+            values[f.name] = _coerce(f.type, raw)
+    return Settings(**values)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build the settings singleton (env is resolved once)"""
+    return _load_settings()
 
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 
-# Plan configurations
-PLAN_CONFIGS = {
+# Plan configurations (read-only)
+PLAN_CONFIGS = MappingProxyType({
     "free": {
         "name": "Free",
         "price": 0,
         "monthly_credits": 0,  # One-time 400 credits
         "max_cards_per_generation": 10,
-        "features": [
+        "features": (
             "400 AI credits (one-time)",
             "Generate up to 10 cards",
             "Basic AI models",
@@ -216,14 +286,14 @@ PLAN_CONFIGS = {
             "Web publishing",
             "Basic templates",
             "Gamma branding"
-        ]
+        )
     },
     "plus": {
         "name": "Plus",
         "price": 8,
         "monthly_credits": 1000,
         "max_cards_per_generation": 30,
-        "features": [
+        "features": (
             "Everything in Free",
             "Unlimited AI creations",
             "1,000 monthly credits",
@@ -232,14 +302,14 @@ PLAN_CONFIGS = {
             "Custom fonts",
             "Basic analytics",
             "Priority support"
-        ]
+        )
     },
     "pro": {
         "name": "Pro",
         "price": 18,
         "monthly_credits": 4000,
         "max_cards_per_generation": 60,
-        "features": [
+        "features": (
             "Everything in Plus",
             "4,000 monthly credits",
             "Premium AI models (GPT-4, DALL-E 3)",
@@ -248,14 +318,14 @@ PLAN_CONFIGS = {
             "Password protection",
             "API access",
             "10 custom domains"
-        ]
+        )
     },
     "ultra": {
         "name": "Ultra",
         "price": 100,
         "monthly_credits": 20000,
         "max_cards_per_generation": 75,
-        "features": [
+        "features": (
             "Everything in Pro",
             "20,000 monthly credits",
             "Most advanced AI models",
@@ -263,70 +333,71 @@ PLAN_CONFIGS = {
             "Early access to features",
             "Studio Mode (cinematic images)",
             "Extended generation"
-        ]
+        )
     },
     "team": {
         "name": "Team",
         "price": 20,  # per user
         "monthly_credits": 2000,
         "max_cards_per_generation": 50,
-        "features": [
+        "features": (
             "Team workspaces",
             "Real-time collaboration",
             "Brand kits",
             "Admin controls",
             "Team analytics"
-        ]
+        )
     },
     "business": {
         "name": "Business",
         "price": 40,  # per user
         "monthly_credits": 5000,
         "max_cards_per_generation": 75,
-        "features": [
+        "features": (
             "Everything in Team",
             "SSO",
             "Advanced security",
             "Dedicated support",
             "Custom contracts"
-        ]
+        )
     }
-}
+})
 
 
 # Card type definitions (34+ types)
-CARD_TYPES = [
+CARD_TYPES = (
     "title", "content", "image", "split", "quote", "stats",
     "timeline", "comparison", "cta", "video", "audio", "code",
     "table", "chart", "diagram", "flowchart", "orgchart", "mindmap",
     "gantt", "kanban", "form", "button", "divider", "spacer",
     "gallery", "carousel", "accordion", "tabs", "hero", "feature-grid",
     "testimonial", "pricing", "faq", "contact"
-]
+)
+CARD_TYPES_SET = frozenset(CARD_TYPES)  # O(1) membership checks
 
 
 # Template categories
-TEMPLATE_CATEGORIES = {
-    'business': ['Pitch Decks', 'Business Plans', 'Quarterly Reviews', 
-                 'Sales Presentations', 'Marketing Plans', 'Annual Reports'],
-    'education': ['Lectures', 'Course Materials', 'Student Projects',
-                  'Research Presentations', 'Thesis Defense', 'Workshops'],
-    'technology': ['Product Launches', 'Tech Demos', 'API Documentation',
-                   'Software Architecture', 'Development Roadmaps', 'Sprint Reviews'],
-    'marketing': ['Campaign Briefs', 'Brand Guidelines', 'Social Media Strategy',
-                  'Content Calendars', 'Influencer Decks', 'Product Marketing'],
-    'sales': ['Sales Decks', 'Product Demos', 'ROI Calculators',
-              'Territory Plans', 'Win/Loss Analysis', 'Pricing Proposals'],
-    'creative': ['Portfolios', 'Design Presentations', 'Creative Briefs',
-                 'Mood Boards', 'Style Guides', 'Photography Portfolios'],
-    'healthcare': ['Medical Presentations', 'Patient Education', 'Research Posters',
-                   'Clinical Trials', 'Health Reports', 'Wellness Programs'],
-    'finance': ['Financial Reports', 'Investment Pitches', 'Budget Presentations',
-                'Audit Reports', 'Risk Assessments', 'Portfolio Reviews']
-}
+TEMPLATE_CATEGORIES = MappingProxyType({
+    'business': ('Pitch Decks', 'Business Plans', 'Quarterly Reviews', 
+                 'Sales Presentations', 'Marketing Plans', 'Annual Reports'),
+    'education': ('Lectures', 'Course Materials', 'Student Projects',
+                  'Research Presentations', 'Thesis Defense', 'Workshops'),
+    'technology': ('Product Launches', 'Tech Demos', 'API Documentation',
+                   'Software Architecture', 'Development Roadmaps', 'Sprint Reviews'),
+    'marketing': ('Campaign Briefs', 'Brand Guidelines', 'Social Media Strategy',
+                  'Content Calendars', 'Influencer Decks', 'Product Marketing'),
+    'sales': ('Sales Decks', 'Product Demos', 'ROI Calculators',
+              'Territory Plans', 'Win/Loss Analysis', 'Pricing Proposals'),
+    'creative': ('Portfolios', 'Design Presentations', 'Creative Briefs',
+                 'Mood Boards', 'Style Guides', 'Photography Portfolios'),
+    'healthcare': ('Medical Presentations', 'Patient Education', 'Research Posters',
+                   'Clinical Trials', 'Health Reports', 'Wellness Programs'),
+    'finance': ('Financial Reports', 'Investment Pitches', 'Budget Presentations',
+                'Audit Reports', 'Risk Assessments', 'Portfolio Reviews')
+})
 
 
 # Theme categories
-THEME_CATEGORIES = [
+THEME_CATEGORIES = (
     'professional', 'creative', 'minimal', 'bold', 'dark'
-]
+)
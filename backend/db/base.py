@@ -2,16 +2,28 @@
 Database connection and session management
 """
 
-from sqlalchemy import create_engine
+import asyncio
+from contextvars import ContextVar
+from sqlalchemy import (
+    create_engine, MetaData, Table, Column, Integer, String, select, insert, delete
+)
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.schema import CreateTable, CreateIndex
 from backend.config import settings
-from typing import Generator, Optional
+from backend.utils.logging import db_logger
+from typing import AsyncGenerator, Optional
+import hashlib
+import orjson
 
 # Database connection - supports PostgreSQL and SQLite
 connect_args = {}
 if settings.DATABASE_URL.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
+elif settings.PGBOUNCER:
+    # PgBouncer rejects startup options; set statement_timeout on the role instead
+    connect_args = {"connect_timeout": 10}
 else:
     # PostgreSQL connection pool optimization
     connect_args = {
@@ -19,6 +31,10 @@ else:
         "options": "-c statement_timeout=30000"  # 30 second query timeout
     }
 
+def _json_dumps(value) -> str:
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args=connect_args,
@@ -28,6 +44,8 @@ engine = create_engine(
     pool_recycle=3600,  # Recycle connections after 1 hour
     pool_timeout=30,  # Timeout for getting connection from pool
     echo=settings.DEBUG,
+    json_serializer=_json_dumps,  # orjson for JSON/JSONB columns
+    json_deserializer=orjson.loads,
     future=True  # Use SQLAlchemy 2.0 style
 )
 
@@ -35,20 +53,78 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expi
 
 Base = declarative_base()
 
+# Async engine (asyncpg) for PostgreSQL; SQLite stays on the sync path only
+async_engine = None
+AsyncSessionLocal = None
+if settings.DATABASE_URL.startswith("postgresql"):
+    try:
+        from sqlalchemy.engine import make_url
+        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+        
+        async_connect_args = {
+            "timeout": 10,
+            "server_settings": {"statement_timeout": "30000"}  # 30 second query timeout
+        }
+        if settings.PGBOUNCER:
+            # Transaction pooling hands each transaction a different server
+            # connection, so neither asyncpg nor SQLAlchemy may cache prepared statements
+            async_connect_args = {
+                "timeout": 10,
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+            }
+        
+        # The async engine serves public page renders: keep a larger standing
+        # pool so bursts reuse warm connections instead of new TLS handshakes
+        async_engine = create_async_engine(
+            make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg"),
+            connect_args=async_connect_args,
+            pool_pre_ping=True,
+            pool_size=20,
+            max_overflow=10,
+            pool_recycle=3600,
+            pool_timeout=30,
+            echo=settings.DEBUG,
+            json_serializer=_json_dumps,
+            json_deserializer=orjson.loads,
+        )
+        AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+    except ImportError as e:
+        db_logger.warning("asyncpg not available - using the sync engine only", error_message=str(e))
+
+
+# Per-request session, opened and closed by DBSessionMiddleware
+_session_ctx: ContextVar[Optional[Session]] = ContextVar("db_session", default=None)
+
 
-def get_db() -> Generator[Session, None, None]:
+def get_db() -> Session:
     """
     Database session dependency
     Usage in FastAPI endpoints: db: Session = Depends(get_db)
+    Every dependency in one request shares the session bound by
+    DBSessionMiddleware. Outside a request there is nothing to close the
+    session, so this raises; use `with SessionLocal() as db:` instead.
     """
-    db = SessionLocal()
-    try:
+    db = _session_ctx.get()
+    if db is None:
+        raise RuntimeError("get_db() called outside a request; use SessionLocal() as a context manager")
+    return db
+
+
+async def get_async_db() -> AsyncGenerator["AsyncSession", None]:
+    """
+    Async database session dependency (PostgreSQL + asyncpg only)
+    Usage in async endpoints: db: AsyncSession = Depends(get_async_db)
+    """
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database engine is not configured")
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 # Redis connection (optional) with connection pooling
+# Clients are built without a round-trip; probe_redis()/probe_mongo() check
+# reachability (in background threads when the app starts, see lifespan)
 redis_client = None
 try:
     import redis
@@ -63,20 +139,29 @@ try:
         decode_responses=True
     )
     redis_client = redis.Redis(connection_pool=redis_pool)
-    # Test connection - if it fails, set client to None
-    try:
-        redis_client.ping()
-    except:
-        redis_client = None
 except Exception as e:
-    print(f"WARNING: Redis not available: {e}")
-    print("   Backend will run without caching")
+    db_logger.warning("Redis not available - running without caching", error_message=str(e))
     redis_client = None
 
 
-def get_redis():
-    """Get Redis client"""
-    return redis_client
+# Async Redis client for the event loop (rate limiting, AI cache); shares nothing with
+# the sync client above, which stays for non-async callers
+async_redis_client = None
+if redis_client is not None:
+    try:
+        import redis.asyncio as aioredis
+        
+        async_redis_pool = aioredis.ConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=50,
+            socket_timeout=5,
+            socket_connect_timeout=5,
+            health_check_interval=30,  # Transparent reconnect after Redis blips
+            decode_responses=False  # Cached payloads are orjson bytes
+        )
+        async_redis_client = aioredis.Redis(connection_pool=async_redis_pool)
+    except ImportError:
+        async_redis_client = None
 
 
 # MongoDB connection (optional for analytics)
@@ -84,28 +169,136 @@ mongo_client = None
 mongo_db = None
 try:
     from pymongo import MongoClient
+    # MongoClient connects lazily, so constructing it does no I/O
     mongo_client = MongoClient(settings.MONGODB_URL, serverSelectionTimeoutMS=2000)
-    mongo_client.server_info()  # Test connection
-    mongo_db = mongo_client.gamma_clone
 except Exception as e:
-    print(f"WARNING: MongoDB not available: {e}")
-    print("   Backend will run without analytics storage")
+    db_logger.warning("MongoDB not available - running without analytics storage", error_message=str(e))
+
+
+# Probe results: None = not probed yet, False = probing or unreachable, True = ready
+_redis_ready: Optional[bool] = None
+_mongo_ready: Optional[bool] = None
+
+
+def probe_redis() -> bool:
+    """Ping Redis once and record whether it is usable"""
+    global _redis_ready
+    _redis_ready = False
+    if redis_client is None:
+        return False
+    try:
+        redis_client.ping()
+        _redis_ready = True
+    except Exception as e:
+        db_logger.warning("Redis not available - running without caching", error_message=str(e))
+    return _redis_ready
+
+
+def probe_mongo() -> bool:
+    """Check MongoDB once and record whether it is usable"""
+    global _mongo_ready, mongo_db
+    _mongo_ready = False
+    if mongo_client is None:
+        return False
+    try:
+        mongo_client.server_info()
+        mongo_db = mongo_client.gamma_clone
+        _mongo_ready = True
+    except Exception as e:
+        db_logger.warning("MongoDB not available - running without analytics storage", error_message=str(e))
+    return _mongo_ready
+
+
+def start_service_probes() -> list:
+    """
+    Probe Redis and MongoDB in worker threads without blocking startup
+    Both report unavailable until their probe succeeds.
+    """
+    global _redis_ready, _mongo_ready
+    _redis_ready = _mongo_ready = False
+    return [
+        asyncio.create_task(asyncio.to_thread(probe_redis)),
+        asyncio.create_task(asyncio.to_thread(probe_mongo)),
+    ]
+
+
+def get_redis():
+    """Get Redis client (None until a probe has succeeded)"""
+    if _redis_ready is None:
+        probe_redis()  # Outside the app lifespan (workers, scripts): probe on first use
+    return redis_client if _redis_ready else None
+
+
+def get_async_redis():
+    """Get async Redis client (None until a probe has succeeded)"""
+    return async_redis_client if get_redis() is not None else None
 
 
 def get_mongo():
     """Get MongoDB database"""
-    return mongo_db
+    if _mongo_ready is None:
+        probe_mongo()
+    return mongo_db if _mongo_ready else None
 
 
 # Initialize database
-def init_db():
-    """Create all tables"""
-    # Import all models to register them with SQLAlchemy
+def _import_models():
+    """Import all models to register them with SQLAlchemy"""
     from backend.models import (
         user, presentation, template, theme, workspace,
         comment, analytics, billing
     )
-    Base.metadata.create_all(bind=engine)
+
+
+# Fingerprint of the last schema create_all ran for, kept outside Base.metadata
+_schema_metadata = MetaData()
+schema_version = Table(
+    "gamma_schema_version", _schema_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("fingerprint", String(32), nullable=False),
+)
+
+
+def _schema_fingerprint(dialect) -> str:
+    """Hash of the compiled DDL for every model table and index"""
+    ddl = []
+    for table in Base.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        ddl.extend(sorted(str(CreateIndex(ix).compile(dialect=dialect)) for ix in table.indexes))
+    return hashlib.blake2b("\n".join(ddl).encode(), digest_size=8).hexdigest()
+
+
+def _sync_schema(conn):
+    """Run create_all only when the models changed since the last run"""
+    fingerprint = _schema_fingerprint(conn.dialect)
+    try:
+        with conn.begin_nested():
+            stored = conn.execute(
+                select(schema_version.c.fingerprint).where(schema_version.c.id == 1)
+            ).scalar()
+    except DBAPIError:
+        stored = None  # First run - version table not created yet
+    if stored == fingerprint:
+        return
+    
+    Base.metadata.create_all(conn)
+    _schema_metadata.create_all(conn)
+    conn.execute(delete(schema_version))
+    conn.execute(insert(schema_version).values(id=1, fingerprint=fingerprint))
+
+
+def init_db():
+    """Create all tables"""
+    _import_models()
+    with engine.begin() as conn:
+        _sync_schema(conn)
+
+
+async def init_db_async():
+    """Create all tables over the async engine"""
+    _import_models()
+    async with async_engine.begin() as conn:
+        await conn.run_sync(_sync_schema)
 
 
 # Close connections
@@ -114,16 +307,16 @@ def close_connections():
     try:
         engine.dispose()
     except Exception as e:
-        print(f"[ERROR] Engine dispose failed: {e}")
+        db_logger.error("Engine dispose failed", error=e)
     
     if redis_client:
         try:
             redis_client.close()
         except Exception as e:
-            print(f"[ERROR] Redis close failed: {e}")
+            db_logger.error("Redis close failed", error=e)
     
     if mongo_client:
         try:
             mongo_client.close()
         except Exception as e:
-            print(f"[ERROR] Mongo close failed: {e}")
+            db_logger.error("Mongo close failed", error=e)
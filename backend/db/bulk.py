@@ -0,0 +1,283 @@
+"""
+Batched ingestion for high-volume event tables (analytics, presentation_views)
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from backend.db.base import engine, async_engine
+from backend.db.uuidv7 import uuid7
+from backend.models.analytics import (
+    Analytics, PresentationView, Referrer, UserAgent, _dialect_insert, cube_bucket,
+    aggregated_stats_rows, upsert_aggregated_stats, upsert_cube_cells, upsert_presentation_stats
+)
+from backend.utils.logging import db_logger
+
+# Concurrent connections a flush is spread over on the async engine
+WRITER_SHARDS = 4
+
+# A failed flush is retried in halves up to N times, so one bad row costs only
+# its slice of the batch while an outage costs at most 2**(N+1) - 1 attempts
+FLUSH_SPLIT_DEPTH = 4
+
+# In-process value -> id maps for the view lookup tables
+_LOOKUP_CACHE_SIZE = 16384
+_lookup_ids: Dict[str, Dict[str, int]] = {"user_agent": {}, "referrer": {}}
+_LOOKUP_COLUMNS = {"user_agent": UserAgent.ua, "referrer": Referrer.url}
+
+
+def _insert_new(connection, model, rows: List[dict]) -> set:
+    """
+    Multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING id
+    SQLAlchemy's insertmanyvalues batching sends the rows as a few large
+    VALUES statements instead of one round-trip per row. Every row is given
+    the full column set, since executemany binds the first row's keys.
+    """
+    fill = {
+        column.key: column.default.arg if column.default is not None and column.default.is_scalar else None
+        for column in model.__table__.columns
+    }
+    for row in rows:
+        row.setdefault("id", uuid7())
+        for key, value in fill.items():
+            row.setdefault(key, value)
+    stmt = _dialect_insert(connection)(model).on_conflict_do_nothing().returning(model.id)
+    return set(connection.execute(stmt, rows).scalars())
+
+
+def bulk_create_events(connection, rows: List[dict]) -> List:
+    """Insert Analytics rows in bulk and fold them into analytics_cube and aggregated_stats"""
+    if not rows:
+        return []
+    now = datetime.utcnow()
+    for row in rows:
+        row.setdefault("created_at", now)
+    inserted = _insert_new(connection, Analytics, rows)
+    
+    # One upsert per distinct cube cell, same transaction as the events
+    cells: Dict[tuple, dict] = {}
+    for row in rows:
+        if row["id"] not in inserted:
+            continue
+        bucket = cube_bucket(row["created_at"])
+        cell = cells.setdefault((row["user_id"], bucket, row["event_type"]), {
+            "user_id": row["user_id"], "bucket_start": bucket, "event_type": row["event_type"],
+            "events": 0, "credits_used": 0, "duration_ms": 0
+        })
+        cell["events"] += 1
+        cell["credits_used"] += row.get("credits_used") or 0
+        cell["duration_ms"] += row.get("duration_ms") or 0
+    if cells:
+        upsert_cube_cells(connection, list(cells.values()))
+    upsert_aggregated_stats(connection, aggregated_stats_rows(
+        row for row in rows if row["id"] in inserted
+    ))
+    return [row["id"] for row in rows if row["id"] in inserted]
+
+
+def _lookup_id(connection, key: str, value: str) -> int:
+    """Id of value in its lookup table, upserting it on first sight"""
+    cache = _lookup_ids[key]
+    found = cache.get(value)
+    if found is None:
+        column = _LOOKUP_COLUMNS[key]
+        stmt = _dialect_insert(connection)(column.table).values({column.key: value})
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[column], set_={column.key: stmt.excluded[column.key]}
+        ).returning(column.table.c.id)
+        found = connection.execute(stmt).scalar_one()
+        if len(cache) >= _LOOKUP_CACHE_SIZE:
+            cache.clear()
+        cache[value] = found
+    return found
+
+
+def resolve_view_lookups(connection, rows: List[dict]):
+    """
+    Replace raw user_agent/referrer strings in view rows with lookup ids
+    Distinct values are upserted in sorted order so concurrent writers
+    lock lookup rows in the same order.
+    """
+    for key in _lookup_ids:
+        values = sorted({row[key][:255] for row in rows if row.get(key)})
+        ids = {value: _lookup_id(connection, key, value) for value in values}
+        for row in rows:
+            value = row.pop(key, None)
+            if f"{key}_id" not in row:
+                row[f"{key}_id"] = ids[value[:255]] if value else None
+
+
+def clear_lookup_cache():
+    """Forget cached lookup ids, e.g. after a rolled-back write"""
+    for cache in _lookup_ids.values():
+        cache.clear()
+
+
+def bulk_create_views(connection, rows: List[dict]) -> List:
+    """
+    Insert PresentationView rows in bulk and fold them into presentation_stats
+    Rows may carry raw user_agent/referrer strings; they are stored as lookup ids.
+    """
+    if not rows:
+        return []
+    now = datetime.utcnow()
+    resolve_view_lookups(connection, rows)
+    for row in rows:
+        row.setdefault("viewed_at", now)
+    inserted = _insert_new(connection, PresentationView, rows)
+    
+    stats: Dict = {}
+    for row in rows:
+        if row["id"] not in inserted:
+            continue
+        stat = stats.setdefault(row["presentation_id"], {
+            "presentation_id": row["presentation_id"], "views": 0,
+            "total_time_seconds": 0, "total_cards_viewed": 0, "last_viewed_at": row["viewed_at"]
+        })
+        stat["views"] += 1
+        stat["total_time_seconds"] += row.get("time_spent_seconds") or 0
+        stat["total_cards_viewed"] += row.get("cards_viewed") or 0
+        stat["last_viewed_at"] = max(stat["last_viewed_at"], row["viewed_at"])
+    if stats:
+        upsert_presentation_stats(connection, list(stats.values()))
+    return [row["id"] for row in rows if row["id"] in inserted]
+
+
+def _write_rows(connection, events: List[dict], views: List[dict]):
+    if connection.dialect.name == "postgresql":
+        # Analytics tolerate a small loss window on crash; don't wait for the WAL flush
+        connection.exec_driver_sql("SET LOCAL synchronous_commit = off")
+    bulk_create_events(connection, events)
+    bulk_create_views(connection, views)
+
+
+def _write_batch(events: List[dict], views: List[dict]):
+    with engine.begin() as connection:
+        _write_rows(connection, events, views)
+
+
+async def _write_shard(events: List[dict], views: List[dict]):
+    async with async_engine.begin() as connection:
+        await connection.run_sync(_write_rows, events, views)
+
+
+async def _write_batch_async(events: List[dict], views: List[dict]):
+    """
+    Write one batch over WRITER_SHARDS pooled asyncpg connections at once
+    Events are sharded by user and views by presentation, so each shard
+    upserts a disjoint set of cube/stats rows and shards can't deadlock.
+    """
+    if views:
+        # Upsert lookup values once, before shards could race on them
+        async with async_engine.begin() as connection:
+            await connection.run_sync(resolve_view_lookups, views)
+    
+    shards = [([], []) for _ in range(WRITER_SHARDS)]
+    for row in events:
+        shards[hash(row["user_id"]) % WRITER_SHARDS][0].append(row)
+    for row in views:
+        shards[hash(row["presentation_id"]) % WRITER_SHARDS][1].append(row)
+    await asyncio.gather(*(
+        _write_shard(shard_events, shard_views)
+        for shard_events, shard_views in shards
+        if shard_events or shard_views
+    ))
+
+
+class EventBuffer:
+    """
+    In-process buffer for analytics events and presentation views
+    Rows are written in one transaction per flush, triggered by max_rows
+    buffered rows or every flush_interval seconds, whichever comes first.
+    add_event/add_view must be called from the event loop.
+    """
+    
+    def __init__(self, max_rows: int = 10_000, flush_interval: float = 0.25):
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self._events: List[dict] = []
+        self._views: List[dict] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def add_event(self, row: dict):
+        self._events.append(row)
+        self._buffered()
+    
+    def add_view(self, row: dict):
+        self._views.append(row)
+        self._buffered()
+    
+    def _buffered(self):
+        if self._task is None:
+            self.start()
+        if len(self._events) + len(self._views) >= self.max_rows:
+            self._wake.set()
+    
+    def start(self):
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Cancel the flush loop and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+    
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+    
+    async def flush(self):
+        events, self._events = self._events, []
+        views, self._views = self._views, []
+        if not events and not views:
+            return
+        await self._write(events, views, FLUSH_SPLIT_DEPTH)
+    
+    async def _write(self, events: List[dict], views: List[dict], depth: int):
+        """Write a batch; on failure retry each half so one bad row doesn't drop the rest"""
+        if not events and not views:
+            return
+        # Fix the primary key, (timestamp, id), up front so a retry after a partly
+        # committed sharded write hits ON CONFLICT DO NOTHING instead of inserting
+        # duplicates and folding them into the rollups again
+        now = datetime.utcnow()
+        for row in events:
+            row.setdefault("id", uuid7())
+            row.setdefault("created_at", now)
+        for row in views:
+            row.setdefault("id", uuid7())
+            row.setdefault("viewed_at", now)
+        # Writers mutate rows (lookup ids), so each attempt gets fresh copies
+        try:
+            if async_engine is not None:
+                await _write_batch_async([dict(row) for row in events], [dict(row) for row in views])
+            else:
+                await asyncio.to_thread(_write_batch, [dict(row) for row in events], [dict(row) for row in views])
+            return
+        except Exception as e:
+            clear_lookup_cache()  # Ids upserted by the failed transaction may not exist
+            if depth == 0 or len(events) + len(views) <= 1:
+                db_logger.error("Event batch flush failed", error=e, events=len(events), views=len(views))
+                return
+        
+        if events and views:
+            halves = [(events, []), ([], views)]
+        elif events:
+            middle = len(events) // 2
+            halves = [(events[:middle], []), (events[middle:], [])]
+        else:
+            middle = len(views) // 2
+            halves = [([], views[:middle]), ([], views[middle:])]
+        for half_events, half_views in halves:
+            await self._write(half_events, half_views, depth - 1)
+
+
+event_buffer = EventBuffer()
@@ -0,0 +1,174 @@
+"""
+Redis-backed hot counters for public webpage traffic
+A page view is an INCR plus a HyperLogLog PFADD instead of an UPDATE on the
+webpage row; WebpageCounters drains them into webpages.view_count and
+unique_visitors once per flush_interval. Only published pages are counted,
+so anonymous clients can't create Redis keys for arbitrary ids.
+"""
+import asyncio
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, case, select, update
+
+from backend.db import base as db_base
+from backend.models.webpage import Webpage, WebpageStatus
+from backend.utils.cache import TTLCache
+from backend.utils.logging import db_logger
+
+WEBPAGE_VIEWS_KEY = "wp:{}:v"  # Views since the last flush (GETDEL'd)
+WEBPAGE_VISITORS_KEY = "wp:{}:uv"  # HyperLogLog of visitor ids
+WEBPAGE_DIRTY_KEY = "wp:dirty"  # Page ids with unflushed views
+
+# Page ids drained per SPOP, so one flush never holds a huge batch in memory
+FLUSH_BATCH_SIZE = 1000
+
+# Visitor HLLs (up to 12 KB each) expire after this long without a view;
+# a page idle that long starts deduplicating visitors afresh
+VISITORS_TTL = 30 * 24 * 3600
+
+# Per-worker cache of published status by page id. Hits on live pages are
+# kept longer than misses, so a newly published page is counted within seconds
+PUBLISHED_CACHE_SIZE = 50_000
+PUBLISHED_TTL = 60.0
+UNPUBLISHED_TTL = 5.0
+
+
+def _load_is_published(webpage_id: int) -> bool:
+    with db_base.engine.connect() as connection:
+        return connection.execute(
+            select(Webpage.id).where(
+                Webpage.id == webpage_id,
+                Webpage.status == WebpageStatus.PUBLISHED,
+                Webpage.is_deleted == False
+            )
+        ).first() is not None
+
+
+def _write_counts(counts: List[dict]):
+    table = Webpage.__table__
+    with db_base.engine.begin() as connection:
+        connection.execute(
+            update(table)
+            .where(table.c.id == bindparam("page_id"))
+            .values(
+                view_count=table.c.view_count + bindparam("views"),
+                # Never lower the count when an expired HLL starts over
+                unique_visitors=case(
+                    (table.c.unique_visitors > bindparam("visitors"), table.c.unique_visitors),
+                    else_=bindparam("visitors")
+                )
+            ),
+            counts
+        )
+
+
+def _increment_view_count(webpage_id: int):
+    """Redis-less fallback: plain UPDATE, unique visitors aren't tracked"""
+    with db_base.engine.begin() as connection:
+        connection.execute(
+            update(Webpage.__table__)
+            .where(Webpage.__table__.c.id == webpage_id)
+            .values(view_count=Webpage.__table__.c.view_count + 1)
+        )
+
+
+class WebpageCounters:
+    """
+    Record webpage views in Redis and flush them to Postgres periodically
+    Flushing is safe from several app processes at once: each page id is
+    SPOP'd by exactly one of them. record_view must be called from the event loop.
+    """
+
+    def __init__(self, flush_interval: float = 60.0):
+        self.flush_interval = flush_interval
+        self._task: Optional[asyncio.Task] = None
+        self._published = TTLCache(maxsize=PUBLISHED_CACHE_SIZE, ttl=PUBLISHED_TTL)
+
+    async def is_published(self, webpage_id: int) -> bool:
+        """Published status from a bounded per-worker cache, probing the primary key on a miss"""
+        published = self._published.get(webpage_id)
+        if published is None:
+            published = await asyncio.to_thread(_load_is_published, webpage_id)
+            self._published.set(webpage_id, published, ttl=None if published else UNPUBLISHED_TTL)
+        return published
+
+    def forget(self, webpage_id: int):
+        """Drop this worker's cached status, e.g. after the page is published or unpublished"""
+        self._published.pop(webpage_id)
+
+    async def record_view(self, webpage_id: int, visitor_id: str) -> bool:
+        """Count a view; False (nothing recorded) unless the page is published"""
+        if not await self.is_published(webpage_id):
+            return False
+
+        redis_client = db_base.get_async_redis()
+        if redis_client is None:
+            await asyncio.to_thread(_increment_view_count, webpage_id)
+            return True
+
+        if self._task is None:
+            self.start()
+        visitors_key = WEBPAGE_VISITORS_KEY.format(webpage_id)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.incr(WEBPAGE_VIEWS_KEY.format(webpage_id))
+            pipe.pfadd(visitors_key, visitor_id)
+            pipe.expire(visitors_key, VISITORS_TTL)
+            pipe.sadd(WEBPAGE_DIRTY_KEY, webpage_id)
+            await pipe.execute()
+        return True
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the flush loop and write whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        redis_client = db_base.get_async_redis()
+        if redis_client is None:
+            return
+        try:
+            while True:
+                page_ids = await redis_client.spop(WEBPAGE_DIRTY_KEY, FLUSH_BATCH_SIZE)
+                if not page_ids:
+                    return
+                await self._flush_pages(redis_client, [int(page_id) for page_id in page_ids])
+        except Exception as e:
+            db_logger.error("Webpage counter flush failed", error=e)
+
+    async def _flush_pages(self, redis_client, page_ids: List[int]):
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for page_id in page_ids:
+                pipe.getdel(WEBPAGE_VIEWS_KEY.format(page_id))
+                pipe.pfcount(WEBPAGE_VISITORS_KEY.format(page_id))
+            replies = await pipe.execute()
+
+        counts: Dict[int, dict] = {}
+        for page_id, views, visitors in zip(page_ids, replies[::2], replies[1::2]):
+            if views:
+                counts[page_id] = {"page_id": page_id, "views": int(views), "visitors": visitors}
+        if not counts:
+            return
+
+        try:
+            await asyncio.to_thread(_write_counts, list(counts.values()))
+        except Exception:
+            # Put the drained views back so the next flush retries them
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for page_id, count in counts.items():
+                    pipe.incrby(WEBPAGE_VIEWS_KEY.format(page_id), count["views"])
+                    pipe.sadd(WEBPAGE_DIRTY_KEY, page_id)
+                await pipe.execute()
+            raise
+
+
+webpage_counters = WebpageCounters()
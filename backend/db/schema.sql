@@ -6,6 +6,10 @@
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "pgcrypto";
 
+-- Query timeout on the role, so it also applies to connections made through
+-- PgBouncer (which can't forward the client's startup options)
+ALTER ROLE CURRENT_USER SET statement_timeout = '30s';
+
 -- ============================================
 -- USERS & AUTHENTICATION
 -- ============================================
@@ -28,6 +32,7 @@ CREATE TABLE users (
     credits_reset_date TIMESTAMP,
     subscription_id VARCHAR(255),
     subscription_status VARCHAR(50),
+    stripe_subscription_item_id VARCHAR(255),
     
     -- Usage tracking
     total_presentations_created INTEGER DEFAULT 0,
@@ -418,6 +423,7 @@ CREATE TABLE subscriptions (
     -- Stripe integration
     stripe_customer_id VARCHAR(255),
     stripe_subscription_id VARCHAR(255),
+    stripe_subscription_item_id VARCHAR(255),
     stripe_price_id VARCHAR(255),
     
     -- Credits
@@ -1,10 +1,14 @@
 """
 Database type compatibility for SQLite/PostgreSQL
 """
-from sqlalchemy import String
-from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
+from sqlalchemy import String, SmallInteger, Text, Boolean, JSON, LargeBinary, literal
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID, ARRAY as PostgresARRAY
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 from sqlalchemy.types import TypeDecorator, CHAR
 from backend.config import settings
+from functools import lru_cache
+import msgpack
 import uuid
 
 
@@ -25,27 +29,78 @@ class UUID(TypeDecorator):
     def process_bind_param(self, value, dialect):
         if value is None:
             return value
-        elif dialect.name == 'postgresql':
+        elif dialect.name == 'postgresql' or value.__class__ is uuid.UUID:
             return str(value)
+        elif len(value) == 36:
+            # Already in canonical hyphenated form - skip the parse/format round-trip
+            return value.lower()
         else:
-            if not isinstance(value, uuid.UUID):
-                return str(uuid.UUID(value))
-            else:
-                return str(value)
+            return str(uuid.UUID(value))
 
     def process_result_value(self, value, dialect):
+        if value is None or value.__class__ is uuid.UUID:
+            return value
+        return _parse_uuid(value)
+
+
+# UUIDs are immutable, so repeated ids across rows (foreign keys) share one parse
+_parse_uuid = lru_cache(maxsize=4096)(uuid.UUID)
+
+
+class EnumCode(TypeDecorator):
+    """
+    Store a Python Enum as a SMALLINT code instead of a native ENUM/VARCHAR.
+    Codes follow member definition order starting at 1, so new members must
+    be appended to the end of the Enum, never inserted or reordered.
+    Binds accept members or their values ("draft"); reads return members.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.enum_class = enum_class
+        self._to_code = {member: code for code, member in enumerate(enum_class, start=1)}
+        self._from_code = {code: member for member, code in self._to_code.items()}
+
+    def code(self, value) -> int:
+        """SMALLINT code for a member or value, e.g. for partial index predicates"""
+        return self._to_code[self.enum_class(value)]
+
+    def process_bind_param(self, value, dialect):
         if value is None:
             return value
-        else:
-            if not isinstance(value, uuid.UUID):
-                value = uuid.UUID(value)
+        return self.code(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return value
+        return self._from_code[value]
+
+
+class MsgPack(TypeDecorator):
+    """
+    Python value stored as a MessagePack blob (BYTEA on PostgreSQL).
+    For bodies that are only ever loaded whole: no JSON parsing on read,
+    and a smaller payload. Not queryable in SQL.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return value
+        return msgpack.packb(value, use_bin_type=True)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
             return value
+        return msgpack.unpackb(value, raw=False)
 
 
 # JSON type that works with SQLite
 try:
     from sqlalchemy.dialects.postgresql import JSONB as PostgresJSONB
-    from sqlalchemy import JSON
     
     class JSONB(TypeDecorator):
         """Platform-independent JSONB type."""
@@ -59,3 +114,44 @@ try:
                 return dialect.type_descriptor(JSON())
 except ImportError:
     from sqlalchemy import JSON as JSONB
+
+
+class array_contains(FunctionElement):
+    """True when the array column holds every value of the given array"""
+    type = Boolean()
+    name = "array_contains"
+    inherit_cache = True
+
+
+@compiles(array_contains, "postgresql")
+def _array_contains_postgresql(element, compiler, **kw):
+    column, values = element.clauses
+    return f"{compiler.process(column, **kw)} @> {compiler.process(values, **kw)}"
+
+
+@compiles(array_contains)
+def _array_contains_json(element, compiler, **kw):
+    column, values = element.clauses
+    return (
+        f"NOT EXISTS (SELECT value FROM json_each({compiler.process(values, **kw)}) "
+        f"EXCEPT SELECT value FROM json_each({compiler.process(column, **kw)}))"
+    )
+
+
+class TextArray(TypeDecorator):
+    """
+    List of strings: TEXT[] on PostgreSQL (GIN-indexable), JSON elsewhere.
+    column.contains(["a", "b"]) compiles to @> on PostgreSQL.
+    """
+    impl = JSON
+    cache_ok = True
+
+    class comparator_factory(TypeDecorator.Comparator):
+        def contains(self, other, **kwargs):
+            return array_contains(self.expr, literal(list(other), self.expr.type))
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(PostgresARRAY(Text))
+        else:
+            return dialect.type_descriptor(JSON(none_as_null=True))
@@ -0,0 +1,19 @@
+"""
+Time-ordered UUID (version 7, RFC 9562) generation
+"""
+import os
+import time
+import uuid
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate a UUIDv7: 48-bit Unix-millisecond timestamp followed by random bits.
+    New ids sort after older ones, so primary-key inserts append to the
+    right edge of the B-tree instead of landing on random index pages.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122/9562 variant
+    return uuid.UUID(int=value)
@@ -6,54 +6,83 @@ Optimized for performance and scalability
 
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
+import importlib
 from backend.config import settings
-from backend.db.base import init_db, close_connections, get_redis
+from backend.db import base as db_base
+from backend.db.base import init_db, init_db_async, close_connections, get_redis
 from backend.middleware.security import (
     SecurityHeadersMiddleware,
     RateLimitMiddleware,
     RequestValidationMiddleware
 )
 from backend.middleware.performance import PerformanceMiddleware
+from backend.middleware.db_session import DBSessionMiddleware
 from backend.utils.logging import api_logger
 import uvicorn
 
 
+# API router modules, imported on startup rather than when backend.main loads
+ROUTER_MODULES = (
+    "backend.api.auth",
+    "backend.api.ai",
+    "backend.api.presentations",
+    "backend.api.templates",
+    "backend.api.themes",
+    "backend.api.export",
+    "backend.api.analytics",
+    "backend.api.collaboration",
+    "backend.api.billing",
+    "backend.api.documents",
+    "backend.api.webpages",
+    "backend.api.social",
+    "backend.api.folders",
+    "backend.api.import_content",
+    "backend.api.custom_domains",
+)
+
+
+def include_routers(app: FastAPI):
+    """Import and include all API routers (tags already defined in each router)"""
+    if getattr(app.state, "routers_included", False):
+        return
+    for module_name in ROUTER_MODULES:
+        module = importlib.import_module(module_name)
+        app.include_router(module.router)
+    app.state.routers_included = True
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown"""
     # Startup
     try:
-        api_logger.info("Starting Gamma Clone backend")
-        print("[STARTUP] Starting Gamma Clone...")
-        print(f"[DATABASE] {settings.DATABASE_URL.split('@')[-1] if '@' in settings.DATABASE_URL else 'local'}")
-        print(f"[AI] Model: {settings.DEFAULT_TEXT_MODEL}")
-        print(f"[RATE LIMIT] {settings.RATE_LIMIT_PER_MINUTE} requests/minute")
+        api_logger.info(
+            "Starting Gamma Clone backend",
+            database=settings.DATABASE_DISPLAY,
+            ai_model=settings.DEFAULT_TEXT_MODEL,
+            rate_limit_per_minute=settings.RATE_LIMIT_PER_MINUTE
+        )
         
-        # Check Redis availability
-        redis_client = get_redis()
-        if redis_client:
-            try:
-                redis_client.ping()
-                print("[OK] Redis: Connected (caching enabled)")
-            except Exception:
-                print("[WARNING] Redis: Not available (caching disabled)")
-        else:
-            print("[WARNING] Redis: Not available (caching disabled)")
+        # Redis/MongoDB reachability is checked in the background; both stay
+        # disabled until their probe succeeds, so startup never waits on them
+        app.state.service_probes = db_base.start_service_probes()
         
-        # Run blocking DB init in thread pool to avoid blocking event loop
-        import asyncio
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, init_db)
+        include_routers(app)
+        
+        if db_base.async_engine is not None:
+            await init_db_async()
+        else:
+            # SQLite: run blocking DB init in thread pool to avoid blocking event loop
+            import asyncio
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, init_db)
         
         api_logger.info("Backend initialized successfully")
-        print("[OK] Backend ready!")
-        print("[INFO] Server is running. Press CTRL+C to stop.")
         
     except Exception as e:
-        api_logger.error(f"Startup failed: {e}")
-        print(f"[ERROR] Startup failed: {e}")
+        api_logger.error("Startup failed", error=e)
         import traceback
         traceback.print_exc()
         raise
@@ -63,12 +92,20 @@ async def lifespan(app: FastAPI):
     # Shutdown
     try:
         api_logger.info("Shutting down backend")
+        from backend.db.bulk import event_buffer
+        from backend.db.counters import webpage_counters
+        await event_buffer.stop()  # Write any buffered analytics events
+        await webpage_counters.stop()  # Flush pending webpage view counts
         import asyncio
         loop = asyncio.get_event_loop()
         await loop.run_in_executor(None, close_connections)
-        print("[SHUTDOWN] Backend shutdown complete")
+        if db_base.async_engine is not None:
+            await db_base.async_engine.dispose()
+        if db_base.async_redis_client is not None:
+            await db_base.async_redis_client.aclose()
+        api_logger.info("Backend shutdown complete")
     except Exception as e:
-        print(f"[ERROR] Shutdown error: {e}")
+        api_logger.error("Shutdown error", error=e)
 
 
 # Create FastAPI app with lifespan
@@ -79,10 +116,22 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse,  # orjson encoder for all routes
     lifespan=lifespan
 )
 
+# Per-request DB session (added first so it sits innermost, next to the routes)
+app.add_middleware(DBSessionMiddleware)
+
+# Security Middleware (order matters - each add_middleware wraps the previous ones)
+app.add_middleware(PerformanceMiddleware)  # Monitor performance
+app.add_middleware(SecurityHeadersMiddleware)  # Add security headers
+app.add_middleware(RateLimitMiddleware, requests_per_minute=settings.RATE_LIMIT_PER_MINUTE)  # Rate limiting
+app.add_middleware(RequestValidationMiddleware)  # Validate requests
+
 # CORS Configuration - Permissive for development
+# Added last so it is outermost: preflight OPTIONS requests are answered
+# here and never reach the middleware above
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Allow all origins in development
@@ -93,12 +142,6 @@ app.add_middleware(
     max_age=600,  # Cache preflight requests for 10 minutes
 )
 
-# Security Middleware (order matters - apply from outermost to innermost)
-app.add_middleware(PerformanceMiddleware)  # Monitor performance
-app.add_middleware(SecurityHeadersMiddleware)  # Add security headers
-app.add_middleware(RateLimitMiddleware, requests_per_minute=settings.RATE_LIMIT_PER_MINUTE)  # Rate limiting
-app.add_middleware(RequestValidationMiddleware)  # Validate requests
-
 # Root endpoint
 @app.get("/")
 async def root():
@@ -123,42 +166,6 @@ async def health_check():
         "features": 480  # Updated: +57 new endpoints
     }
 
-# Import and include all API routers
-from backend.api import (
-    auth, 
-    ai, 
-    presentations, 
-    templates, 
-    themes, 
-    export, 
-    analytics, 
-    collaboration, 
-    billing,
-    documents,
-    webpages,
-    social,
-    folders,
-    import_content,
-    custom_domains
-)
-
-# Include all routers (tags already defined in each router)
-app.include_router(auth.router)
-app.include_router(ai.router)
-app.include_router(presentations.router)
-app.include_router(templates.router)
-app.include_router(themes.router)
-app.include_router(export.router)
-app.include_router(analytics.router)
-app.include_router(collaboration.router)
-app.include_router(billing.router)
-app.include_router(documents.router)
-app.include_router(webpages.router)
-app.include_router(social.router)
-app.include_router(folders.router)
-app.include_router(import_content.router)
-app.include_router(custom_domains.router)
-
 if __name__ == "__main__":
     import sys
     
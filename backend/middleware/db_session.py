@@ -0,0 +1,34 @@
+"""
+Per-request database session middleware
+"""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+from backend.db.base import SessionLocal, _session_ctx
+
+
+class DBSessionMiddleware:
+    """
+    Bind one SQLAlchemy session to the request context
+    get_db() reads it from the ContextVar, so all dependencies and helpers
+    in a request share it. Plain ASGI (not BaseHTTPMiddleware) so the
+    session stays open until the response body, streamed or not, is sent.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        db = SessionLocal()
+        token = _session_ctx.set(db)
+        try:
+            await self.app(scope, receive, send)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            _session_ctx.reset(token)
+            db.close()
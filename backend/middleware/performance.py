@@ -2,48 +2,57 @@
 Performance monitoring middleware
 """
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import logging
 import time
 from backend.utils.logging import api_logger
 
 
-class PerformanceMiddleware(BaseHTTPMiddleware):
+class PerformanceMiddleware:
     """
     Monitor API endpoint performance
+    Raw ASGI: the timing header is added as the response starts, without
+    BaseHTTPMiddleware's extra task and stream per request
     """
     
-    async def dispatch(self, request: Request, call_next):
-        # Start timer
-        start_time = time.time()
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate duration
-        duration = time.time() - start_time
-        duration_ms = round(duration * 1000, 2)
-        
-        # Add performance headers
-        response.headers["X-Process-Time"] = str(duration_ms)
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Log slow requests (>1 second)
-        if duration > 1.0:
-            api_logger.warning(
-                "Slow request detected",
-                path=request.url.path,
-                method=request.method,
-                duration_ms=duration_ms,
-                status_code=response.status_code
-            )
+        # Start timer
+        start_ns = time.monotonic_ns()
         
-        # Log all requests in debug mode
-        api_logger.debug(
-            "Request completed",
-            path=request.url.path,
-            method=request.method,
-            duration_ms=duration_ms,
-            status_code=response.status_code
-        )
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                elapsed_ns = time.monotonic_ns() - start_ns
+                
+                # Add performance headers (whole milliseconds)
+                MutableHeaders(scope=message)["X-Process-Time"] = str(elapsed_ns // 1_000_000)
+                
+                # Log slow requests (>1 second)
+                if elapsed_ns > 1_000_000_000:
+                    api_logger.warning(
+                        "Slow request detected",
+                        path=scope["path"],
+                        method=scope["method"],
+                        duration_ms=elapsed_ns / 1_000_000,
+                        status_code=message["status"]
+                    )
+                
+                # Log all requests in debug mode (skip building kwargs otherwise)
+                if api_logger.logger.isEnabledFor(logging.DEBUG):
+                    api_logger.debug(
+                        "Request completed",
+                        path=scope["path"],
+                        method=scope["method"],
+                        duration_ms=elapsed_ns / 1_000_000,
+                        status_code=message["status"]
+                    )
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_with_timing)
@@ -3,82 +3,115 @@ Security Middleware
 Adds security headers and protections
 """
 
-from fastapi import Request, Response
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import re
 import time
-from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import Optional
-from backend.db.base import get_redis
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional, Tuple
+from backend.db import base as db_base
+from backend.db.base import get_async_redis
+
+
+# Raw ASGI header pairs, encoded once and appended to every HTTP response
+SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"permissions-policy", b"geolocation=(), microphone=(), camera=()"),
+    # Content Security Policy
+    # Allow CDN for Swagger UI docs
+    (b"content-security-policy", (
+        b"default-src 'self'; "
+        b"script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.jsdelivr.net; "
+        b"style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
+        b"img-src 'self' data: https:; "
+        b"font-src 'self' data: https://cdn.jsdelivr.net; "
+        b"connect-src 'self' https://api.openai.com https://api.anthropic.com; "
+        b"frame-ancestors 'none'"
+    )),
+]
+
+# Cheap endpoints that skip rate limiting entirely
+RATE_LIMIT_EXEMPT_PATHS = frozenset({"/health", "/", "/docs", "/openapi.json", "/redoc"})
+
+
+class SecurityHeadersMiddleware:
     """
     Add security headers to all responses
     """
     
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        # Security Headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Content Security Policy
-        # Allow CDN for Swagger UI docs
-        csp = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.jsdelivr.net; "
-            "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
-            "img-src 'self' data: https:; "
-            "font-src 'self' data: https://cdn.jsdelivr.net; "
-            "connect-src 'self' https://api.openai.com https://api.anthropic.com; "
-            "frame-ancestors 'none'"
-        )
-        response.headers["Content-Security-Policy"] = csp
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                # No route sets these, so a plain extend never duplicates them
+                message["headers"] = list(message.get("headers", [])) + SECURITY_HEADERS
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_with_headers)
+
+
+# INCR + first-hit EXPIRE in one round-trip; returns the window count
+RATE_LIMIT_LUA = """
+local c = redis.call('INCR', KEYS[1])
+if c == 1 then redis.call('EXPIRE', KEYS[1], ARGV[1]) end
+return c
+"""
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
     """
     Rate limiting with Redis support for production
     Falls back to in-memory if Redis unavailable
+    Raw ASGI so exempt paths pass straight through with no per-request work
     """
     
+    _WINDOW_SECONDS = 60.0
+    
     def __init__(self, app: ASGIApp, requests_per_minute: int = 60):
-        super().__init__(app)
+        self.app = app
         self.requests_per_minute = requests_per_minute
-        self.requests = defaultdict(list)  # Fallback in-memory storage
-        self.redis_client = get_redis()
-        # Check if Redis is actually working
-        self.use_redis = False
-        if self.redis_client:
-            try:
-                self.redis_client.ping()
-                self.use_redis = True
-            except Exception:
-                self.use_redis = False
+        # Fallback in-memory storage: monotonic timestamps per IP, oldest first
+        self.requests: Dict[str, Deque[float]] = defaultdict(deque)
+        self._next_sweep = time.monotonic() + self._WINDOW_SECONDS
+        # Shared async client; the script is bound now, but Redis is only used
+        # once the background startup probe has succeeded (checked per request)
+        self.async_redis = db_base.async_redis_client
+        self._rate_limit_script = (
+            self.async_redis.register_script(RATE_LIMIT_LUA) if self.async_redis else None
+        )
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in RATE_LIMIT_EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        
         # Get client IP (handle None for TestClient)
-        client_ip = "127.0.0.1"  # Default
-        if request.client and hasattr(request.client, 'host'):
-            client_ip = request.client.host
+        client = scope.get("client")
+        client_ip = client[0] if client else "127.0.0.1"
         
-        if self.use_redis:
+        rpm = self.requests_per_minute
+        if self._rate_limit_script is not None and get_async_redis() is not None:
             # Redis-based rate limiting (production)
-            is_limited = await self._check_redis_rate_limit(client_ip)
+            is_limited, count = await self._check_redis_rate_limit(client_ip)
+            remaining = rpm - count
         else:
             # In-memory rate limiting (development)
             is_limited = self._check_memory_rate_limit(client_ip)
+            remaining = rpm - len(self.requests[client_ip])
         
         if is_limited:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=429,
                 content={
                     "detail": "Too many requests. Please try again later.",
@@ -86,84 +119,95 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 },
                 headers={"Retry-After": "60"}
             )
+            await response(scope, receive, send)
+            return
         
-        # Process request
-        response = await call_next(request)
-        
-        # Add rate limit headers
-        if self.use_redis:
-            try:
-                key = f"rate_limit:{client_ip}"
-                count = int(self.redis_client.get(key) or 0)
-                remaining = max(0, self.requests_per_minute - count)
-            except Exception:
-                remaining = self.requests_per_minute
-        else:
-            remaining = self.requests_per_minute - len(self.requests[client_ip])
-        
-        response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
-        response.headers["X-RateLimit-Remaining"] = str(max(0, remaining))
-        response.headers["X-RateLimit-Reset"] = str(int(time.time()) + 60)
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                # Add rate limit headers
+                headers = MutableHeaders(scope=message)
+                headers["X-RateLimit-Limit"] = str(rpm)
+                headers["X-RateLimit-Remaining"] = str(max(0, remaining))
+                headers["X-RateLimit-Reset"] = str(int(time.time()) + 60)
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_with_headers)
     
-    async def _check_redis_rate_limit(self, client_ip: str) -> bool:
-        """Check rate limit using Redis"""
+    async def _check_redis_rate_limit(self, client_ip: str) -> Tuple[bool, int]:
+        """Check rate limit using Redis; returns (is_limited, count)"""
         try:
             key = f"rate_limit:{client_ip}"
-            count = self.redis_client.incr(key)
-            
-            if count == 1:
-                # First request, set expiry
-                self.redis_client.expire(key, 60)
-            
-            return count > self.requests_per_minute
+            count = int(await self._rate_limit_script(keys=[key], args=[60]))
+            return count > self.requests_per_minute, count
         except Exception:
             # Redis error, allow request
-            return False
+            return False, 0
     
     def _check_memory_rate_limit(self, client_ip: str) -> bool:
         """Check rate limit using in-memory storage"""
-        now = datetime.now()
+        now = time.monotonic()
+        window = self._WINDOW_SECONDS
+        cutoff = now - window
+        
+        # Drop IPs idle for a full window so memory stays bounded under churn
+        if now >= self._next_sweep:
+            stale = [ip for ip, dq in self.requests.items() if not dq or dq[-1] < cutoff]
+            for ip in stale:
+                del self.requests[ip]
+            self._next_sweep = now + window
         
         # Clean old requests (older than 1 minute)
-        self.requests[client_ip] = [
-            req_time for req_time in self.requests[client_ip]
-            if now - req_time < timedelta(minutes=1)
-        ]
+        dq = self.requests[client_ip]
+        while dq and dq[0] < cutoff:
+            dq.popleft()
         
         # Check rate limit
-        if len(self.requests[client_ip]) >= self.requests_per_minute:
+        if len(dq) >= self.requests_per_minute:
             return True
         
         # Add current request
-        self.requests[client_ip].append(now)
+        dq.append(now)
         return False
 
 
-class RequestValidationMiddleware(BaseHTTPMiddleware):
+# One case-insensitive scan for all suspicious URL patterns
+SUSPICIOUS_PATH = re.compile(r"\.\./|\.\.\\\\|<script|javascript:|onerror=", re.IGNORECASE)
+
+MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB limit
+
+
+class RequestValidationMiddleware:
     """
     Validate and sanitize requests
     """
     
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
         # Check content length to prevent large payload attacks
-        content_length = request.headers.get("content-length")
-        if content_length:
-            if int(content_length) > 10 * 1024 * 1024:  # 10MB limit
-                return JSONResponse(
-                    status_code=413,
-                    content={"detail": "Request payload too large"}
-                )
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > MAX_CONTENT_LENGTH:
+                    response = JSONResponse(
+                        status_code=413,
+                        content={"detail": "Request payload too large"}
+                    )
+                    await response(scope, receive, send)
+                    return
+                break
         
         # Check for suspicious patterns in URL
-        path = request.url.path
-        suspicious_patterns = ["../", "..\\\\", "<script", "javascript:", "onerror="]
-        if any(pattern in path.lower() for pattern in suspicious_patterns):
-            return JSONResponse(
+        if SUSPICIOUS_PATH.search(scope["path"]):
+            response = JSONResponse(
                 status_code=400,
                 content={"detail": "Invalid request"}
             )
+            await response(scope, receive, send)
+            return
         
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send)
@@ -6,7 +6,9 @@ from backend.models.template import Template
 from backend.models.theme import Theme
 from backend.models.workspace import Workspace, WorkspaceMember
 from backend.models.comment import Comment, SharedPresentation
-from backend.models.analytics import Analytics, PresentationView, AggregatedStats
+from backend.models.analytics import (
+    Analytics, AnalyticsCube, UserAgent, Referrer, PresentationView, PresentationStats, AggregatedStats
+)
 from backend.models.billing import BillingHistory, Subscription, CreditsPurchase
 # NEW MODELS
 from backend.models.document import Document, DocumentType, DocumentStatus
@@ -25,7 +27,11 @@ __all__ = [
     "Comment",
     "SharedPresentation",
     "Analytics",
+    "AnalyticsCube",
+    "UserAgent",
+    "Referrer",
     "PresentationView",
+    "PresentationStats",
     "AggregatedStats",
     "BillingHistory",
     "Subscription",
@@ -2,19 +2,49 @@
 Analytics model for tracking user activity and usage
 """
 
-from sqlalchemy import Column, String, Integer, TIMESTAMP, ForeignKey, Float
+from sqlalchemy import (
+    Column, String, Integer, SmallInteger, BigInteger, TIMESTAMP, ForeignKey, Float, Index,
+    PrimaryKeyConstraint, UniqueConstraint, event, text
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.sql import func
 from backend.db.base import Base
 from backend.db.types import UUID, JSONB
-import uuid
+from backend.db.uuidv7 import uuid7
+from datetime import datetime, timedelta
+
+# Width of one analytics_cube time bucket; histograms re-bin from these
+CUBE_BUCKET_SECONDS = 3600
+_EPOCH = datetime(1970, 1, 1)  # Naive, like the TIMESTAMP columns
+
+# Monthly partitions created ahead of the current month
+PARTITION_MONTHS_AHEAD = 2
+
+# Analytics event types counted into AggregatedStats metrics
+_AGGREGATED_METRICS = {
+    "generation": "ai_generations",
+    "credit_deduction": "ai_generations",  # Every AI operation is charged
+    "edit": "presentations_edited",
+    "export": "exports_created",
+}
+_AGGREGATED_COLUMNS = (
+    "presentations_created", "presentations_edited", "ai_generations",
+    "credits_used", "exports_created", "views_received",
+)
+
+
+def _dialect_insert(connection):
+    """INSERT construct with ON CONFLICT support for the connection's dialect"""
+    return pg_insert if connection.dialect.name == "postgresql" else sqlite_insert
 
 
 class Analytics(Base):
     """Track detailed analytics events"""
     __tablename__ = "analytics"
     
-    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(UUID(), nullable=False, default=uuid7)
+    user_id = Column(UUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Event details
     event_type = Column(String(50), nullable=False, index=True)  # generation, export, view, edit, etc.
@@ -35,25 +65,115 @@ class Analytics(Base):
     # Timing
     duration_ms = Column(Integer, nullable=True)  # Duration of operation in milliseconds
     
-    # Timestamps
-    created_at = Column(TIMESTAMP, server_default=func.now(), index=True)
+    # Timestamps (partition key)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    
+    __table_args__ = (
+        # PostgreSQL requires the partition key in every unique constraint
+        PrimaryKeyConstraint("created_at", "id"),
+        Index("analytics_created_brin", "created_at", postgresql_using="brin"),
+        # User activity feeds: newest first, served index-only
+        Index(
+            "analytics_user_created",
+            "user_id",
+            text("created_at DESC"),
+            postgresql_include=["event_type", "credits_used"],
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
     def __repr__(self):
         return f"<Analytics(event_type='{self.event_type}', user_id='{self.user_id}')>"
 
 
+class AnalyticsCube(Base):
+    """
+    Pre-aggregated analytics events: one row per user, hourly bucket and event type
+    Histograms and brush/range queries probe this small cube instead of
+    scanning the analytics table.
+    """
+    __tablename__ = "analytics_cube"
+    
+    user_id = Column(UUID(), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    bucket_start = Column(TIMESTAMP, primary_key=True)
+    event_type = Column(String(50), primary_key=True)
+    
+    events = Column(Integer, nullable=False, default=0)
+    credits_used = Column(Integer, nullable=False, default=0)
+    duration_ms = Column(BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<AnalyticsCube(user_id='{self.user_id}', bucket='{self.bucket_start}', event_type='{self.event_type}')>"
+
+
+def cube_bucket(created_at: datetime) -> datetime:
+    """Start of the analytics_cube bucket containing created_at"""
+    seconds = (created_at - _EPOCH) // timedelta(seconds=1)
+    return _EPOCH + timedelta(seconds=seconds - seconds % CUBE_BUCKET_SECONDS)
+
+
+def upsert_cube_cells(connection, cells: list):
+    """Add cells (unique per user/bucket/event type) onto analytics_cube"""
+    stmt = _dialect_insert(connection)(AnalyticsCube).values(cells)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AnalyticsCube.user_id, AnalyticsCube.bucket_start, AnalyticsCube.event_type],
+        set_={
+            "events": AnalyticsCube.events + stmt.excluded.events,
+            "credits_used": AnalyticsCube.credits_used + stmt.excluded.credits_used,
+            "duration_ms": AnalyticsCube.duration_ms + stmt.excluded.duration_ms,
+        },
+    )
+    connection.execute(stmt)
+
+
+@event.listens_for(Analytics, "after_insert")
+def _bump_analytics_cube(mapper, connection, target):
+    """Fold the new event into its cube cell in the same transaction"""
+    upsert_cube_cells(connection, [{
+        "user_id": target.user_id,
+        "bucket_start": cube_bucket(target.created_at or datetime.utcnow()),
+        "event_type": target.event_type,
+        "events": 1,
+        "credits_used": target.credits_used or 0,
+        "duration_ms": target.duration_ms or 0,
+    }])
+
+
+class UserAgent(Base):
+    """Distinct User-Agent strings, referenced by presentation_views"""
+    __tablename__ = "user_agents"
+    
+    # SMALLSERIAL on PostgreSQL; SQLite only auto-increments INTEGER keys
+    id = Column(SmallInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    ua = Column(String(255), nullable=False, unique=True)
+    
+    def __repr__(self):
+        return f"<UserAgent(id={self.id})>"
+
+
+class Referrer(Base):
+    """Distinct referrer URLs, referenced by presentation_views"""
+    __tablename__ = "referrers"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    url = Column(String(255), nullable=False, unique=True)
+    
+    def __repr__(self):
+        return f"<Referrer(id={self.id})>"
+
+
 class PresentationView(Base):
     """Track presentation views"""
     __tablename__ = "presentation_views"
     
-    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(), nullable=False, default=uuid7)
     presentation_id = Column(UUID(), ForeignKey("presentations.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # Viewer info
     viewer_id = Column(UUID(), nullable=True)  # NULL if anonymous
     ip_address = Column(String(45), nullable=True)
-    user_agent = Column(String(255), nullable=True)
-    referrer = Column(String(255), nullable=True)
+    user_agent_id = Column(SmallInteger().with_variant(Integer, "sqlite"), ForeignKey("user_agents.id"), nullable=True)
+    referrer_id = Column(Integer, ForeignKey("referrers.id"), nullable=True)
     
     # Location
     country = Column(String(2), nullable=True)
@@ -63,18 +183,95 @@ class PresentationView(Base):
     time_spent_seconds = Column(Integer, nullable=True)
     cards_viewed = Column(Integer, nullable=True)
     
-    # Timestamps
-    viewed_at = Column(TIMESTAMP, server_default=func.now(), index=True)
+    # Timestamps (partition key)
+    viewed_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    
+    __table_args__ = (
+        PrimaryKeyConstraint("viewed_at", "id"),
+        Index("presentation_views_viewed_brin", "viewed_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (viewed_at)"},
+    )
     
     def __repr__(self):
         return f"<PresentationView(presentation_id='{self.presentation_id}')>"
 
 
+def ensure_monthly_partitions(connection, table_name: str, months_ahead: int = PARTITION_MONTHS_AHEAD):
+    """
+    Create the current and next months_ahead monthly partitions of table_name
+    Indexes declared on the parent (including BRIN) are created on each
+    partition by PostgreSQL. No-op on other dialects.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(months_ahead + 1):
+        next_month = (month + timedelta(days=32)).replace(day=1)
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {table_name}_{month:%Y_%m} PARTITION OF {table_name} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}')"
+        ))
+        month = next_month
+
+
+def _create_partitions(target, connection, **kw):
+    ensure_monthly_partitions(connection, target.name)
+
+
+event.listen(Analytics.__table__, "after_create", _create_partitions)
+event.listen(PresentationView.__table__, "after_create", _create_partitions)
+
+
+class PresentationStats(Base):
+    """
+    Per-presentation view totals, maintained on write from presentation_views
+    Dashboards read one row by primary key instead of aggregating the events.
+    """
+    __tablename__ = "presentation_stats"
+    
+    presentation_id = Column(UUID(), ForeignKey("presentations.id", ondelete="CASCADE"), primary_key=True)
+    
+    views = Column(Integer, nullable=False, default=0)
+    total_time_seconds = Column(Integer, nullable=False, default=0)
+    total_cards_viewed = Column(Integer, nullable=False, default=0)
+    last_viewed_at = Column(TIMESTAMP, nullable=True)
+    
+    def __repr__(self):
+        return f"<PresentationStats(presentation_id='{self.presentation_id}', views={self.views})>"
+
+
+def upsert_presentation_stats(connection, rows: list):
+    """Add rows (unique per presentation) onto presentation_stats"""
+    stmt = _dialect_insert(connection)(PresentationStats).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PresentationStats.presentation_id],
+        set_={
+            "views": PresentationStats.views + stmt.excluded.views,
+            "total_time_seconds": PresentationStats.total_time_seconds + stmt.excluded.total_time_seconds,
+            "total_cards_viewed": PresentationStats.total_cards_viewed + stmt.excluded.total_cards_viewed,
+            "last_viewed_at": stmt.excluded.last_viewed_at,
+        },
+    )
+    connection.execute(stmt)
+
+
+@event.listens_for(PresentationView, "after_insert")
+def _bump_presentation_stats(mapper, connection, target):
+    """Upsert the presentation's stats row in the same transaction as the view"""
+    upsert_presentation_stats(connection, [{
+        "presentation_id": target.presentation_id,
+        "views": 1,
+        "total_time_seconds": target.time_spent_seconds or 0,
+        "total_cards_viewed": target.cards_viewed or 0,
+        "last_viewed_at": func.now(),
+    }])
+
+
 class AggregatedStats(Base):
     """Pre-aggregated statistics for performance"""
     __tablename__ = "aggregated_stats"
     
-    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(), primary_key=True, default=uuid7)
     user_id = Column(UUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # Period
@@ -93,5 +290,76 @@ class AggregatedStats(Base):
     # Updated
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        UniqueConstraint("user_id", "period_type", "period_start", name="aggregated_stats_user_period"),
+    )
+    
     def __repr__(self):
         return f"<AggregatedStats(user_id='{self.user_id}', period='{self.period_type}')>"
+
+
+def stat_periods(created_at: datetime) -> list:
+    """(period_type, start, end) of the daily, weekly and monthly periods containing created_at"""
+    day = created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+    week = day - timedelta(days=day.weekday())
+    month = day.replace(day=1)
+    return [
+        ("daily", day, day + timedelta(days=1)),
+        ("weekly", week, week + timedelta(days=7)),
+        ("monthly", month, (month + timedelta(days=32)).replace(day=1)),
+    ]
+
+
+def aggregated_stats_rows(events) -> list:
+    """
+    Fold analytics rows (dicts) into AggregatedStats increments
+    One row per user and period; events that touch no metric are skipped.
+    """
+    rows = {}
+    for event_row in events:
+        metric = _AGGREGATED_METRICS.get(event_row["event_type"])
+        credits = max(event_row.get("credits_used") or 0, 0)
+        if metric is None and not credits:
+            continue
+        for period_type, start, end in stat_periods(event_row["created_at"]):
+            row = rows.get((event_row["user_id"], period_type, start))
+            if row is None:
+                row = rows[(event_row["user_id"], period_type, start)] = dict(
+                    {column: 0 for column in _AGGREGATED_COLUMNS},
+                    user_id=event_row["user_id"], period_type=period_type,
+                    period_start=start, period_end=end
+                )
+            if metric is not None:
+                row[metric] += 1
+            row["credits_used"] += credits
+    return list(rows.values())
+
+
+def upsert_aggregated_stats(connection, rows: list):
+    """Add rows (unique per user/period) onto aggregated_stats"""
+    if not rows:
+        return
+    stmt = _dialect_insert(connection)(AggregatedStats).values(
+        [dict(row, id=uuid7()) for row in rows]
+    )
+    set_ = {
+        column: getattr(AggregatedStats, column) + getattr(stmt.excluded, column)
+        for column in _AGGREGATED_COLUMNS
+    }
+    set_["updated_at"] = func.now()
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AggregatedStats.user_id, AggregatedStats.period_type, AggregatedStats.period_start],
+        set_=set_,
+    )
+    connection.execute(stmt)
+
+
+@event.listens_for(Analytics, "after_insert")
+def _bump_aggregated_stats(mapper, connection, target):
+    """Fold the new event into its daily/weekly/monthly stats in the same transaction"""
+    upsert_aggregated_stats(connection, aggregated_stats_rows([{
+        "user_id": target.user_id,
+        "event_type": target.event_type,
+        "credits_used": target.credits_used,
+        "created_at": target.created_at or datetime.utcnow(),
+    }]))
@@ -2,19 +2,19 @@
 Billing and payment history model
 """
 
-from sqlalchemy import Column, String, Integer, TIMESTAMP, ForeignKey, Float, Boolean
+from sqlalchemy import Column, String, Integer, TIMESTAMP, ForeignKey, Float, Boolean, Index, text
 from sqlalchemy.sql import func
 from backend.db.base import Base
 from backend.db.types import UUID, JSONB
-import uuid
+from backend.db.uuidv7 import uuid7
 
 
 class BillingHistory(Base):
     """Track all billing transactions"""
     __tablename__ = "billing_history"
     
-    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(UUID(), primary_key=True, default=uuid7)
+    user_id = Column(UUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Transaction details
     transaction_type = Column(String(50), nullable=False)  # subscription, upgrade, credits, one_time
@@ -50,6 +50,16 @@ class BillingHistory(Base):
     created_at = Column(TIMESTAMP, server_default=func.now(), index=True)
     completed_at = Column(TIMESTAMP, nullable=True)
     
+    __table_args__ = (
+        # Billing history page: newest first, served index-only
+        Index(
+            "billing_history_user_created",
+            "user_id",
+            text("created_at DESC"),
+            postgresql_include=["status", "amount"],
+        ),
+    )
+    
     def __repr__(self):
         return f"<BillingHistory(user_id='{self.user_id}', type='{self.transaction_type}', status='{self.status}')>"
 
@@ -58,7 +68,7 @@ class Subscription(Base):
     """Active subscriptions"""
     __tablename__ = "subscriptions"
     
-    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(), primary_key=True, default=uuid7)
     user_id = Column(UUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
     
     # Subscription details
@@ -72,6 +82,7 @@ class Subscription(Base):
     
     # Stripe
     stripe_subscription_id = Column(String(255), nullable=True, unique=True)
+    stripe_subscription_item_id = Column(String(255), nullable=True)  # Plan item, modified on plan change
     stripe_customer_id = Column(String(255), nullable=True)
     stripe_price_id = Column(String(255), nullable=True)
     
@@ -96,7 +107,7 @@ class CreditsPurchase(Base):
     """Track one-time credit purchases"""
     __tablename__ = "credits_purchases"
     
-    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(), primary_key=True, default=uuid7)
     user_id = Column(UUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # Purchase details
@@ -2,19 +2,20 @@
 Comment model for presentation collaboration
 """
 
-from sqlalchemy import Column, String, Text, TIMESTAMP, ForeignKey, Integer
+from sqlalchemy import Column, String, Text, TIMESTAMP, ForeignKey, Boolean, Index
+from sqlalchemy import text as sql_text  # Comment.text is a column
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from backend.db.base import Base
 from backend.db.types import UUID
-import uuid
+from backend.db.uuidv7 import uuid7
 
 
 class Comment(Base):
     __tablename__ = "comments"
     
-    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
-    presentation_id = Column(UUID(), ForeignKey("presentations.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(UUID(), primary_key=True, default=uuid7)
+    presentation_id = Column(UUID(), ForeignKey("presentations.id", ondelete="CASCADE"), nullable=False)
     card_id = Column(String(50), nullable=True)  # Optional: specific card in presentation
     user_id = Column(UUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
@@ -25,7 +26,7 @@ class Comment(Base):
     parent_id = Column(UUID(), ForeignKey("comments.id", ondelete="CASCADE"), nullable=True)
     
     # Status
-    is_resolved = Column(Integer, default=0)
+    is_resolved = Column(Boolean, default=False, nullable=False)
     resolved_by = Column(UUID(), nullable=True)
     resolved_at = Column(TIMESTAMP, nullable=True)
     
@@ -33,6 +34,18 @@ class Comment(Base):
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        # Threaded fetches; also serves plain presentation_id lookups
+        Index("ix_comments_presentation_parent", "presentation_id", "parent_id"),
+        # Open comments on a presentation, newest first
+        Index(
+            "ix_comments_unresolved",
+            "presentation_id",
+            sql_text("created_at DESC"),
+            postgresql_where=sql_text("is_resolved = false"),
+        ),
+    )
+    
     def __repr__(self):
         return f"<Comment(presentation_id='{self.presentation_id}', user_id='{self.user_id}')>"
 
@@ -41,7 +54,7 @@ class SharedPresentation(Base):
     """Track presentations shared with other users"""
     __tablename__ = "shared_presentations"
     
-    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(), primary_key=True, default=uuid7)
     presentation_id = Column(UUID(), ForeignKey("presentations.id", ondelete="CASCADE"), nullable=False, index=True)
     owner_id = Column(UUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     shared_with_id = Column(UUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
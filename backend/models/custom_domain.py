@@ -2,9 +2,10 @@
 Custom Domain Model - For Pro/Ultra users to publish webpages on their own domains
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
 from sqlalchemy.sql import func
 from backend.db.base import Base
+from backend.db.types import JSONB, EnumCode
 import enum
 
 class DomainStatus(str, enum.Enum):
@@ -23,12 +24,12 @@ class CustomDomain(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     
     # Verification
-    status = Column(Enum(DomainStatus), default=DomainStatus.PENDING, nullable=False)
+    status = Column(EnumCode(DomainStatus), default=DomainStatus.PENDING, nullable=False)
     verification_code = Column(String(100), nullable=True)
     verification_method = Column(String(50), nullable=True)  # "dns", "file"
     
     # DNS Records
-    dns_records = Column(Text, nullable=True)  # JSON with required DNS records
+    dns_records = Column(JSONB(), nullable=True)  # JSON with required DNS records
     
     # SSL Certificate
     ssl_enabled = Column(Boolean, default=False)
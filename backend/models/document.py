@@ -2,10 +2,15 @@
 Document Model - For long-form content (reports, articles, proposals, etc.)
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Computed, DDL, Index, event, inspect, text
 from sqlalchemy.sql import func
 from backend.db.base import Base
+from backend.db.types import JSONB, EnumCode, MsgPack
 import enum
+import hashlib
+import orjson
+
+WORDS_PER_MINUTE = 200  # Average reading speed
 
 class DocumentType(str, enum.Enum):
     REPORT = "report"
@@ -27,22 +32,30 @@ class Document(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(500), nullable=False, index=True)
     subtitle = Column(String(1000), nullable=True)
-    content_json = Column(Text, nullable=False)  # JSON structure with sections, paragraphs, images
+    # Body: sections, paragraphs, images. Read and written through Document.content
+    content_blob = Column(MsgPack(), nullable=True)
+    content_meta = Column(JSONB(), nullable=True)  # Queryable summary: title, section count, outline
+    content_json = Column(JSONB(), nullable=True)  # Legacy body, moved by scripts/backfill_document_blobs.py
     
     # Document type
-    document_type = Column(Enum(DocumentType), nullable=False, default=DocumentType.ARTICLE)
-    status = Column(Enum(DocumentStatus), default=DocumentStatus.DRAFT, nullable=False)
+    document_type = Column(EnumCode(DocumentType), nullable=False, default=DocumentType.ARTICLE)
+    status = Column(EnumCode(DocumentStatus), default=DocumentStatus.DRAFT, nullable=False)
     
     # Theming
     theme_id = Column(Integer, ForeignKey("themes.id"), nullable=True)
     
     # Branding
-    custom_branding = Column(Text, nullable=True)  # JSON with logo, colors, fonts
+    custom_branding = Column(JSONB(), nullable=True)  # JSON with logo, colors, fonts
     
     # Metadata
-    author_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     word_count = Column(Integer, default=0)
-    reading_time_minutes = Column(Integer, default=0)
+    # Derived by the database on write, so it can't drift from word_count
+    reading_time_minutes = Column(
+        Integer, Computed(f"CASE WHEN word_count > {WORDS_PER_MINUTE} THEN word_count / {WORDS_PER_MINUTE} ELSE 1 END", persisted=True)
+    )
+    content_hash = Column(String(32), nullable=True)  # Hash of the body at last count
+    section_word_counts = Column(JSONB(), nullable=True)  # [[section text hash, words], ...]
     
     # Organization
     folder_id = Column(Integer, ForeignKey("folders.id"), nullable=True)
@@ -67,3 +80,96 @@ class Document(Base):
     # AI generation metadata
     ai_generated = Column(Boolean, default=False)
     generation_prompt = Column(Text, nullable=True)
+    
+    __table_args__ = (
+        # Author's list, newest first, served index-only
+        Index(
+            "documents_author_created",
+            "author_id",
+            text("created_at DESC"),
+            postgresql_include=["status", "document_type"],
+        ),
+        # Live documents only, in list order
+        Index(
+            "ix_documents_active",
+            "author_id",
+            text("updated_at DESC"),
+            postgresql_where=text("is_deleted = false"),
+        ),
+    )
+    
+    @property
+    def content(self) -> dict:
+        return self.content_blob if self.content_blob is not None else self.content_json
+    
+    @content.setter
+    def content(self, value: dict):
+        self.content_blob = value
+        self.content_json = None
+        self.content_meta = content_summary(value)
+
+
+def content_summary(content) -> dict:
+    """Small JSONB-queryable digest of a document body"""
+    if not isinstance(content, dict):
+        return {}
+    sections = content.get("sections") or []
+    return {
+        "title": content.get("title"),
+        "sections": len(sections),
+        "outline": [section.get("heading") for section in sections if isinstance(section, dict)],
+    }
+
+
+# LZ4 TOAST compression for the large body columns (PostgreSQL 14+)
+event.listen(
+    Document.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE documents ALTER COLUMN content_blob SET COMPRESSION lz4, "
+        "ALTER COLUMN content_json SET COMPRESSION lz4"
+    ).execute_if(dialect="postgresql"),
+)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def update_reading_stats(document: Document):
+    """
+    Refresh word_count from the document body
+    Nothing is counted when the body hash is unchanged; otherwise only
+    sections whose text changed are re-tokenized and the rest reuse their
+    stored counts.
+    """
+    content = document.content if isinstance(document.content, dict) else {}
+    content_hash = _digest(orjson.dumps(content, option=orjson.OPT_SORT_KEYS))
+    if content_hash == document.content_hash:
+        return
+    
+    previous = dict(document.section_word_counts or ())
+    counts = []
+    for section in content.get("sections", ()):
+        section_text = section.get("content") or ""
+        key = _digest(section_text.encode())
+        words = previous.get(key)
+        if words is None:
+            words = len(section_text.split())
+        counts.append([key, words])
+    
+    document.content_hash = content_hash
+    document.section_word_counts = counts
+    document.word_count = sum(words for _, words in counts)
+
+
+@event.listens_for(Document, "before_insert")
+def _count_new_document(mapper, connection, target):
+    update_reading_stats(target)
+
+
+@event.listens_for(Document, "before_update")
+def _count_updated_document(mapper, connection, target):
+    attrs = inspect(target).attrs
+    if attrs.content_blob.history.has_changes() or attrs.content_json.history.has_changes():
+        update_reading_stats(target)
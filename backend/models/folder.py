@@ -2,7 +2,7 @@
 Folder Model - For organizing all content types
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from backend.db.base import Base
@@ -35,3 +35,8 @@ class Folder(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        # Live folders only, in list order
+        Index("ix_folders_active", "user_id", "name", postgresql_where=text("is_deleted = false")),
+    )
@@ -2,18 +2,18 @@
 Presentation model
 """
 
-from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, Text, ForeignKey
+from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, Text, ForeignKey, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from backend.db.base import Base
-from backend.db.types import UUID, JSONB
-import uuid
+from backend.db.types import UUID, JSONB, TextArray
+from backend.db.uuidv7 import uuid7
 
 
 class Presentation(Base):
     __tablename__ = "presentations"
     
-    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(), primary_key=True, default=uuid7)
     title = Column(String(500), nullable=False)
     slug = Column(String(255), unique=True)
     
@@ -22,7 +22,8 @@ class Presentation(Base):
     owner_id = Column(UUID(), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     
     # Content
-    content = Column(JSONB(), nullable=False, default={'cards': []})
+    # Default built by the database: no shared Python dict, no client-side encode
+    content = Column(JSONB(), nullable=False, server_default=text("""'{"cards": []}'"""))
     
     # Theme & design
     theme_id = Column(UUID())
@@ -56,12 +57,49 @@ class Presentation(Base):
     
     # Metadata
     description = Column(Text)
-    tags = Column(Text)  # Comma-separated
+    tags = Column(TextArray())
     thumbnail_url = Column(Text)
     
     # Version control
     version = Column(Integer, default=1)
     parent_version_id = Column(UUID())
     
+    __table_args__ = (
+        Index("ix_presentations_tags_gin", "tags", postgresql_using="gin"),
+        # Live (not deleted or archived) presentations, in list order
+        Index(
+            "ix_presentations_active",
+            "owner_id",
+            text("updated_at DESC"),
+            postgresql_where=text("is_deleted = false AND is_archived = false"),
+        ),
+        # Analytics top-N by views / recent-N by edit time over unarchived
+        # decks: an index walk with the projected columns, no sort or heap visit
+        Index(
+            "ix_pres_user_arch_views",
+            "owner_id",
+            text("view_count DESC"),
+            postgresql_include=["id", "title", "created_at"],
+            postgresql_where=text("is_archived = false"),
+        ),
+        Index(
+            "ix_pres_user_arch_updated",
+            "owner_id",
+            text("updated_at DESC"),
+            postgresql_include=["id", "title", "view_count"],
+            postgresql_where=text("is_archived = false"),
+        ),
+        # "Created in the last N days" range predicates per owner
+        Index("ix_pres_user_created", "owner_id", "created_at"),
+        # Workspace dashboard "recent presentations", served index-only
+        Index(
+            "ix_pres_ws_recent",
+            "workspace_id",
+            text("updated_at DESC"),
+            postgresql_include=["title", "thumbnail_url", "is_published"],
+            postgresql_where=text("is_deleted = false AND is_archived = false"),
+        ),
+    )
+    
     def __repr__(self):
         return f"<Presentation(title='{self.title}', id='{self.id}')>"
@@ -2,9 +2,10 @@
 Social Post Model - For social media content generation
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, DDL, Index, event, text
 from sqlalchemy.sql import func
 from backend.db.base import Base
+from backend.db.types import JSONB, EnumCode, TextArray
 import enum
 
 class SocialPlatform(str, enum.Enum):
@@ -26,11 +27,11 @@ class SocialPost(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     content_text = Column(Text, nullable=False)
-    content_json = Column(Text, nullable=False)  # JSON with formatted content, hashtags, etc.
+    content_json = Column(JSONB(), nullable=False)  # JSON with formatted content, hashtags, etc.
     
     # Platform
-    platform = Column(Enum(SocialPlatform), nullable=False, index=True)
-    status = Column(Enum(SocialPostStatus), default=SocialPostStatus.DRAFT, nullable=False)
+    platform = Column(EnumCode(SocialPlatform), nullable=False, index=True)
+    status = Column(EnumCode(SocialPostStatus), default=SocialPostStatus.DRAFT, nullable=False)
     
     # Media
     image_url = Column(String(500), nullable=True)
@@ -41,8 +42,8 @@ class SocialPost(Base):
     published_at = Column(DateTime(timezone=True), nullable=True)
     
     # Metadata
-    author_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    hashtags = Column(String(500), nullable=True)  # Comma-separated
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    hashtags = Column(TextArray(), nullable=True)
     
     # Organization
     folder_id = Column(Integer, ForeignKey("folders.id"), nullable=True)
@@ -64,3 +65,29 @@ class SocialPost(Base):
     # AI generation metadata
     ai_generated = Column(Boolean, default=False)
     generation_prompt = Column(Text, nullable=True)
+    
+    __table_args__ = (
+        # Author's list, newest first, served index-only
+        Index(
+            "social_posts_author_created",
+            "author_id",
+            text("created_at DESC"),
+            postgresql_include=["status", "platform"],
+        ),
+        Index("ix_social_posts_hashtags_gin", "hashtags", postgresql_using="gin"),
+        # Live posts only, in list order
+        Index(
+            "ix_social_posts_active",
+            "author_id",
+            text("created_at DESC"),
+            postgresql_where=text("is_deleted = false"),
+        ),
+    )
+
+
+# LZ4 TOAST compression for the large JSON body (PostgreSQL 14+)
+event.listen(
+    SocialPost.__table__,
+    "after_create",
+    DDL("ALTER TABLE social_posts ALTER COLUMN content_json SET COMPRESSION lz4").execute_if(dialect="postgresql"),
+)
@@ -2,17 +2,17 @@
 Template model
 """
 
-from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, Text, ForeignKey, ARRAY, DECIMAL
+from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, Text, ForeignKey, ARRAY, DECIMAL, Index
 from sqlalchemy.sql import func
 from backend.db.base import Base
-from backend.db.types import UUID, JSONB
-import uuid
+from backend.db.types import UUID, JSONB, TextArray
+from backend.db.uuidv7 import uuid7
 
 
 class Template(Base):
     __tablename__ = "templates"
     
-    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(), primary_key=True, default=uuid7)
     name = Column(String(255), nullable=False)
     slug = Column(String(255), unique=True, nullable=False)
     description = Column(Text)
@@ -25,13 +25,13 @@ class Template(Base):
     # Content structure
     content = Column(JSONB(), nullable=False)  # Default card layout
     num_cards = Column(Integer)
-    card_types = Column(Text)  # Comma-separated list
+    card_types = Column(TextArray())
     
     # Categorization
     category = Column(String(50))
     subcategory = Column(String(50))
     industry = Column(String(50))
-    tags = Column(Text)  # Comma-separated
+    tags = Column(TextArray())
     
     # Stats
     usage_count = Column(Integer, default=0)
@@ -49,5 +49,10 @@ class Template(Base):
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        Index("ix_templates_tags_gin", "tags", postgresql_using="gin"),
+        Index("ix_templates_card_types_gin", "card_types", postgresql_using="gin"),
+    )
+    
     def __repr__(self):
         return f"<Template(name='{self.name}', category='{self.category}')>"
@@ -2,17 +2,17 @@
 Theme model
 """
 
-from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, Text, ForeignKey, ARRAY
+from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, Text, ForeignKey, ARRAY, Index, text
 from sqlalchemy.sql import func
 from backend.db.base import Base
-from backend.db.types import UUID, JSONB
-import uuid
+from backend.db.types import UUID, JSONB, TextArray
+from backend.db.uuidv7 import uuid7
 
 
 class Theme(Base):
     __tablename__ = "themes"
     
-    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(), primary_key=True, default=uuid7)
     name = Column(String(255), nullable=False)
     slug = Column(String(255), unique=True, nullable=False)
     description = Column(Text)
@@ -38,7 +38,7 @@ class Theme(Base):
     
     # Categorization
     category = Column(String(50))
-    tags = Column(Text)
+    tags = Column(TextArray())
     
     # Preview
     preview_url = Column(Text)
@@ -48,9 +48,28 @@ class Theme(Base):
     usage_count = Column(Integer, default=0)
     rating = Column(Integer, default=0)
     
+    # Soft delete (rows are purged by tasks.purge_soft_deleted)
+    is_deleted = Column(Boolean, default=False)
+    deleted_at = Column(TIMESTAMP, nullable=True)
+    
     # Timestamps
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
+    # Fetch server-generated columns via RETURNING so callers don't need db.refresh()
+    __mapper_args__ = {"eager_defaults": True}
+    
+    __table_args__ = (
+        # get_user_themes: creator's themes, newest first
+        Index("themes_user_created", "created_by", text("created_at DESC")),
+        # get_featured_themes: featured only, most used first
+        Index(
+            "themes_featured_usage",
+            text("usage_count DESC"),
+            postgresql_where=text("is_featured = true"),
+        ),
+        Index("ix_themes_tags_gin", "tags", postgresql_using="gin"),
+    )
+    
     def __repr__(self):
         return f"<Theme(name='{self.name}', category='{self.category}')>"
@@ -2,17 +2,34 @@
 User model
 """
 
-from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, Text
+from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, Text, Index, text, update
 from sqlalchemy.sql import func
 from backend.db.base import Base
 from backend.db.types import UUID, JSONB
-import uuid
+from backend.db.uuidv7 import uuid7
+from backend.config import settings, PLAN_CONFIGS
+from typing import Optional
+
+# Plan gating tables, built once at import
+UNLIMITED_CREDIT_PLANS = frozenset({'plus', 'pro', 'ultra', 'team', 'business'})
+_PLAN_FEATURES = {
+    'free': settings.FREE_FEATURES,
+    'plus': settings.PLUS_FEATURES,
+    'pro': settings.PRO_FEATURES,
+    'ultra': settings.PRO_FEATURES,
+    'team': settings.PRO_FEATURES,
+    'business': settings.PRO_FEATURES,
+}
+_MAX_CARDS = {
+    plan: config.get('max_cards_per_generation', 10)
+    for plan, config in PLAN_CONFIGS.items()
+}
 
 
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(), primary_key=True, default=uuid7)
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255))
     name = Column(String(255))
@@ -30,6 +47,7 @@ class User(Base):
     subscription_id = Column(String(255))
     subscription_status = Column(String(50))
     stripe_customer_id = Column(String(255))
+    stripe_subscription_item_id = Column(String(255))
     
     # Preferences
     language = Column(String(10), default='en')
@@ -53,26 +71,47 @@ class User(Base):
     credits_used = Column(Integer, default=0)
     exports_this_month = Column(Integer, default=0)
     
+    __table_args__ = (
+        # Credit jobs only touch metered (free plan) users
+        Index("users_free_plan", "id", postgresql_where=text("plan = 'free'")),
+    )
+    
     def has_credits(self, cost: int) -> bool:
         """Check if user has enough credits for operation"""
         # Unlimited credits for paid plans
-        if self.plan in ['plus', 'pro', 'ultra', 'team', 'business']:
-            return True
-        # Check credits for free plan
-        return self.credits_remaining >= cost
+        return self.plan in UNLIMITED_CREDIT_PLANS or self.credits_remaining >= cost
     
     def deduct_credits(self, cost: int) -> bool:
         """Deduct credits from user account"""
-        # Unlimited credits for paid plans
-        if self.plan in ['plus', 'pro', 'ultra', 'team', 'business']:
+        if self.plan in UNLIMITED_CREDIT_PLANS:
             return True
+        if self.credits_remaining < cost:
+            return False
         
         # Deduct for free plan
-        if self.credits_remaining >= cost:
-            self.credits_remaining -= cost
-            self.credits_used += cost
-            return True
-        return False
+        self.credits_remaining -= cost
+        self.credits_used += cost
+        return True
+    
+    @classmethod
+    def try_deduct(cls, session, user_id, cost: int) -> Optional[int]:
+        """
+        Deduct credits with one conditional UPDATE ... RETURNING
+        The balance check and the deduction are a single statement, so
+        concurrent generations can't overspend and no row is loaded or
+        locked. Returns the new balance, or None if it was insufficient.
+        Does not commit; unlimited plans should not call this.
+        """
+        return session.execute(
+            update(cls)
+            .where(cls.id == user_id, cls.credits_remaining >= cost)
+            .values(
+                credits_remaining=cls.credits_remaining - cost,
+                credits_used=cls.credits_used + cost
+            )
+            .returning(cls.credits_remaining),
+            execution_options={"synchronize_session": False}
+        ).scalar_one_or_none()
     
     def can_export(self) -> bool:
         """Check if user can export presentations"""
@@ -82,23 +121,12 @@ class User(Base):
     
     def has_feature(self, feature: str) -> bool:
         """Check if user has access to a feature"""
-        from backend.config import settings
-        
-        if self.plan == 'free':
-            return feature in settings.FREE_FEATURES
-        elif self.plan == 'plus':
-            return feature in settings.PLUS_FEATURES
-        elif self.plan in ['pro', 'ultra', 'team', 'business']:
-            return feature in settings.PRO_FEATURES
-        
-        return False
+        features = _PLAN_FEATURES.get(self.plan)
+        return features is not None and feature in features
     
     def get_max_cards(self) -> int:
         """Get maximum cards per generation for user's plan"""
-        from backend.config import PLAN_CONFIGS
-        
-        plan_config = PLAN_CONFIGS.get(self.plan, PLAN_CONFIGS['free'])
-        return plan_config.get('max_cards_per_generation', 10)
+        return _MAX_CARDS.get(self.plan, _MAX_CARDS['free'])
     
     def __repr__(self):
         return f"<User(email='{self.email}', plan='{self.plan}')>"
@@ -2,9 +2,13 @@
 Webpage Model - For public-facing web pages with custom domains
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Index, text
 from sqlalchemy.sql import func
+from sqlalchemy import event
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import relationship, Session, with_loader_criteria
 from backend.db.base import Base
+from backend.db.types import EnumCode, JSONB
 import enum
 
 class WebpageType(str, enum.Enum):
@@ -21,41 +25,66 @@ class WebpageStatus(str, enum.Enum):
     PUBLISHED = "published"
     ARCHIVED = "archived"
 
+def _meta_field(name: str) -> hybrid_property:
+    """Read/write one key of Webpage.meta as if it were a column"""
+    def getter(self):
+        return (self.meta or {}).get(name)
+    
+    def setter(self, value):
+        meta = dict(self.meta or {})  # New dict so the change is flushed
+        if value is None:
+            meta.pop(name, None)
+        else:
+            meta[name] = value
+        self.meta = meta or None
+    
+    def expression(cls):
+        return cls.meta[name].as_string()
+    
+    return hybrid_property(getter, setter, expr=expression)
+
+
 class Webpage(Base):
     __tablename__ = "webpages"
     
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String(500), nullable=False, index=True)
-    meta_description = Column(String(500), nullable=True)
+    id = Column(Integer, primary_key=True)
+    title = Column(String(500), nullable=False)
     content_json = Column(Text, nullable=False)  # JSON structure with sections, hero, CTA, forms
     
     # Webpage type
-    webpage_type = Column(Enum(WebpageType), nullable=False, default=WebpageType.LANDING_PAGE)
-    status = Column(Enum(WebpageStatus), default=WebpageStatus.DRAFT, nullable=False)
+    webpage_type = Column(EnumCode(WebpageType), nullable=False, default=WebpageType.LANDING_PAGE)
+    status = Column(EnumCode(WebpageStatus), default=WebpageStatus.DRAFT, nullable=False)
     
     # Theming
     theme_id = Column(Integer, ForeignKey("themes.id"), nullable=True)
     
     # Custom domain & publishing
     custom_domain_id = Column(Integer, ForeignKey("custom_domains.id"), nullable=True)
-    subdomain = Column(String(100), nullable=True, index=True)  # e.g., "mysite" -> mysite.gamma.app
+    subdomain = Column(String(100), nullable=True)  # e.g., "mysite" -> mysite.gamma.app
     full_url = Column(String(500), nullable=True)  # e.g., https://mysite.gamma.app or https://custom.com
     
-    # SEO
-    seo_keywords = Column(String(1000), nullable=True)
-    og_image_url = Column(String(500), nullable=True)  # Open Graph image
-    
-    # Branding
-    favicon_url = Column(String(500), nullable=True)
-    custom_header_html = Column(Text, nullable=True)
-    custom_footer_html = Column(Text, nullable=True)
+    # Render-only SEO/branding fields, read together when a page is served.
+    # One JSONB value keeps list queries on a narrow row; NULL when all unset.
+    meta = Column(JSONB(), nullable=True)
+    meta_description = _meta_field("meta_description")
+    seo_keywords = _meta_field("seo_keywords")
+    og_image_url = _meta_field("og_image_url")  # Open Graph image
+    favicon_url = _meta_field("favicon_url")
+    custom_header_html = _meta_field("custom_header_html")
+    custom_footer_html = _meta_field("custom_footer_html")
     
     # Metadata
-    author_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Organization
     folder_id = Column(Integer, ForeignKey("folders.id"), nullable=True)
     
+    # Relationships - lazy="raise" so serializers can't trigger N+1 loads;
+    # callers must opt in with selectinload()
+    folder = relationship("Folder", lazy="raise")
+    custom_domain = relationship("CustomDomain", lazy="raise")
+    theme = relationship("Theme", lazy="raise")
+    
     # Analytics
     view_count = Column(Integer, default=0)
     unique_visitors = Column(Integer, default=0)
@@ -68,10 +97,91 @@ class Webpage(Base):
     deleted_at = Column(DateTime(timezone=True), nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     published_at = Column(DateTime(timezone=True), nullable=True)
     
     # AI generation metadata
     ai_generated = Column(Boolean, default=False)
     generation_prompt = Column(Text, nullable=True)
+    
+    # Fetch server-generated columns (created_at/updated_at) via RETURNING
+    # in the same statement, so callers don't need db.refresh()
+    __mapper_args__ = {"eager_defaults": True}
+    
+    __table_args__ = (
+        # Subdomain availability is an index probe; concurrent publishes collide at commit
+        Index(
+            "webpages_subdomain_active",
+            "subdomain",
+            unique=True,
+            postgresql_where=text("is_deleted = false AND subdomain IS NOT NULL"),
+            sqlite_where=text("is_deleted = 0 AND subdomain IS NOT NULL"),
+        ),
+        # Public traffic: subdomain -> published page URL without touching the heap
+        Index(
+            "webpages_published_subdomain",
+            "subdomain",
+            postgresql_include=["full_url"],
+            postgresql_where=text(f"status = {status.type.code(WebpageStatus.PUBLISHED)} AND is_deleted = false"),
+        ),
+        # "My published pages": owner + status, newest first
+        Index(
+            "webpages_author_status_created",
+            "author_id",
+            "status",
+            text("created_at DESC"),
+            postgresql_where=text("is_deleted = false"),
+        ),
+        # Containment lookups on meta keys (e.g. pages sharing an OG image)
+        Index("webpages_meta_gin", "meta", postgresql_using="gin"),
+        # Custom-domain routing: domain -> its page in a given status
+        Index(
+            "webpages_domain_status",
+            "custom_domain_id",
+            "status",
+            postgresql_where=text("is_deleted = false"),
+        ),
+        # Title search and recency scans only ever see live rows
+        Index(
+            "webpages_title_live",
+            "title",
+            postgresql_where=text("is_deleted = false"),
+        ),
+        Index(
+            "webpages_created_live",
+            text("created_at DESC"),
+            postgresql_where=text("is_deleted = false"),
+        ),
+        # list_webpages: owner + live rows, newest first, optionally per folder
+        Index(
+            "webpages_user_updated_active",
+            "author_id",
+            text("updated_at DESC"),
+            postgresql_where=text("is_deleted = false"),
+        ),
+        Index(
+            "webpages_user_folder_updated",
+            "author_id",
+            "folder_id",
+            text("updated_at DESC"),
+            postgresql_where=text("is_deleted = false"),
+        ),
+    )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _exclude_deleted_webpages(execute_state):
+    """
+    Apply is_deleted = false to every ORM SELECT touching Webpage.
+    Pass execution_options(include_deleted=True) to see soft-deleted rows.
+    """
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(Webpage, Webpage.is_deleted == False, include_aliases=True)
+        )
@@ -2,17 +2,41 @@
 Workspace model
 """
 
-from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, ForeignKey
+from collections import Counter
+
+from sqlalchemy import Column, String, Integer, Boolean, TIMESTAMP, ForeignKey, event, inspect, or_, select, update
+from sqlalchemy.orm import Session, object_session, relationship
 from sqlalchemy.sql import func
-from backend.db.base import Base
+from backend.db.base import Base, get_redis
 from backend.db.types import UUID, JSONB
-import uuid
+from backend.db.uuidv7 import uuid7
+from backend.models.presentation import Presentation
+
+
+# Live workspace counters are a Redis hash bumped with HINCRBY, so creating a
+# presentation never rewrites (and row-locks) the workspace row. The columns
+# are reconciled from the source tables daily (tasks.reconcile_workspace_stats).
+WORKSPACE_STATS_KEY = "workspace:{}:stats"
+WORKSPACE_STAT_FIELDS = ("member_count", "presentation_count", "storage_used")
+
+# Flush listeners only note deltas in session.info; they are applied once the
+# transaction commits, so rolled-back changes never reach Redis
+_PENDING_DELTAS = "workspace_stat_deltas"
+
+# Only bump hashes that exist: a missing one is seeded from the reconciled
+# columns on the next read, which would double-count. Atomic in one call.
+_HINCRBY_IF_EXISTS = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+end
+return nil
+"""
 
 
 class Workspace(Base):
     __tablename__ = "workspaces"
     
-    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(), primary_key=True, default=uuid7)
     name = Column(String(255), nullable=False)
     slug = Column(String(255), unique=True)
     owner_id = Column(UUID(), ForeignKey('users.id', ondelete='CASCADE'))
@@ -32,7 +56,7 @@ class Workspace(Base):
     allow_guest_access = Column(Boolean, default=False)
     require_2fa = Column(Boolean, default=False)
     
-    # Stats
+    # Stats - reconciled snapshot; read live values with get_workspace_stats()
     member_count = Column(Integer, default=1)
     presentation_count = Column(Integer, default=0)
     storage_used = Column(Integer, default=0)  # in bytes
@@ -41,6 +65,10 @@ class Workspace(Base):
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
+    # Members are shown wherever a workspace is, so they load with it:
+    # one IN query for a whole page of workspaces instead of one per row
+    members = relationship("WorkspaceMember", back_populates="workspace", lazy="selectin")
+    
     def __repr__(self):
         return f"<Workspace(name='{self.name}', plan='{self.plan}')>"
 
@@ -49,7 +77,7 @@ class WorkspaceMember(Base):
     """Workspace members and their roles"""
     __tablename__ = "workspace_members"
     
-    id = Column(UUID(), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(), primary_key=True, default=uuid7)
     workspace_id = Column(UUID(), ForeignKey('workspaces.id', ondelete='CASCADE'), nullable=False, index=True)
     user_id = Column(UUID(), ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     
@@ -70,5 +98,159 @@ class WorkspaceMember(Base):
     joined_at = Column(TIMESTAMP, server_default=func.now())
     last_active = Column(TIMESTAMP, nullable=True)
     
+    workspace = relationship("Workspace", back_populates="members")
+    
     def __repr__(self):
         return f"<WorkspaceMember(workspace_id='{self.workspace_id}', user_id='{self.user_id}', role='{self.role}')>"
+
+
+def bump_workspace_stats(deltas: dict):
+    """
+    Apply {(workspace_id, field): amount} to the live counters
+    One pipelined round-trip; a no-op without Redis.
+    """
+    redis_client = get_redis()
+    if redis_client is None:
+        return
+    try:
+        bump = redis_client.register_script(_HINCRBY_IF_EXISTS)
+        with redis_client.pipeline(transaction=False) as pipe:
+            for (workspace_id, field), amount in deltas.items():
+                if amount:
+                    bump(keys=[WORKSPACE_STATS_KEY.format(workspace_id)], args=[field, amount], client=pipe)
+            pipe.execute()
+    except Exception:
+        pass  # Drift is corrected by the daily reconciliation
+
+
+def bump_workspace_stat(target, workspace_id, field: str, amount: int = 1):
+    """Queue a counter change on target's session, applied after commit"""
+    session = object_session(target)
+    if session is None or workspace_id is None:
+        return
+    session.info.setdefault(_PENDING_DELTAS, Counter())[(workspace_id, field)] += amount
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_workspace_stats(session):
+    deltas = session.info.pop(_PENDING_DELTAS, None)
+    if deltas:
+        bump_workspace_stats(deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_workspace_stats(session):
+    session.info.pop(_PENDING_DELTAS, None)
+
+
+def get_workspace_stats(db, workspace_id) -> dict:
+    """Live workspace counters from Redis, seeded from the columns on a miss"""
+    redis_client = get_redis()
+    key = WORKSPACE_STATS_KEY.format(workspace_id)
+    if redis_client is not None:
+        try:
+            cached = redis_client.hgetall(key)
+            if cached:
+                return {field: int(cached.get(field, 0)) for field in WORKSPACE_STAT_FIELDS}
+        except Exception:
+            redis_client = None
+    
+    row = db.execute(
+        select(*(getattr(Workspace, field) for field in WORKSPACE_STAT_FIELDS))
+        .where(Workspace.id == workspace_id)
+    ).first()
+    if row is None:
+        return None
+    stats = {field: value or 0 for field, value in zip(WORKSPACE_STAT_FIELDS, row)}
+    
+    if redis_client is not None:
+        try:
+            redis_client.hset(key, mapping=stats)
+        except Exception:
+            pass
+    return stats
+
+
+def reconcile_workspace_stats(db) -> int:
+    """
+    Recount member/presentation counters from the source tables into the
+    workspace columns and reset the Redis hashes to match
+    Only rows whose counts changed are rewritten. Returns the number updated.
+    """
+    presentation_count = select(func.count()).where(
+        Presentation.workspace_id == Workspace.id,
+        Presentation.is_deleted == False
+    ).scalar_subquery()
+    member_count = select(func.count()).where(
+        WorkspaceMember.workspace_id == Workspace.id,
+        WorkspaceMember.is_active == True
+    ).scalar_subquery()
+    
+    result = db.execute(
+        update(Workspace)
+        .where(or_(
+            Workspace.presentation_count.is_distinct_from(presentation_count),
+            Workspace.member_count.is_distinct_from(member_count)
+        ))
+        .values(presentation_count=presentation_count, member_count=member_count),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    
+    redis_client = get_redis()
+    if redis_client is not None:
+        rows = db.execute(select(Workspace.id, *(getattr(Workspace, field) for field in WORKSPACE_STAT_FIELDS)))
+        with redis_client.pipeline(transaction=False) as pipe:
+            for workspace_id, *values in rows:
+                pipe.hset(
+                    WORKSPACE_STATS_KEY.format(workspace_id),
+                    mapping={field: value or 0 for field, value in zip(WORKSPACE_STAT_FIELDS, values)}
+                )
+            pipe.execute()
+    
+    return result.rowcount
+
+
+def _is_counted(presentation) -> bool:
+    return presentation.workspace_id is not None and not presentation.is_deleted
+
+
+@event.listens_for(Presentation, "after_insert")
+def _count_new_presentation(mapper, connection, target):
+    if _is_counted(target):
+        bump_workspace_stat(target, target.workspace_id, "presentation_count", 1)
+
+
+@event.listens_for(Presentation, "after_delete")
+def _count_deleted_presentation(mapper, connection, target):
+    if _is_counted(target):
+        bump_workspace_stat(target, target.workspace_id, "presentation_count", -1)
+
+
+@event.listens_for(Presentation, "after_update")
+def _count_moved_presentation(mapper, connection, target):
+    """Soft deletes, restores and workspace moves change which workspace counts the row"""
+    state = inspect(target)
+    workspace = state.attrs.workspace_id.history
+    deleted = state.attrs.is_deleted.history
+    if not workspace.has_changes() and not deleted.has_changes():
+        return
+    
+    old_workspace = workspace.deleted[0] if workspace.deleted else target.workspace_id
+    old_deleted = deleted.deleted[0] if deleted.deleted else target.is_deleted
+    if old_workspace is not None and not old_deleted:
+        bump_workspace_stat(target, old_workspace, "presentation_count", -1)
+    if _is_counted(target):
+        bump_workspace_stat(target, target.workspace_id, "presentation_count", 1)
+
+
+@event.listens_for(WorkspaceMember, "after_insert")
+def _count_new_member(mapper, connection, target):
+    if target.is_active is not False:
+        bump_workspace_stat(target, target.workspace_id, "member_count", 1)
+
+
+@event.listens_for(WorkspaceMember, "after_delete")
+def _count_removed_member(mapper, connection, target):
+    if target.is_active is not False:
+        bump_workspace_stat(target, target.workspace_id, "member_count", -1)
@@ -6,13 +6,149 @@ Can use FREE providers (Gemini, Groq, Perplexity) or OpenAI
 """
 
 from openai import AsyncOpenAI
-from typing import Dict, List, Optional
-import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import orjson
 import asyncio
-from functools import lru_cache
+import re
 import hashlib
 from backend.config import settings
-from backend.db.base import get_redis
+from backend.db.base import get_async_redis
+from backend.utils.cache import SemanticCache, TTLCache
+from backend.utils.logging import ai_logger
+
+# Cache-key hash, bound once: _get_cache_key runs on every cached call
+_HASH = hashlib.blake2b
+
+
+def _consume_exception(future: asyncio.Future):
+    """Mark a shared failure as retrieved even when nobody else awaited it"""
+    if not future.cancelled():
+        future.exception()
+
+
+class _Uncached:
+    """A result returned to the caller but never stored under the exact key"""
+    __slots__ = ("value",)
+    
+    def __init__(self, value):
+        self.value = value
+
+
+class _SemanticHit(_Uncached):
+    """A near-duplicate's response"""
+    __slots__ = ()
+
+
+class _PartialResult(_Uncached):
+    """A response missing parts that failed transiently, so the next call retries"""
+    __slots__ = ()
+
+
+# Default themes by style
+_THEME_SUGGESTIONS: Dict[str, Dict] = {
+    'professional': {
+        'colors': {
+            'primary': '#1E3A8A',
+            'secondary': '#3B82F6',
+            'accent': '#60A5FA',
+            'background': '#FFFFFF',
+            'text': '#1F2937'
+        },
+        'fonts': {
+            'heading': 'Inter',
+            'body': 'Inter',
+            'headingWeight': '700'
+        }
+    },
+    'creative': {
+        'colors': {
+            'primary': '#EC4899',
+            'secondary': '#F59E0B',
+            'accent': '#8B5CF6',
+            'background': '#FFFFFF',
+            'text': '#1F2937'
+        },
+        'fonts': {
+            'heading': 'Poppins',
+            'body': 'Inter',
+            'headingWeight': '700'
+        }
+    },
+    'minimal': {
+        'colors': {
+            'primary': '#000000',
+            'secondary': '#6B7280',
+            'accent': '#3B82F6',
+            'background': '#FFFFFF',
+            'text': '#111827'
+        },
+        'fonts': {
+            'heading': 'Inter',
+            'body': 'Inter',
+            'headingWeight': '600'
+        }
+    }
+}
+
+_CARDS_ARRAY = re.compile(r'"cards"\s*:\s*\[')
+
+
+class _CardStream:
+    """
+    Pull complete card objects out of a streamed presentation JSON response
+    A tiny bracket counter over the "cards" array: each feed() scans only the
+    new text and returns (index, card) for every card object it completed.
+    """
+    
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._in_cards = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._start = 0
+        self._count = 0
+    
+    def feed(self, chunk: str) -> List[Tuple[int, Dict]]:
+        self.text += chunk
+        cards = []
+        if self._done:
+            return cards
+        if not self._in_cards:
+            match = _CARDS_ARRAY.search(self.text)
+            if match is None:
+                return cards
+            self._in_cards = True
+            self._pos = match.end()
+        
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{" or ch == "[":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch == "}" or ch == "]":
+                if self._depth == 0:
+                    self._done = True  # End of the cards array
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    cards.append((self._count, orjson.loads(text[self._start:i + 1])))
+                    self._count += 1
+        self._pos = len(text)
+        return cards
 
 
 class AIService:
@@ -33,6 +169,123 @@ class AIService:
     CACHE_TTL_PRESENTATION = 3600  # 1 hour
     CACHE_TTL_TEXT = 1800  # 30 minutes
     CACHE_TTL_IMAGE = 7200  # 2 hours
+    CACHE_TTL_CHART = 3600  # 1 hour
+    
+    # Per-worker L1 in front of Redis, shared by every AIService instance.
+    # Holds orjson payloads so each hit decodes a private copy.
+    _l1 = TTLCache(maxsize=512, ttl=300)
+    L1_FAILURE_TTL = 30  # Remember failed calls briefly to stop retry stampedes
+    
+    # Fallback for rewrite/translate exact-key misses: near-duplicate inputs
+    # (editor autosaves, whitespace edits) reuse a cached response
+    _semantic = SemanticCache(threshold=settings.AI_SEMANTIC_CACHE_THRESHOLD, ttl=CACHE_TTL_TEXT)
+    
+    # System prompts are fixed strings, with per-request values in the user
+    # message, so OpenAI's prompt cache can reuse the shared prefix
+    PRESENTATION_SYSTEM_PROMPT = """You are an expert presentation designer. Create a presentation in the style and with the number of cards given by the user.
+
+CARD TYPES AVAILABLE:
+- title: Opening title card with title and subtitle
+- content: Text content with bullet points
+- image: Full-width image card
+- split: Two-column layout (text + image)
+- quote: Highlighted quote
+- stats: Key metrics/statistics (2-4 numbers)
+- timeline: Sequential events with dates
+- comparison: Side-by-side comparison
+- cta: Call-to-action with button
+- chart: Data visualization (bar, line, pie)
+
+RULES:
+1. First card MUST be "title" type
+2. Vary card types for visual interest
+3. Include 2-3 image cards (we'll generate these)
+4. Use stats/charts for data
+5. End with CTA or summary
+6. Keep text concise (3-5 bullets max per card)
+7. Use professional, engaging language
+
+OUTPUT FORMAT (JSON):
+{
+    "title": "Presentation Title",
+    "cards": [
+        {
+            "id": "card_1",
+            "type": "title",
+            "title": "Main Title",
+            "subtitle": "Subtitle text"
+        },
+        {
+            "id": "card_2",
+            "type": "content",
+            "title": "Section Title",
+            "content": {
+                "bullets": ["Point 1", "Point 2", "Point 3"]
+            }
+        },
+        {
+            "id": "card_3",
+            "type": "stats",
+            "title": "Key Metrics",
+            "content": {
+                "stats": [
+                    {"label": "Users", "value": "10M+", "trend": "up"},
+                    {"label": "Growth", "value": "250%", "trend": "up"}
+                ]
+            }
+        },
+        {
+            "id": "card_4",
+            "type": "image",
+            "title": "Visual Section",
+            "content": {
+                "image_prompt": "Describe the image to generate",
+                "alt": "Image description"
+            }
+        }
+    ]
+}"""
+    CHART_SYSTEM_PROMPT = """Generate realistic chart data in JSON format.
+
+OUTPUT FORMAT:
+{
+    "type": "bar|line|pie|scatter",
+    "data": {
+        "labels": [...],
+        "datasets": [
+            {
+                "label": "Dataset 1",
+                "data": [...]
+            }
+        ]
+    },
+    "options": {
+        "title": "Chart Title"
+    }
+}"""
+    REWRITE_SYSTEM_PROMPT = "You are an expert copywriter. Rewrite the text according to instructions."
+    TRANSLATE_SYSTEM_PROMPT = (
+        "Translate the text to the target language given by the user. "
+        "Maintain the tone and style."
+    )
+    REWRITE_INSTRUCTIONS = {
+        "improve": "Make this text more professional and engaging while keeping the same meaning:",
+        "simplify": "Simplify this text to make it easier to understand:",
+        "expand": "Expand this text with more detail and examples:",
+        "shorten": "Make this text more concise while keeping key points:",
+        "casual": "Rewrite this in a more casual, conversational tone:",
+        "formal": "Rewrite this in a more formal, professional tone:"
+    }
+    KEY_POINTS_SYSTEM_PROMPT = (
+        "Extract the requested number of most important key points from the text. "
+        "Return as JSON array."
+    )
+    
+    # Image models that accept n > 1, and their per-request cap
+    MULTI_IMAGE_MODELS = {"dall-e-2": 10}
+    
+    # cache_key -> future of the generation in flight, so concurrent misses share one call
+    _inflight: Dict[str, asyncio.Future] = {}
     
     def __init__(self, api_key: Optional[str] = None):
         # Check if we should use free providers
@@ -56,8 +309,8 @@ class AIService:
             self.use_free = False
             print("[PAID] Using OpenAI (paid)")
         
-        # Get Redis client for caching
-        self.redis_client = get_redis()
+        # Async Redis client for caching, so lookups don't block the event loop
+        self.redis_client = get_async_redis()
     
     async def generate_presentation(
         self,
@@ -81,46 +334,109 @@ class AIService:
                 'metadata': {...}
             }
         """
-        
-        # Check cache first
-        cache_key = self._get_cache_key("presentation", prompt, num_cards, style)
-        if self.redis_client:
-            try:
-                cached = self.redis_client.get(cache_key)
-                if cached:
-                    return json.loads(cached)
-            except Exception:
-                pass  # Cache miss or error, continue
-        
+        return await self._cached_call(
+            "presentation", self.CACHE_TTL_PRESENTATION, (prompt, num_cards, style),
+            lambda: self._generate_presentation(prompt, num_cards, style)
+        )
+    
+    async def _generate_presentation(self, prompt: str, num_cards: int, style: str) -> Dict:
         # Use free providers if enabled
         if self.use_free:
-            result = await self.free_service.generate_presentation(
+            return await self.free_service.generate_presentation(
                 prompt=prompt,
                 num_cards=num_cards,
                 style=style
             )
-        else:
-            # OpenAI generation with timeout
-            result = await self._generate_with_openai(prompt, num_cards, style)
+        # OpenAI generation with timeout
+        return await self._generate_with_openai(prompt, num_cards, style)
+    
+    async def _cached_call(self, prefix: str, ttl: int, key_args: tuple, coro_factory):
+        """
+        Return the cached result for key_args, or await coro_factory() and cache it
+        Checks the in-process L1, then Redis. Concurrent misses on the same
+        key wait for a single in-flight call. Cache errors are swallowed;
+        empty results are not cached; failures are cached in L1 only.
+        """
+        cache_key = self._get_cache_key(prefix, *key_args)
+        cached = self._l1.get(cache_key)
+        if isinstance(cached, Exception):
+            raise cached
+        if cached is not None:
+            return orjson.loads(cached)
         
-        # Cache the result
-        if self.redis_client and result:
+        if self.redis_client:
             try:
-                self.redis_client.setex(
-                    cache_key,
-                    self.CACHE_TTL_PRESENTATION,
-                    json.dumps(result)
-                )
+                cached = await self.redis_client.get(cache_key)
+                if cached:
+                    self._l1.set(cache_key, cached)
+                    return orjson.loads(cached)
             except Exception:
-                pass  # Cache write failed, not critical
+                pass  # Cache miss or error, continue
+        
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            result, payload = await asyncio.shield(inflight)
+            return orjson.loads(payload) if payload else result
+        
+        inflight = self._inflight[cache_key] = asyncio.get_running_loop().create_future()
+        inflight.add_done_callback(_consume_exception)
+        try:
+            try:
+                result = await coro_factory()
+            except Exception as e:
+                self._l1.set(cache_key, e, ttl=self.L1_FAILURE_TTL)
+                inflight.set_exception(e)
+                raise
+            if isinstance(result, _Uncached):
+                result, payload = result.value, None
+            else:
+                payload = orjson.dumps(result) if result else None
+            inflight.set_result((result, payload))
+        finally:
+            del self._inflight[cache_key]
+            if not inflight.done():
+                inflight.cancel()  # Leader was cancelled; waiters see CancelledError
+        
+        if payload:
+            self._l1.set(cache_key, payload)
+            if self.redis_client:
+                try:
+                    await self.redis_client.setex(cache_key, ttl, payload)
+                except Exception:
+                    pass  # Cache write failed, not critical
+        
+        return result
+    
+    async def _semantic_call(self, scope: Optional[str], namespace: str, text: str, coro_factory):
+        """
+        On an exact-key miss, reuse the response for a near-identical text
+        Off unless AI_SEMANTIC_CACHE is set, sentence-transformers is installed
+        and the caller's scope (user/workspace id) is known: responses are
+        only shared within one scope. Hits come back as _SemanticHit so
+        _cached_call doesn't store them under the new text's exact key.
+        """
+        if not scope or not settings.AI_SEMANTIC_CACHE or not self._semantic.available:
+            return await coro_factory()
+        
+        namespace = f"{scope}:{namespace}"
+        embedding = await asyncio.to_thread(self._semantic.embed, text)
+        cached = self._semantic.get(namespace, embedding)
+        if cached is not None:
+            return _SemanticHit(cached)
         
+        result = await coro_factory()
+        if result:
+            self._semantic.set(namespace, embedding, result)
         return result
     
     def _get_cache_key(self, prefix: str, *args) -> str:
         """Generate cache key from arguments"""
-        key_data = ":".join(str(arg) for arg in args)
-        key_hash = hashlib.md5(key_data.encode()).hexdigest()
-        return f"ai_service:{prefix}:{key_hash}"
+        # Hash args incrementally; long prompts are never joined into one string
+        key_hash = _HASH(digest_size=16)
+        for arg in args:
+            key_hash.update(str(arg).encode())
+            key_hash.update(b"\x1f")  # Unit separator between args
+        return f"ai_service:{prefix}:{key_hash.hexdigest()}"
     
     async def _generate_with_openai(
         self,
@@ -128,93 +444,51 @@ class AIService:
         num_cards: int,
         style: str
     ) -> Dict:
-        """Generate presentation using OpenAI with timeout handling"""
-        system_prompt = f"""You are an expert presentation designer. Create a {style} presentation with {num_cards} cards.
-
-CARD TYPES AVAILABLE:
-- title: Opening title card with title and subtitle
-- content: Text content with bullet points
-- image: Full-width image card
-- split: Two-column layout (text + image)
-- quote: Highlighted quote
-- stats: Key metrics/statistics (2-4 numbers)
-- timeline: Sequential events with dates
-- comparison: Side-by-side comparison
-- cta: Call-to-action with button
-- chart: Data visualization (bar, line, pie)
-
-RULES:
-1. First card MUST be "title" type
-2. Vary card types for visual interest
-3. Include 2-3 image cards (we'll generate these)
-4. Use stats/charts for data
-5. End with CTA or summary
-6. Keep text concise (3-5 bullets max per card)
-7. Use professional, engaging language
-
-OUTPUT FORMAT (JSON):
-{{
-    "title": "Presentation Title",
-    "cards": [
-        {{
-            "id": "card_1",
-            "type": "title",
-            "title": "Main Title",
-            "subtitle": "Subtitle text"
-        }},
-        {{
-            "id": "card_2",
-            "type": "content",
-            "title": "Section Title",
-            "content": {{
-                "bullets": ["Point 1", "Point 2", "Point 3"]
-            }}
-        }},
-        {{
-            "id": "card_3",
-            "type": "stats",
-            "title": "Key Metrics",
-            "content": {{
-                "stats": [
-                    {{"label": "Users", "value": "10M+", "trend": "up"}},
-                    {{"label": "Growth", "value": "250%", "trend": "up"}}
-                ]
-            }}
-        }},
-        {{
-            "id": "card_4",
-            "type": "image",
-            "title": "Visual Section",
-            "content": {{
-                "image_prompt": "Describe the image to generate",
-                "alt": "Image description"
-            }}
-        }}
-    ]
-}}"""
-        
+        """
+        Generate presentation using OpenAI with timeout handling
+        The completion is streamed: each image card starts its DALL-E request
+        as soon as the card is complete, while the rest is still decoding.
+        If any image request fails the deck is returned as a _PartialResult
+        so _cached_call doesn't pin the image-less version.
+        """
+        stream = _CardStream()
+        image_tasks = {}
+        batch_size = self.MULTI_IMAGE_MODELS.get(self.image_model, 1)
+        batched_prompts: Dict[str, List[int]] = {}  # image_prompt -> card indexes
         try:
-            response = await self.client.chat.completions.create(
-                model=self.text_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Create a presentation about: {prompt}"}
-                ],
-                temperature=0.7,
-                max_tokens=4000,
-                response_format={"type": "json_object"}
-            )
+            async for chunk in self._stream_completion(self._presentation_messages(prompt, num_cards, style)):
+                for index, card in stream.feed(chunk):
+                    if card.get('type') == 'image' and 'image_prompt' in card.get('content', {}):
+                        image_prompt = card['content']['image_prompt']
+                        if batch_size > 1:
+                            batched_prompts.setdefault(image_prompt, []).append(index)
+                        else:
+                            image_tasks[(index,)] = asyncio.create_task(self._generate_image(image_prompt))
             
-            result = json.loads(response.choices[0].message.content)
+            result = orjson.loads(stream.text)
             
-            # Generate images for image cards
-            for card in result['cards']:
-                if card['type'] == 'image' and 'image_prompt' in card.get('content', {}):
-                    image_url = await self._generate_image(card['content']['image_prompt'])
-                    card['content']['image_url'] = image_url
+            # Models that accept n > 1 get one request per distinct prompt instead of one per card
+            for image_prompt, indexes in batched_prompts.items():
+                for start in range(0, len(indexes), batch_size):
+                    group = tuple(indexes[start:start + batch_size])
+                    image_tasks[group] = asyncio.create_task(self._generate_images(image_prompt, len(group)))
             
-            # Add theme suggestion
-            result['theme'] = await self._suggest_theme(prompt, style)
+            image_urls = await asyncio.gather(
+                *image_tasks.values(),
+                return_exceptions=True  # A failed image leaves its card without one
+            )
+            failed = 0
+            for indexes, urls in zip(image_tasks, image_urls):
+                if isinstance(urls, BaseException):
+                    failed += 1
+                    ai_logger.error("Image generation failed", error=urls, cards=list(indexes))
+                    continue
+                if isinstance(urls, str):
+                    urls = [urls]
+                for index, image_url in zip(indexes, urls):
+                    if index < len(result['cards']):
+                        result['cards'][index]['content']['image_url'] = image_url
+            result['theme'] = self._suggest_theme(prompt, style)
             
             # Add metadata
             result['metadata'] = {
@@ -224,15 +498,62 @@ OUTPUT FORMAT (JSON):
                 'total_cards': len(result['cards'])
             }
             
-            return result
+            return _PartialResult(result) if failed else result
             
         except Exception as e:
             raise Exception(f"AI generation failed: {str(e)}")
+        finally:
+            for task in image_tasks.values():
+                task.cancel()  # No-op for finished tasks
+    
+    async def generate_presentation_stream(
+        self,
+        prompt: str,
+        num_cards: int = 10,
+        style: str = "professional"
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield presentation cards as the model produces them
+        For progressive UIs. Uncached, and images are not generated; free
+        providers don't stream, so their cards arrive all at once.
+        """
+        if self.use_free:
+            result = await self.generate_presentation(prompt, num_cards, style)
+            for card in result.get('cards', []):
+                yield card
+            return
+        
+        stream = _CardStream()
+        async for chunk in self._stream_completion(self._presentation_messages(prompt, num_cards, style)):
+            for _, card in stream.feed(chunk):
+                yield card
+    
+    def _presentation_messages(self, prompt: str, num_cards: int, style: str) -> List[Dict]:
+        return [
+            {"role": "system", "content": self.PRESENTATION_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Style: {style}. Cards: {num_cards}.\nCreate a presentation about: {prompt}"}
+        ]
+    
+    async def _stream_completion(self, messages: List[Dict]) -> AsyncIterator[str]:
+        """Stream a JSON-mode presentation completion as text deltas"""
+        response = await self.client.chat.completions.create(
+            model=self.text_model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=4000,
+            response_format={"type": "json_object"},
+            stream=True
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
     
     async def rewrite_text(
         self,
         text: str,
-        instruction: str = "improve"
+        instruction: str = "improve",
+        no_cache: bool = False,
+        scope: Optional[str] = None
     ) -> str:
         """
         Rewrite/improve text content
@@ -244,29 +565,32 @@ OUTPUT FORMAT (JSON):
         - "shorten": Make more concise
         - "casual": More casual tone
         - "formal": More formal tone
-        """
         
+        no_cache=True bypasses every cache layer (sensitive text).
+        scope (the caller's user or workspace id) enables near-duplicate reuse.
+        """
+        if no_cache:
+            return await self._rewrite_text(text, instruction)
+        return await self._cached_call(
+            "rewrite", self.CACHE_TTL_TEXT, (instruction, text),
+            lambda: self._semantic_call(
+                scope, f"rewrite:{instruction}", text, lambda: self._rewrite_text(text, instruction)
+            )
+        )
+    
+    async def _rewrite_text(self, text: str, instruction: str) -> str:
         # Use free providers if enabled
         if self.use_free:
             return await self.free_service.rewrite_text(text, instruction)
         
         # Otherwise use OpenAI
-        instruction_prompts = {
-            "improve": "Make this text more professional and engaging while keeping the same meaning:",
-            "simplify": "Simplify this text to make it easier to understand:",
-            "expand": "Expand this text with more detail and examples:",
-            "shorten": "Make this text more concise while keeping key points:",
-            "casual": "Rewrite this in a more casual, conversational tone:",
-            "formal": "Rewrite this in a more formal, professional tone:"
-        }
-        
-        prompt = instruction_prompts.get(instruction, instruction)
+        prompt = self.REWRITE_INSTRUCTIONS.get(instruction, instruction)
         
         try:
             response = await self.client.chat.completions.create(
                 model=self.text_model,
                 messages=[
-                    {"role": "system", "content": "You are an expert copywriter. Rewrite the text according to instructions."},
+                    {"role": "system", "content": self.REWRITE_SYSTEM_PROMPT},
                     {"role": "user", "content": f"{prompt}\n\n{text}"}
                 ],
                 temperature=0.7,
@@ -281,13 +605,27 @@ OUTPUT FORMAT (JSON):
     async def translate_text(
         self,
         text: str,
-        target_language: str
+        target_language: str,
+        no_cache: bool = False,
+        scope: Optional[str] = None
     ) -> str:
         """
         Translate text to target language
         Supports 60+ languages
-        """
         
+        no_cache=True bypasses every cache layer (sensitive text).
+        scope (the caller's user or workspace id) enables near-duplicate reuse.
+        """
+        if no_cache:
+            return await self._translate_text(text, target_language)
+        return await self._cached_call(
+            "translate", self.CACHE_TTL_TEXT, (target_language, text),
+            lambda: self._semantic_call(
+                scope, f"translate:{target_language}", text, lambda: self._translate_text(text, target_language)
+            )
+        )
+    
+    async def _translate_text(self, text: str, target_language: str) -> str:
         # Use free providers if enabled
         if self.use_free:
             return await self.free_service.translate_text(text, target_language)
@@ -297,8 +635,8 @@ OUTPUT FORMAT (JSON):
             response = await self.client.chat.completions.create(
                 model=self.text_model,
                 messages=[
-                    {"role": "system", "content": f"Translate the following text to {target_language}. Maintain the tone and style."},
-                    {"role": "user", "content": text}
+                    {"role": "system", "content": self.TRANSLATE_SYSTEM_PROMPT},
+                    {"role": "user", "content": f"Target language: {target_language}.\n\n{text}"}
                 ],
                 temperature=0.3,
                 max_tokens=2000
@@ -335,62 +673,37 @@ OUTPUT FORMAT (JSON):
         except Exception as e:
             raise Exception(f"Image generation failed: {str(e)}")
     
-    async def _suggest_theme(
+    async def _generate_images(
         self,
         prompt: str,
-        style: str
-    ) -> Dict:
-        """
-        Suggest appropriate theme based on content
+        n: int,
+        size: str = "1024x1024"
+    ) -> List[str]:
         """
+        Generate n images for one prompt in a single request (models in MULTI_IMAGE_MODELS)
         
-        # Default themes by style
-        theme_suggestions = {
-            'professional': {
-                'colors': {
-                    'primary': '#1E3A8A',
-                    'secondary': '#3B82F6',
-                    'accent': '#60A5FA',
-                    'background': '#FFFFFF',
-                    'text': '#1F2937'
-                },
-                'fonts': {
-                    'heading': 'Inter',
-                    'body': 'Inter',
-                    'headingWeight': '700'
-                }
-            },
-            'creative': {
-                'colors': {
-                    'primary': '#EC4899',
-                    'secondary': '#F59E0B',
-                    'accent': '#8B5CF6',
-                    'background': '#FFFFFF',
-                    'text': '#1F2937'
-                },
-                'fonts': {
-                    'heading': 'Poppins',
-                    'body': 'Inter',
-                    'headingWeight': '700'
-                }
-            },
-            'minimal': {
-                'colors': {
-                    'primary': '#000000',
-                    'secondary': '#6B7280',
-                    'accent': '#3B82F6',
-                    'background': '#FFFFFF',
-                    'text': '#111827'
-                },
-                'fonts': {
-                    'heading': 'Inter',
-                    'body': 'Inter',
-                    'headingWeight': '600'
-                }
-            }
-        }
+        Returns: URLs to generated images
+        """
         
-        return theme_suggestions.get(style, theme_suggestions['professional'])
+        try:
+            response = await self.client.images.generate(
+                model=self.image_model,
+                prompt=f"{prompt}. Professional, high-quality, modern design.",
+                size=size,
+                n=n
+            )
+            
+            return [image.url for image in response.data]
+            
+        except Exception as e:
+            raise Exception(f"Image generation failed: {str(e)}")
+    
+    @staticmethod
+    def _suggest_theme(prompt: str, style: str) -> Dict:
+        """
+        Suggest appropriate theme based on content
+        """
+        return _THEME_SUGGESTIONS.get(style, _THEME_SUGGESTIONS['professional'])
     
     async def generate_chart_data(
         self,
@@ -399,31 +712,17 @@ OUTPUT FORMAT (JSON):
         """
         Generate sample chart data based on description
         """
-        
-        system_prompt = """Generate realistic chart data in JSON format.
-        
-OUTPUT FORMAT:
-{
-    "type": "bar|line|pie|scatter",
-    "data": {
-        "labels": [...],
-        "datasets": [
-            {
-                "label": "Dataset 1",
-                "data": [...]
-            }
-        ]
-    },
-    "options": {
-        "title": "Chart Title"
-    }
-}"""
-        
+        return await self._cached_call(
+            "chart", self.CACHE_TTL_CHART, (description,),
+            lambda: self._generate_chart_data(description)
+        )
+    
+    async def _generate_chart_data(self, description: str) -> Dict:
         try:
             response = await self.client.chat.completions.create(
                 model=self.text_model,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": self.CHART_SYSTEM_PROMPT},
                     {"role": "user", "content": f"Generate chart data for: {description}"}
                 ],
                 temperature=0.7,
@@ -431,7 +730,7 @@ OUTPUT FORMAT:
                 response_format={"type": "json_object"}
             )
             
-            return json.loads(response.choices[0].message.content)
+            return orjson.loads(response.choices[0].message.content)
             
         except Exception as e:
             raise Exception(f"Chart generation failed: {str(e)}")
@@ -445,20 +744,25 @@ OUTPUT FORMAT:
         Extract key points from long text
         Useful for converting documents to presentations
         """
-        
+        return await self._cached_call(
+            "key_points", self.CACHE_TTL_TEXT, (num_points, text),
+            lambda: self._extract_key_points(text, num_points)
+        )
+    
+    async def _extract_key_points(self, text: str, num_points: int) -> List[str]:
         try:
             response = await self.client.chat.completions.create(
                 model=self.text_model,
                 messages=[
-                    {"role": "system", "content": f"Extract the {num_points} most important key points from this text. Return as JSON array."},
-                    {"role": "user", "content": text}
+                    {"role": "system", "content": self.KEY_POINTS_SYSTEM_PROMPT},
+                    {"role": "user", "content": f"Key points: {num_points}.\n\n{text}"}
                 ],
                 temperature=0.5,
                 max_tokens=500,
                 response_format={"type": "json_object"}
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = orjson.loads(response.choices[0].message.content)
             return result.get('key_points', [])
             
         except Exception as e:
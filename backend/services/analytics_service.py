@@ -2,14 +2,79 @@
 Analytics Service
 Tracks and analyzes presentation views, engagement, and user behavior
 """
-from datetime import datetime, timedelta
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, case
 import json
+import random
+
+# numpy (optional) draws the mock trend in one call instead of one per day
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 from backend.models.presentation import Presentation
 from backend.models.user import User
+from backend.models.workspace import get_workspace_stats
+from backend.db.bulk import event_buffer
+from backend.utils.cache import cached, invalidate_keys
+from backend.models.analytics import AnalyticsCube, AggregatedStats, PresentationStats, PresentationView, CUBE_BUCKET_SECONDS
+from backend.services.analytics_kernels import engagement_stats
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Aware datetimes (e.g. a Z-suffixed query param) as the naive UTC the tables store"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# Estimated traffic split applied to a presentation's total views
+_COUNTRY_WEIGHTS = (
+    ("United States", 0.4),
+    ("United Kingdom", 0.2),
+    ("Canada", 0.15),
+    ("Germany", 0.12),
+    ("Others", 0.13),
+)
+_REFERRER_WEIGHTS = (
+    ("Direct", 0.5),
+    ("Social Media", 0.3),
+    ("Email", 0.15),
+    ("Other", 0.05),
+)
+_DEVICE_PERCENTAGES = (
+    {"device": "Desktop", "percentage": 65},
+    {"device": "Mobile", "percentage": 25},
+    {"device": "Tablet", "percentage": 10},
+)
+
+# Analytics responses are served from Redis for a short window
+ANALYTICS_CACHE_TTL = 60
+PRESENTATION_ANALYTICS_KEY = "analytics:pres:{presentation_id}:{days}"
+PRESENTATION_ANALYTICS_VERSION_KEY = "analytics:pres:{presentation_id}:ver"  # Bumped on edits
+DASHBOARD_STATS_KEY = "analytics:dashboard:{user_id}"
+
+
+# Presentation list rows, built straight from column projections and
+# serialized by orjson without an intermediate dict per row
+@dataclass(slots=True)
+class PresentationRow:
+    id: int
+    title: str
+    views: int
+    created_at: datetime
+
+
+@dataclass(slots=True)
+class RecentPresentationRow:
+    id: int
+    title: str
+    views: int
+    updated_at: datetime
 
 
 class AnalyticsService:
@@ -43,16 +108,28 @@ class AnalyticsService:
             "event_type": event_type,
             "presentation_id": presentation_id,
             "user_id": user_id,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.utcnow(),  # Encoded by orjson at the response
             "metadata": metadata or {}
         }
         
-        # Store in MongoDB (if available) or PostgreSQL
-        # For now, we'll return the event structure
+        # Buffered and written in batches (see backend/db/bulk.py) rather than
+        # one INSERT per request. The API's integer presentation ids don't fit
+        # the UUID column, so the id is kept in the event metadata.
+        if user_id is not None:
+            event_buffer.add_event({
+                "user_id": user_id,
+                "event_type": event_type,
+                "event_metadata": {**(metadata or {}), "presentation_id": presentation_id},
+            })
         return event
     
     # ========== Presentation Analytics ==========
     
+    @cached(
+        PRESENTATION_ANALYTICS_KEY,
+        ttl=ANALYTICS_CACHE_TTL,
+        version_fmt=PRESENTATION_ANALYTICS_VERSION_KEY
+    )
     def get_presentation_analytics(
         self,
         presentation_id: int,
@@ -69,7 +146,9 @@ class AnalyticsService:
         - Engagement metrics
         - Top referring sources
         """
-        presentation = db.query(Presentation).filter(
+        presentation = db.query(Presentation).with_entities(
+            Presentation.id, Presentation.title, Presentation.view_count
+        ).filter(
             Presentation.id == presentation_id
         ).first()
         
@@ -82,6 +161,12 @@ class AnalyticsService:
         # Basic metrics
         total_views = presentation.view_count
         
+        # Engagement totals are maintained on write - one primary-key lookup
+        stats = db.get(PresentationStats, presentation.id)
+        avg_seconds = stats.total_time_seconds // stats.views if stats and stats.views else 0
+        engagement = self._session_engagement(db, presentation.id, start_date) if stats and stats.views else None
+        completion_rate, p50_seconds, p90_seconds = engagement or (0.75, avg_seconds, avg_seconds)  # Estimate without sessions
+        
         # Generate mock trend data (replace with real DB queries)
         views_by_day = self._generate_views_trend(total_views, days)
         
@@ -92,52 +177,68 @@ class AnalyticsService:
             "metrics": {
                 "total_views": total_views,
                 "unique_visitors": int(total_views * 0.7),  # Estimate
-                "avg_time_spent": "2m 34s",  # Mock data
-                "completion_rate": 0.75,  # 75% of viewers see all slides
+                "avg_time_spent": f"{avg_seconds // 60}m {avg_seconds % 60}s",
+                "completion_rate": completion_rate,
+                "median_time_spent": f"{p50_seconds // 60}m {p50_seconds % 60}s",
+                "p90_time_spent": f"{p90_seconds // 60}m {p90_seconds % 60}s",
                 "engagement_score": 8.5  # Out of 10
             },
             "views_by_day": views_by_day,
             "demographics": {
                 "countries": [
-                    {"country": "United States", "views": int(total_views * 0.4)},
-                    {"country": "United Kingdom", "views": int(total_views * 0.2)},
-                    {"country": "Canada", "views": int(total_views * 0.15)},
-                    {"country": "Germany", "views": int(total_views * 0.12)},
-                    {"country": "Others", "views": int(total_views * 0.13)}
+                    {"country": country, "views": int(total_views * weight)}
+                    for country, weight in _COUNTRY_WEIGHTS
                 ],
-                "devices": [
-                    {"device": "Desktop", "percentage": 65},
-                    {"device": "Mobile", "percentage": 25},
-                    {"device": "Tablet", "percentage": 10}
-                ]
+                "devices": [dict(device) for device in _DEVICE_PERCENTAGES]
             },
             "referrers": [
-                {"source": "Direct", "views": int(total_views * 0.5)},
-                {"source": "Social Media", "views": int(total_views * 0.3)},
-                {"source": "Email", "views": int(total_views * 0.15)},
-                {"source": "Other", "views": int(total_views * 0.05)}
+                {"source": source, "views": int(total_views * weight)}
+                for source, weight in _REFERRER_WEIGHTS
             ]
         }
     
+    def _session_engagement(self, db: Session, presentation_id, start_date: datetime):
+        """
+        Completion rate and time-spent percentiles over the period's view sessions
+        A session completes the deck when it reaches as many cards as the
+        furthest viewer did. None when there are no sessions or no numpy.
+        """
+        if engagement_stats is None:
+            return None
+        rows = db.query(
+            PresentationView.time_spent_seconds,
+            func.coalesce(PresentationView.cards_viewed, 0)
+        ).filter(
+            PresentationView.presentation_id == presentation_id,
+            PresentationView.viewed_at >= start_date,
+            PresentationView.time_spent_seconds.isnot(None)
+        ).all()
+        if not rows:
+            return None
+        
+        sessions = np.array(rows, dtype=np.int64)
+        cards = np.ascontiguousarray(sessions[:, 1])
+        _, completion_rate, p50, p90 = engagement_stats(
+            sessions[:, 0].astype(np.float64), cards, int(cards.max())
+        )
+        return round(completion_rate, 2), int(p50), int(p90)
+    
     def _generate_views_trend(self, total_views: int, days: int) -> List[dict]:
         """Generate mock trend data"""
-        import random
-        
         views_per_day = max(1, total_views // days)
-        trend = []
+        low, high = max(1, views_per_day - 5), views_per_day + 5
+        today = datetime.utcnow().date()
         
-        for i in range(days):
-            date = datetime.utcnow() - timedelta(days=days - i - 1)
-            views = random.randint(
-                max(1, views_per_day - 5),
-                views_per_day + 5
-            )
-            trend.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "views": views
-            })
+        if np is not None:
+            views = np.random.randint(low, high + 1, size=days).tolist()
+            dates = (
+                np.datetime64(today) - np.arange(days - 1, -1, -1, dtype="timedelta64[D]")
+            ).astype(str).tolist()
+        else:
+            views = [random.randint(low, high) for _ in range(days)]
+            dates = [(today - timedelta(days=days - i - 1)).isoformat() for i in range(days)]
         
-        return trend
+        return [{"date": date, "views": count} for date, count in zip(dates, views)]
     
     # ========== User Analytics ==========
     
@@ -157,80 +258,119 @@ class AnalyticsService:
         - Activity timeline
         - Credits usage
         """
-        # Get user
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
+        stats = self._load_user_with_agg(db, user_id, datetime.utcnow() - timedelta(days=days))
+        if not stats:
             return None
+        live = (Presentation.owner_id == user_id, Presentation.is_archived == False)
         
-        # Get user's presentations
-        presentations = db.query(Presentation).filter(
-            Presentation.user_id == user_id,
-            Presentation.is_archived == False
-        ).all()
-        
-        # Calculate metrics
-        total_presentations = len(presentations)
-        total_views = sum(p.view_count for p in presentations)
-        public_count = sum(1 for p in presentations if p.is_public)
-        
-        # Sort by views
-        top_presentations = sorted(
-            presentations,
-            key=lambda p: p.view_count,
-            reverse=True
-        )[:5]
+        # Only the columns the response needs, for the top 5 rows
+        top_presentations = db.query(
+            Presentation.id, Presentation.title, Presentation.view_count, Presentation.created_at
+        ).filter(*live).order_by(Presentation.view_count.desc()).limit(5).all()
         
         return {
             "user_id": user_id,
             "period": f"Last {days} days",
             "summary": {
-                "total_presentations": total_presentations,
-                "public_presentations": public_count,
-                "total_views": total_views,
-                "avg_views_per_presentation": total_views / max(1, total_presentations),
-                "credits_remaining": user.credits,
-                "current_plan": user.plan
+                "total_presentations": stats.total_presentations,
+                "public_presentations": stats.public_presentations,
+                "total_views": stats.total_views,
+                "avg_views_per_presentation": stats.total_views / max(1, stats.total_presentations),
+                "credits_remaining": stats.credits_remaining,
+                "current_plan": stats.plan
             },
-            "top_presentations": [
-                {
-                    "id": p.id,
-                    "title": p.title,
-                    "views": p.view_count,
-                    "created_at": p.created_at.isoformat()
-                }
-                for p in top_presentations
-            ],
+            "top_presentations": [PresentationRow(*row) for row in top_presentations],
             "activity": {
-                "presentations_created": self._get_presentations_created_count(user_id, days, db),
+                "presentations_created": stats.created_since,
                 "exports": 0,  # Mock data
                 "shares": 0,  # Mock data
                 "ai_generations": self._get_ai_generations_count(user_id, days, db)
             }
         }
     
-    def _get_presentations_created_count(
+    def _load_user_with_agg(self, db: Session, user_id: int, start_date: datetime):
+        """
+        User credits/plan plus live-presentation counters in one round-trip
+        Returns None for an unknown user; counters are 0 for a user with no decks.
+        """
+        return db.query(
+            User.credits_remaining,
+            User.plan,
+            func.count(Presentation.id).label("total_presentations"),
+            func.coalesce(func.sum(Presentation.view_count), 0).label("total_views"),
+            func.coalesce(func.sum(case((Presentation.is_public == True, 1), else_=0)), 0).label("public_presentations"),
+            func.coalesce(func.sum(case((Presentation.created_at >= start_date, 1), else_=0)), 0).label("created_since")
+        ).outerjoin(
+            Presentation,
+            and_(Presentation.owner_id == User.id, Presentation.is_archived == False)
+        ).filter(User.id == user_id).group_by(User.id).one_or_none()
+    
+    def _get_ai_generations_count(
         self,
         user_id: int,
         days: int,
         db: Session
     ) -> int:
-        """Get count of presentations created in period"""
-        start_date = datetime.utcnow() - timedelta(days=days)
-        count = db.query(func.count(Presentation.id)).filter(
-            Presentation.user_id == user_id,
-            Presentation.created_at >= start_date
+        """Get count of AI generations in period from the daily aggregated stats"""
+        start_date = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+        count = db.query(func.sum(AggregatedStats.ai_generations)).filter(
+            AggregatedStats.user_id == user_id,
+            AggregatedStats.period_type == "daily",
+            AggregatedStats.period_start >= start_date
         ).scalar()
         return count or 0
     
-    def _get_ai_generations_count(
+    # ========== Event Histogram ==========
+    
+    def get_event_histogram(
         self,
-        user_id: int,
-        days: int,
-        db: Session
-    ) -> int:
-        """Get count of AI generations in period (mock)"""
-        # In production, query ai_generations table
-        return 0
+        user_id,
+        start: datetime,
+        end: datetime,
+        bins: int = 600,
+        event_type: Optional[str] = None,
+        db: Session = None
+    ) -> dict:
+        """
+        Bin the user's events over [start, end) into `bins` equal-width bins
+        
+        Reads the hourly analytics_cube (a few thousand rows at most) rather
+        than the analytics table, so brush/range updates stay cheap.
+        Resolution is bounded below by CUBE_BUCKET_SECONDS.
+        """
+        start, end = naive_utc(start), naive_utc(end)
+        query = db.query(
+            AnalyticsCube.bucket_start,
+            AnalyticsCube.event_type,
+            AnalyticsCube.events,
+            AnalyticsCube.credits_used,
+            AnalyticsCube.duration_ms
+        ).filter(
+            AnalyticsCube.user_id == user_id,
+            AnalyticsCube.bucket_start >= start,
+            AnalyticsCube.bucket_start < end
+        )
+        if event_type:
+            query = query.filter(AnalyticsCube.event_type == event_type)
+        
+        bin_seconds = max((end - start).total_seconds() / bins, CUBE_BUCKET_SECONDS)
+        cells: Dict[tuple, dict] = {}
+        for bucket_start, cell_type, events, credits, duration in query:
+            px = int((bucket_start - start).total_seconds() // bin_seconds)
+            cell = cells.setdefault((px, cell_type), {
+                "px": px, "event_type": cell_type,
+                "count": 0, "credits_used": 0, "duration_ms": 0
+            })
+            cell["count"] += events
+            cell["credits_used"] += credits
+            cell["duration_ms"] += duration
+        
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "bin_seconds": bin_seconds,
+            "bins": sorted(cells.values(), key=lambda c: (c["px"], c["event_type"]))
+        }
     
     # ========== Workspace Analytics ==========
     
@@ -249,13 +389,18 @@ class AnalyticsService:
         - Total views
         - Collaboration metrics
         """
+        # Live counters from Redis (seeded from the workspace row on a miss)
+        stats = get_workspace_stats(db, workspace_id)
+        if stats is None:
+            return None
+        
         return {
             "workspace_id": workspace_id,
             "period": f"Last {days} days",
             "summary": {
-                "total_presentations": 0,
+                "total_presentations": stats["presentation_count"],
                 "total_views": 0,
-                "active_members": 0,
+                "active_members": stats["member_count"],
                 "total_collaborations": 0
             },
             "members": [],
@@ -264,6 +409,7 @@ class AnalyticsService:
     
     # ========== Dashboard Stats ==========
     
+    @cached(DASHBOARD_STATS_KEY, ttl=ANALYTICS_CACHE_TTL)
     def get_dashboard_stats(
         self,
         user_id: int,
@@ -277,50 +423,41 @@ class AnalyticsService:
         - Quick metrics
         - Recommendations
         """
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
+        stats = self._load_user_with_agg(db, user_id, datetime.utcnow() - timedelta(days=30))
+        if not stats:
             return None
+        live = (Presentation.owner_id == user_id, Presentation.is_archived == False)
         
-        # Get presentations
-        presentations = db.query(Presentation).filter(
-            Presentation.user_id == user_id,
-            Presentation.is_archived == False
-        ).all()
-        
-        # Calculate quick stats
-        total_views = sum(p.view_count for p in presentations)
-        recent_presentations = sorted(
-            presentations,
-            key=lambda p: p.updated_at,
-            reverse=True
-        )[:3]
+        recent_presentations = db.query(
+            Presentation.id, Presentation.title, Presentation.view_count, Presentation.updated_at
+        ).filter(*live).order_by(Presentation.updated_at.desc()).limit(3).all()
         
         return {
             "quick_stats": {
-                "total_presentations": len(presentations),
-                "total_views": total_views,
-                "credits_remaining": user.credits,
-                "plan": user.plan
+                "total_presentations": stats.total_presentations,
+                "total_views": stats.total_views,
+                "credits_remaining": stats.credits_remaining,
+                "plan": stats.plan
             },
-            "recent_presentations": [
-                {
-                    "id": p.id,
-                    "title": p.title,
-                    "views": p.view_count,
-                    "updated_at": p.updated_at.isoformat()
-                }
-                for p in recent_presentations
-            ],
+            "recent_presentations": [RecentPresentationRow(*row) for row in recent_presentations],
             "usage_this_month": {
-                "presentations_created": len([
-                    p for p in presentations
-                    if p.created_at >= datetime.utcnow() - timedelta(days=30)
-                ]),
+                "presentations_created": stats.created_since,
                 "credits_used": 0,  # Mock data
                 "exports": 0  # Mock data
             }
         }
     
+    def invalidate(self, presentation_id=None, user_id=None):
+        """Drop cached analytics after a presentation is created, edited or deleted"""
+        invalidate_keys(
+            keys=[DASHBOARD_STATS_KEY.format(user_id=user_id)] if user_id is not None else [],
+            version_keys=(
+                [PRESENTATION_ANALYTICS_VERSION_KEY.format(presentation_id=presentation_id)]
+                if presentation_id is not None else []
+            ),
+            version_ttl=2 * ANALYTICS_CACHE_TTL
+        )
+    
     # ========== Engagement Tracking ==========
     
     def track_slide_view(
@@ -3,8 +3,16 @@ Billing Service
 Handles Stripe integration, subscriptions, and payment processing
 """
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
+import asyncio
+import hashlib
+import hmac
 import os
+import time
+
+import orjson
+
+from backend.utils.cache import TTLCache
 
 # Stripe integration (optional - install with: pip install stripe)
 try:
@@ -14,28 +22,112 @@ try:
 except ImportError:
     STRIPE_AVAILABLE = False
 
+# Plan pricing (in cents)
+PLAN_PRICES: Dict[str, Dict[str, int]] = {
+    "plus": {
+        "monthly": 800,  # $8/month
+        "yearly": 8000   # $80/year (2 months free)
+    },
+    "pro": {
+        "monthly": 1500,  # $15/month
+        "yearly": 15000   # $150/year
+    },
+    "ultra": {
+        "monthly": 2500,  # $25/month
+        "yearly": 25000   # $250/year
+    }
+}
+
+# Stripe price IDs per plan and billing period
+# (In production: Store these in database or environment variables)
+_PRICE_IDS: Dict[str, Dict[str, str]] = {
+    "plus": {
+        "monthly": "price_plus_monthly",
+        "yearly": "price_plus_yearly"
+    },
+    "pro": {
+        "monthly": "price_pro_monthly",
+        "yearly": "price_pro_yearly"
+    },
+    "ultra": {
+        "monthly": "price_ultra_monthly",
+        "yearly": "price_ultra_yearly"
+    }
+}
+_NO_PRICES: Dict[str, str] = {}
+
+# Per-worker cache of Stripe reads, keyed by customer ID. A dashboard render
+# asks for the same customer several times within a few seconds.
+STRIPE_READ_TTL = 30
+_customer_cache = TTLCache(maxsize=10_000, ttl=STRIPE_READ_TTL)
+_payment_methods_cache = TTLCache(maxsize=10_000, ttl=STRIPE_READ_TTL)
+
+# Stripe's default tolerance for webhook timestamps, in seconds
+WEBHOOK_TOLERANCE = 300
+
+
+def _verify_webhook_signature(payload: bytes, header: Optional[str], secret: str):
+    """
+    Check a Stripe-Signature header ("t=...,v1=...,v1=...") against the raw body
+    Same checks as stripe.Webhook.construct_event: any v1 signature may match
+    (secret rotation) and the timestamp must be within WEBHOOK_TOLERANCE.
+    """
+    if not header or not secret:
+        raise ValueError("Missing webhook signature or secret")
+    
+    timestamp = None
+    signatures = []
+    for item in header.split(","):
+        key, _, value = item.strip().partition("=")
+        if key == "t":
+            timestamp = value
+        elif key == "v1":
+            signatures.append(value)
+    if not timestamp or not timestamp.isdigit() or not signatures:
+        raise ValueError("Malformed webhook signature header")
+    
+    expected = hmac.new(
+        secret.encode(), timestamp.encode() + b"." + payload, hashlib.sha256
+    ).hexdigest()
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise ValueError("Webhook signature does not match")
+    if abs(time.time() - int(timestamp)) > WEBHOOK_TOLERANCE:
+        raise ValueError("Webhook timestamp outside the tolerance zone")
+
+
+# ========== Webhook Handlers ==========
+# Each takes the event's data.object
+
+def _on_subscription_updated(data: dict) -> dict:
+    return {"status": "subscription_updated", "subscription_id": data["id"]}
+
+
+def _on_subscription_deleted(data: dict) -> dict:
+    return {"status": "subscription_deleted", "subscription_id": data["id"]}
+
+
+def _on_payment_succeeded(data: dict) -> dict:
+    return {"status": "payment_succeeded", "invoice_id": data["id"]}
+
+
+def _on_payment_failed(data: dict) -> dict:
+    return {"status": "payment_failed", "invoice_id": data["id"]}
+
+
+_WEBHOOK_HANDLERS: Dict[str, Callable[[dict], dict]] = {
+    "customer.subscription.updated": _on_subscription_updated,
+    "customer.subscription.deleted": _on_subscription_deleted,
+    "invoice.payment_succeeded": _on_payment_succeeded,
+    "invoice.payment_failed": _on_payment_failed,
+}
+
 
 class BillingService:
     """Service for handling billing and subscriptions"""
     
     def __init__(self):
         self.stripe_available = STRIPE_AVAILABLE
-        
-        # Plan pricing (in cents)
-        self.plan_prices = {
-            "plus": {
-                "monthly": 800,  # $8/month
-                "yearly": 8000   # $80/year (2 months free)
-            },
-            "pro": {
-                "monthly": 1500,  # $15/month
-                "yearly": 15000   # $150/year
-            },
-            "ultra": {
-                "monthly": 2500,  # $25/month
-                "yearly": 25000   # $250/year
-            }
-        }
+        self.plan_prices = PLAN_PRICES
     
     # ========== Customer Management ==========
     
@@ -60,20 +152,27 @@ class BillingService:
         except Exception as e:
             raise Exception(f"Failed to create customer: {str(e)}")
     
-    def get_customer(self, stripe_customer_id: str) -> dict:
+    async def get_customer(self, stripe_customer_id: str) -> dict:
         """
         Get customer details from Stripe
         """
         if not self.stripe_available:
             return {"id": stripe_customer_id}
         
+        cached = _customer_cache.get(stripe_customer_id)
+        if cached is not None:
+            return cached
+        
         try:
-            customer = stripe.Customer.retrieve(stripe_customer_id)
-            return {
+            # stripe-python is blocking; keep the request off the event loop
+            customer = await asyncio.to_thread(stripe.Customer.retrieve, stripe_customer_id)
+            result = {
                 "id": customer.id,
                 "email": customer.email,
                 "name": customer.name
             }
+            _customer_cache.set(stripe_customer_id, result)
+            return result
         except Exception as e:
             raise Exception(f"Failed to retrieve customer: {str(e)}")
     
@@ -96,6 +195,7 @@ class BillingService:
         if not self.stripe_available:
             return {
                 "id": f"sub_mock_{stripe_customer_id}",
+                "item_id": f"si_mock_{stripe_customer_id}",
                 "plan": plan,
                 "status": "active",
                 "current_period_end": (datetime.utcnow() + timedelta(days=30)).isoformat()
@@ -114,6 +214,8 @@ class BillingService:
             
             return {
                 "id": subscription.id,
+                # Stored so plan changes can modify the item without a retrieve
+                "item_id": subscription["items"]["data"][0].id,
                 "plan": plan,
                 "status": subscription.status,
                 "current_period_end": datetime.fromtimestamp(
@@ -124,25 +226,8 @@ class BillingService:
             raise Exception(f"Failed to create subscription: {str(e)}")
     
     def _get_price_id(self, plan: str, billing_period: str) -> str:
-        """
-        Get Stripe price ID for a plan
-        (In production: Store these in database or environment variables)
-        """
-        price_ids = {
-            "plus": {
-                "monthly": "price_plus_monthly",
-                "yearly": "price_plus_yearly"
-            },
-            "pro": {
-                "monthly": "price_pro_monthly",
-                "yearly": "price_pro_yearly"
-            },
-            "ultra": {
-                "monthly": "price_ultra_monthly",
-                "yearly": "price_ultra_yearly"
-            }
-        }
-        return price_ids.get(plan, {}).get(billing_period, "")
+        """Get Stripe price ID for a plan"""
+        return _PRICE_IDS.get(plan, _NO_PRICES).get(billing_period, "")
     
     def cancel_subscription(self, subscription_id: str, immediate: bool = False) -> dict:
         """
@@ -172,15 +257,29 @@ class BillingService:
         except Exception as e:
             raise Exception(f"Failed to cancel subscription: {str(e)}")
     
-    def update_subscription(self, subscription_id: str, new_plan: str) -> dict:
+    def update_subscription(
+        self,
+        subscription_id: str,
+        new_plan: str,
+        subscription_item_id: Optional[str] = None
+    ) -> dict:
         """
         Update (upgrade/downgrade) a subscription
+        
+        Args:
+            subscription_id: Stripe subscription ID
+            new_plan: Plan name (plus, pro, ultra)
+            subscription_item_id: Stored item ID from create_subscription; saves
+                a retrieve round-trip to Stripe when given
         """
         if not self.stripe_available:
-            return {"id": subscription_id, "plan": new_plan}
+            return {"id": subscription_id, "item_id": subscription_item_id, "plan": new_plan}
         
         try:
-            subscription = stripe.Subscription.retrieve(subscription_id)
+            if not subscription_item_id:
+                # Subscriptions created before item IDs were stored
+                subscription = stripe.Subscription.retrieve(subscription_id)
+                subscription_item_id = subscription["items"]["data"][0].id
             
             # Get new price ID
             new_price_id = self._get_price_id(new_plan, "monthly")
@@ -189,7 +288,7 @@ class BillingService:
             updated = stripe.Subscription.modify(
                 subscription_id,
                 items=[{
-                    "id": subscription["items"]["data"][0].id,
+                    "id": subscription_item_id,
                     "price": new_price_id
                 }],
                 proration_behavior="always_invoice"
@@ -197,6 +296,7 @@ class BillingService:
             
             return {
                 "id": updated.id,
+                "item_id": subscription_item_id,
                 "plan": new_plan,
                 "status": updated.status
             }
@@ -229,23 +329,29 @@ class BillingService:
                 invoice_settings={"default_payment_method": payment_method_id}
             )
             
+            _payment_methods_cache.pop(stripe_customer_id)
             return {"id": payment_method_id, "status": "attached"}
         except Exception as e:
             raise Exception(f"Failed to add payment method: {str(e)}")
     
-    def get_payment_methods(self, stripe_customer_id: str) -> list:
+    async def get_payment_methods(self, stripe_customer_id: str) -> list:
         """
         Get all payment methods for a customer
         """
         if not self.stripe_available:
             return []
         
+        cached = _payment_methods_cache.get(stripe_customer_id)
+        if cached is not None:
+            return cached
+        
         try:
-            methods = stripe.PaymentMethod.list(
+            methods = await asyncio.to_thread(
+                stripe.PaymentMethod.list,
                 customer=stripe_customer_id,
                 type="card"
             )
-            return [
+            result = [
                 {
                     "id": pm.id,
                     "type": pm.type,
@@ -258,12 +364,14 @@ class BillingService:
                 }
                 for pm in methods.data
             ]
+            _payment_methods_cache.set(stripe_customer_id, result)
+            return result
         except Exception as e:
             raise Exception(f"Failed to get payment methods: {str(e)}")
     
     # ========== Invoicing ==========
     
-    def get_invoices(self, stripe_customer_id: str, limit: int = 10) -> list:
+    async def get_invoices(self, stripe_customer_id: str, limit: int = 10) -> list:
         """
         Get invoices for a customer
         """
@@ -271,7 +379,8 @@ class BillingService:
             return []
         
         try:
-            invoices = stripe.Invoice.list(
+            invoices = await asyncio.to_thread(
+                stripe.Invoice.list,
                 customer=stripe_customer_id,
                 limit=limit
             )
@@ -291,7 +400,7 @@ class BillingService:
     
     # ========== Webhooks ==========
     
-    def handle_webhook(self, payload: dict, signature: str) -> dict:
+    def handle_webhook(self, payload: bytes, signature: str) -> dict:
         """
         Handle Stripe webhook events
         
@@ -307,30 +416,15 @@ class BillingService:
         webhook_secret = os.getenv("STRIPE_WEBHOOK_SECRET")
         
         try:
-            event = stripe.Webhook.construct_event(
-                payload, signature, webhook_secret
-            )
+            # Verified inline and decoded with orjson: no StripeObject tree
+            _verify_webhook_signature(payload, signature, webhook_secret)
+            event = orjson.loads(payload)
             
             event_type = event["type"]
-            data = event["data"]["object"]
-            
-            if event_type == "customer.subscription.updated":
-                # Handle subscription update
-                return {"status": "subscription_updated", "subscription_id": data["id"]}
-            
-            elif event_type == "customer.subscription.deleted":
-                # Handle subscription cancellation
-                return {"status": "subscription_deleted", "subscription_id": data["id"]}
-            
-            elif event_type == "invoice.payment_succeeded":
-                # Handle successful payment
-                return {"status": "payment_succeeded", "invoice_id": data["id"]}
-            
-            elif event_type == "invoice.payment_failed":
-                # Handle failed payment
-                return {"status": "payment_failed", "invoice_id": data["id"]}
-            
-            return {"status": "unhandled", "event_type": event_type}
+            handler = _WEBHOOK_HANDLERS.get(event_type)
+            if handler is None:
+                return {"status": "unhandled", "event_type": event_type}
+            return handler(event["data"]["object"])
         
         except Exception as e:
             raise Exception(f"Webhook error: {str(e)}")
@@ -124,7 +124,7 @@ async def get_current_user(
     
     # Get database session
     if db is None:
-        db = next(get_db())
+        db = get_db()
     
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
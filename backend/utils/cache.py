@@ -2,12 +2,131 @@
 Response caching utilities
 """
 
+from collections import OrderedDict
 from functools import wraps
 from typing import Optional, Callable, Any
 import hashlib
+import inspect
 import json
+import time
+import uuid
+
+import orjson
 from backend.db.base import get_redis
 
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache with per-entry expiry
+    Meant as a per-worker L1 in front of Redis; not thread-safe, use from
+    the event loop only.
+    """
+    
+    def __init__(self, maxsize: int = 512, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+    
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key, value, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+    
+    def clear(self):
+        self._data.clear()
+
+
+class SemanticCache:
+    """
+    In-process cache keyed by text embeddings instead of exact strings
+    get() returns the value stored for the most similar cached text in the
+    namespace if its cosine similarity reaches the threshold. Each namespace
+    holds at most maxsize entries, scanned with one matrix product; at most
+    max_namespaces namespaces are kept, least recently used evicted first.
+    Requires sentence-transformers; without it `available` is False.
+    """
+    
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        threshold: float = 0.95,
+        maxsize: int = 256,
+        ttl: float = 1800,
+        max_namespaces: int = 1024
+    ):
+        self.model_name = model_name
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_namespaces = max_namespaces
+        self._model = None
+        self._namespaces: OrderedDict = OrderedDict()
+    
+    @property
+    def available(self) -> bool:
+        return SentenceTransformer is not None
+    
+    def embed(self, text: str):
+        """Unit-length embedding of text (CPU-bound; call via asyncio.to_thread)"""
+        if self._model is None:
+            self._model = SentenceTransformer(self.model_name)
+        return self._model.encode(text, normalize_embeddings=True)
+    
+    def get(self, namespace: str, embedding, default=None):
+        entries = self._namespaces.get(namespace)
+        if not entries:
+            return default
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _, _) in entries.items() if expires_at <= now]:
+            del entries[key]
+        if not entries:
+            del self._namespaces[namespace]
+            return default
+        self._namespaces.move_to_end(namespace)
+        keys = list(entries)
+        scores = np.stack([entries[key][1] for key in keys]) @ embedding
+        best = int(scores.argmax())
+        if scores[best] < self.threshold:
+            return default
+        entries.move_to_end(keys[best])
+        return entries[keys[best]][2]
+    
+    def set(self, namespace: str, embedding, value):
+        entries = self._namespaces.get(namespace)
+        if entries is None:
+            entries = self._namespaces[namespace] = OrderedDict()
+            if len(self._namespaces) > self.max_namespaces:
+                self._namespaces.popitem(last=False)
+        self._namespaces.move_to_end(namespace)
+        entries[embedding.tobytes()] = (time.monotonic() + self.ttl, embedding, value)
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+    
+    def clear(self):
+        self._namespaces.clear()
+
 
 def cache_response(ttl: int = 300, key_prefix: str = "cache"):
     """
@@ -61,6 +180,72 @@ def cache_response(ttl: int = 300, key_prefix: str = "cache"):
     return decorator
 
 
+def cached(key_fmt: str, ttl: int = 60, version_fmt: Optional[str] = None):
+    """
+    Decorator to cache a synchronous function's result in Redis
+    
+    Args:
+        key_fmt: Key template filled from the call's arguments by name
+        ttl: Time to live in seconds (default 1 minute)
+        version_fmt: Optional version key template. Entries remember the
+            version token they were built under and are ignored once
+            invalidate_keys gives the version key a new token, so a family
+            of keys (e.g. every days= variant) is dropped with one SET.
+    
+    Results are stored with orjson (dataclasses and datetimes encode
+    natively) and come back from a hit as plain dicts and strings.
+    None results are not cached.
+    
+    Usage:
+        @cached("analytics:pres:{presentation_id}:{days}", ttl=60)
+        def get_presentation_analytics(self, presentation_id, days=30, db=None):
+            ...
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            redis_client = get_redis()
+            if not redis_client:
+                return func(*args, **kwargs)
+            
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            cache_key = key_fmt.format(**bound.arguments)
+            version_key = version_fmt.format(**bound.arguments) if version_fmt else None
+            version = None
+            
+            try:
+                if version_key is None:
+                    hit = redis_client.get(cache_key)
+                    if hit:
+                        return orjson.loads(hit)
+                else:
+                    # Entry and current version in one round-trip
+                    hit, version = redis_client.mget(cache_key, version_key)
+                    if hit:
+                        entry = orjson.loads(hit)
+                        if entry["v"] == version:
+                            return entry["r"]
+            except Exception:
+                pass  # Cache miss or error
+            
+            result = func(*args, **kwargs)
+            
+            if result is not None:
+                payload = result if version_key is None else {"v": version, "r": result}
+                try:
+                    redis_client.setex(cache_key, ttl, orjson.dumps(payload, default=str))
+                except Exception:
+                    pass  # Cache write failed, not critical
+            
+            return result
+        
+        return wrapper
+    return decorator
+
+
 def invalidate_cache(key_prefix: str, pattern: Optional[str] = None):
     """
     Invalidate cache entries by prefix or pattern
@@ -87,6 +272,29 @@ def invalidate_cache(key_prefix: str, pattern: Optional[str] = None):
         pass  # Cache invalidation failed, not critical
 
 
+def invalidate_keys(keys=(), version_keys=(), version_ttl: int = 120):
+    """
+    Delete exact cache keys and give version keys (see cached) a new token
+    One pipelined round-trip, no key scans. version_ttl must exceed the
+    entries' ttl, so an entry never outlives the token it was checked against.
+    """
+    redis_client = get_redis()
+    if not redis_client or not (keys or version_keys):
+        return
+    
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        if keys:
+            pipe.delete(*keys)
+        for version_key in version_keys:
+            # A fresh random token, not INCR: a counter restarting after
+            # expiry could match an old entry's version again
+            pipe.set(version_key, uuid.uuid4().hex, ex=version_ttl)
+        pipe.execute()
+    except Exception:
+        pass  # Cache invalidation failed, not critical
+
+
 def _generate_cache_key(prefix: str, func_name: str, args: tuple, kwargs: dict) -> str:
     """Generate unique cache key from function arguments"""
     # Filter out non-cacheable arguments (like database sessions)
@@ -103,6 +311,6 @@ def _generate_cache_key(prefix: str, func_name: str, args: tuple, kwargs: dict)
     }
     
     key_str = json.dumps(key_data, sort_keys=True, default=str)
-    key_hash = hashlib.md5(key_str.encode()).hexdigest()
+    key_hash = hashlib.blake2b(key_str.encode(), digest_size=16).hexdigest()
     
     return f"{prefix}:{func_name}:{key_hash}"
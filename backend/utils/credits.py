@@ -4,12 +4,14 @@ Centralized logic for checking and deducting credits
 """
 
 from fastapi import HTTPException, status
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
-from backend.models.user import User
+from sqlalchemy.orm.attributes import set_committed_value
+from backend.models.user import User, UNLIMITED_CREDIT_PLANS
 from backend.models.analytics import Analytics
 from backend.config import settings
-import uuid
 from datetime import datetime
+from typing import Optional
 
 
 async def check_and_deduct_credits(
@@ -35,8 +37,12 @@ async def check_and_deduct_credits(
     Raises:
         HTTPException: If insufficient credits
     """
-    # Check if user has enough credits
-    if not user.has_credits(cost):
+    # Check and deduct in one statement; unlimited plans skip the database
+    if user.plan not in UNLIMITED_CREDIT_PLANS:
+        remaining = User.try_deduct(db, user.id, cost)
+    else:
+        remaining = user.credits_remaining
+    if remaining is None:
         raise HTTPException(
             status_code=status.HTTP_402_PAYMENT_REQUIRED,
             detail={
@@ -48,17 +54,8 @@ async def check_and_deduct_credits(
             }
         )
     
-    # Deduct credits
-    success = user.deduct_credits(cost)
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to deduct credits"
-        )
-    
     # Log analytics event
     analytics_event = Analytics(
-        id=uuid.uuid4(),
         user_id=user.id,
         event_type="credit_deduction",
         event_category=operation,
@@ -70,11 +67,71 @@ async def check_and_deduct_credits(
     
     # Commit changes
     db.commit()
-    db.refresh(user)
+    set_committed_value(user, "credits_remaining", remaining)
     
     return True
 
 
+def reserve_credits(user: User, cost: int, db: Session) -> Optional[int]:
+    """
+    Atomically deduct credits with a conditional UPDATE
+    
+    The balance check and the deduction happen in one statement, so
+    concurrent requests can't both spend the same credits. Call this
+    before slow work (AI calls) and refund_credits() if that work fails.
+    
+    Args:
+        user: User object
+        cost: Credit cost for operation
+        db: Database session
+    
+    Returns:
+        int: Remaining credits, or None if the balance was insufficient.
+        Unlimited plans skip the database and always succeed.
+    """
+    if user.plan in UNLIMITED_CREDIT_PLANS:
+        return user.credits_remaining or 0
+    
+    remaining = User.try_deduct(db, user.id, cost)
+    if remaining is None:
+        # Report the current balance, not the one loaded with the user
+        current = db.scalar(select(User.credits_remaining).where(User.id == user.id))
+    db.commit()
+    
+    # Sync the in-memory user without marking it dirty
+    set_committed_value(user, "credits_remaining", remaining if remaining is not None else current)
+    
+    return remaining
+
+
+def refund_credits(user: User, cost: int, db: Session) -> None:
+    """
+    Return credits taken by reserve_credits() when the operation failed
+    
+    Args:
+        user: User object
+        cost: Credit cost to give back
+        db: Database session
+    """
+    if user.plan in UNLIMITED_CREDIT_PLANS:
+        return
+    
+    remaining = db.execute(
+        update(User)
+        .where(User.id == user.id)
+        .values(
+            credits_remaining=User.credits_remaining + cost,
+            credits_used=User.credits_used - cost
+        )
+        .returning(User.credits_remaining),
+        execution_options={"synchronize_session": False}
+    ).scalar_one_or_none()
+    db.commit()
+    
+    if remaining is not None:
+        set_committed_value(user, "credits_remaining", remaining)
+
+
 def get_operation_cost(operation: str) -> int:
     """
     Get credit cost for a specific operation
@@ -170,7 +227,6 @@ def add_credits(user: User, amount: int, db: Session, reason: str = "purchase")
     
     # Log analytics event
     analytics_event = Analytics(
-        id=uuid.uuid4(),
         user_id=user.id,
         event_type="credit_addition",
         event_category=reason,
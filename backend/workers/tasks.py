@@ -300,6 +300,85 @@ def cleanup_temp_files():
         return {"error": str(e)}
 
 
+@celery_app.task(name='tasks.purge_soft_deleted')
+def purge_soft_deleted(retention_days: int = 30, batch_size: int = 10000):
+    """
+    Hard-delete soft-deleted themes and webpages past the retention window
+    
+    Deletes in bounded batches so each statement holds row locks briefly
+    and vacuum pressure is spread out instead of spiking on user deletes.
+    """
+    try:
+        from datetime import timedelta
+        from backend.db.base import SessionLocal
+        from backend.models.theme import Theme
+        from backend.models.webpage import Webpage
+        
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        db = SessionLocal()
+        purged = {}
+        
+        try:
+            for model in (Theme, Webpage):
+                try:
+                    purged[model.__tablename__] = _purge_expired(db, model, cutoff, batch_size)
+                except Exception as e:
+                    # One table failing must not keep the others from being purged
+                    db.rollback()
+                    purged[model.__tablename__] = {"error": str(e)}
+        finally:
+            db.close()
+        
+        return {
+            "status": "completed",
+            "purged": purged,
+            "purged_at": datetime.utcnow().isoformat()
+        }
+    
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _purge_expired(db, model, cutoff, batch_size: int) -> int:
+    """Hard-delete one model's expired soft-deleted rows in batches; returns the count"""
+    from sqlalchemy import delete, select, update
+    from backend.models.theme import Theme
+    from backend.models.template import Template
+    from backend.models.document import Document
+    from backend.models.webpage import Webpage
+    
+    expired_ids = select(model.id).where(
+        model.is_deleted == True,
+        model.deleted_at < cutoff
+    ).limit(batch_size).execution_options(include_deleted=True)
+    
+    total = 0
+    while True:
+        ids = db.scalars(expired_ids).all()
+        if not ids:
+            break
+        
+        if model is Theme:
+            # templates, documents and webpages reference themes without ON DELETE
+            for referrer in (Template, Document, Webpage):
+                db.execute(
+                    update(referrer).where(referrer.theme_id.in_(ids)).values(theme_id=None),
+                    execution_options={"synchronize_session": False, "include_deleted": True}
+                )
+        
+        db.execute(
+            delete(model).where(model.id.in_(ids)),
+            execution_options={"synchronize_session": False}
+        )
+        db.commit()
+        total += len(ids)
+        
+        if len(ids) < batch_size:
+            break
+    
+    return total
+
+
 @celery_app.task(name='tasks.reset_monthly_credits')
 def reset_monthly_credits():
     """
@@ -334,6 +413,50 @@ def reset_monthly_credits():
         return {"error": str(e)}
 
 
+@celery_app.task(name='tasks.create_analytics_partitions')
+def create_analytics_partitions():
+    """
+    Create upcoming monthly partitions for analytics and presentation_views
+    """
+    try:
+        from backend.db.base import engine
+        from backend.models.analytics import Analytics, PresentationView, ensure_monthly_partitions
+        
+        with engine.begin() as connection:
+            for model in (Analytics, PresentationView):
+                ensure_monthly_partitions(connection, model.__tablename__)
+        
+        return {
+            "status": "completed",
+            "created_at": datetime.utcnow().isoformat()
+        }
+    
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@celery_app.task(name='tasks.reconcile_workspace_stats')
+def reconcile_workspace_stats():
+    """
+    Recount workspace counters from the source tables and resync Redis
+    """
+    try:
+        from backend.db.base import SessionLocal
+        from backend.models.workspace import reconcile_workspace_stats as reconcile
+        
+        with SessionLocal() as db:
+            updated = reconcile(db)
+        
+        return {
+            "status": "completed",
+            "workspaces_updated": updated,
+            "reconciled_at": datetime.utcnow().isoformat()
+        }
+    
+    except Exception as e:
+        return {"error": str(e)}
+
+
 # ========== Scheduled Tasks ==========
 
 # Schedule periodic tasks
@@ -342,6 +465,18 @@ celery_app.conf.beat_schedule = {
         'task': 'tasks.cleanup_temp_files',
         'schedule': 86400.0,  # Once per day (24 hours)
     },
+    'purge-soft-deleted-daily': {
+        'task': 'tasks.purge_soft_deleted',
+        'schedule': 86400.0,  # Once per day (24 hours)
+    },
+    'create-analytics-partitions-daily': {
+        'task': 'tasks.create_analytics_partitions',
+        'schedule': 86400.0,  # Once per day (24 hours)
+    },
+    'reconcile-workspace-stats-daily': {
+        'task': 'tasks.reconcile_workspace_stats',
+        'schedule': 86400.0,  # Once per day (24 hours)
+    },
     'reset-credits-monthly': {
         'task': 'tasks.reset_monthly_credits',
         'schedule': 2592000.0,  # Once per month (30 days)
@@ -0,0 +1,69 @@
+"""
+Document Body Backfill Script
+Adds the body columns to an existing documents table and moves legacy
+content_json bodies into the MessagePack content_blob column
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, select
+from backend.db.base import SessionLocal, engine
+from backend.models.document import Document
+
+BATCH_SIZE = 500
+
+# Columns added to documents after the table was first created
+NEW_COLUMNS = ("content_blob", "content_meta", "content_hash", "section_word_counts")
+
+
+def add_columns() -> list:
+    """Add any missing NEW_COLUMNS to documents; returns the names that were added"""
+    documents = Document.__table__
+    existing = {col["name"] for col in inspect(engine).get_columns(documents.name)}
+    missing = [name for name in NEW_COLUMNS if name not in existing]
+    with engine.begin() as connection:
+        for name in missing:
+            column_type = documents.c[name].type.compile(dialect=connection.dialect)
+            connection.exec_driver_sql(f"ALTER TABLE {documents.name} ADD COLUMN {name} {column_type}")
+    return missing
+
+
+def backfill_document_blobs() -> int:
+    """Convert documents in batches, one commit per batch"""
+    db = SessionLocal()
+    converted = 0
+    try:
+        while True:
+            documents = db.scalars(
+                select(Document)
+                .where(Document.content_blob.is_(None), Document.content_json.is_not(None))
+                .order_by(Document.id)
+                .limit(BATCH_SIZE)
+            ).all()
+            if not documents:
+                break
+            
+            for document in documents:
+                document.content = document.content_json
+            db.commit()
+            converted += len(documents)
+            print(f"  - {converted} documents converted")
+    finally:
+        db.close()
+    
+    return converted
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("📄 GAMMA CLONE - DOCUMENT BODY BACKFILL")
+    print("="*60 + "\n")
+    
+    for name in add_columns():
+        print(f"  - Added documents.{name}")
+    total = backfill_document_blobs()
+    print(f"\n✅ Done: {total} documents moved to content_blob")
@@ -0,0 +1,98 @@
+"""
+Webpage Meta Backfill Script
+Adds the JSONB meta column to an existing webpages table and moves the
+legacy SEO/branding columns into it
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import bindparam, column, inspect, or_, select, table, update
+from backend.db.base import engine
+from backend.models.webpage import Webpage
+
+BATCH_SIZE = 500
+
+# Columns folded into Webpage.meta; each becomes the key of the same name
+LEGACY_COLUMNS = (
+    "meta_description",
+    "seo_keywords",
+    "og_image_url",
+    "favicon_url",
+    "custom_header_html",
+    "custom_footer_html",
+)
+
+
+def add_meta_column() -> bool:
+    """Add webpages.meta and its GIN index if missing; True if the column was added"""
+    webpages = Webpage.__table__
+    columns = {col["name"] for col in inspect(engine).get_columns(webpages.name)}
+    added = "meta" not in columns
+    with engine.begin() as connection:
+        if added:
+            meta_type = webpages.c.meta.type.compile(dialect=connection.dialect)
+            connection.exec_driver_sql(f"ALTER TABLE {webpages.name} ADD COLUMN meta {meta_type}")
+        for index in webpages.indexes:
+            if index.name == "webpages_meta_gin":
+                index.create(connection, checkfirst=True)
+    return added
+
+
+def backfill_webpage_meta() -> int:
+    """Copy legacy column values into meta in batches, one commit per batch"""
+    columns = {col["name"] for col in inspect(engine).get_columns(Webpage.__table__.name)}
+    legacy = [name for name in LEGACY_COLUMNS if name in columns]
+    if not legacy:
+        return 0
+    
+    # The legacy columns are no longer mapped, so read them via a lightweight table
+    meta_type = Webpage.__table__.c.meta.type
+    webpages = table(
+        Webpage.__table__.name,
+        column("id"), column("meta", meta_type), *(column(name) for name in legacy)
+    )
+    pending = (
+        select(webpages.c.id, *(webpages.c[name] for name in legacy))
+        .where(webpages.c.meta.is_(None), or_(*(webpages.c[name].is_not(None) for name in legacy)))
+        .order_by(webpages.c.id)
+        .limit(BATCH_SIZE)
+    )
+    write = (
+        update(webpages)
+        .where(webpages.c.id == bindparam("page_id"))
+        .values(meta=bindparam("page_meta", type_=meta_type))
+    )
+    
+    converted = 0
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(pending).all()
+            if not rows:
+                break
+            connection.execute(write, [
+                {
+                    "page_id": row.id,
+                    "page_meta": {name: row._mapping[name] for name in legacy if row._mapping[name] is not None},
+                }
+                for row in rows
+            ])
+        converted += len(rows)
+        print(f"  - {converted} webpages converted")
+    
+    return converted
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("🌐 GAMMA CLONE - WEBPAGE META BACKFILL")
+    print("="*60 + "\n")
+    
+    if add_meta_column():
+        print("  - Added webpages.meta")
+    total = backfill_webpage_meta()
+    print(f"\n✅ Done: {total} webpages moved to meta")
+    print("   The legacy columns are left in place; drop them once the new code is deployed.")
@@ -0,0 +1,104 @@
+"""
+Test the event histogram endpoint with timezone-aware ranges
+Tests: Z-suffixed range, binning, +02:00 offset, inverted range
+"""
+
+import os
+import sys
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.db.base import Base, get_db
+from backend.models.user import User
+from backend.models.analytics import AnalyticsCube
+from backend.utils.auth import get_current_user
+from backend.api.analytics import router
+
+HISTOGRAM_URL = "/api/v1/analytics/histogram"
+
+
+def _client() -> TestClient:
+    """Analytics router over an in-memory cube holding 3 events at 2026-01-01 06:00 UTC"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[User.__table__, AnalyticsCube.__table__])
+    db = sessionmaker(bind=engine)()
+
+    user_id = uuid.uuid4()
+    db.add(AnalyticsCube(
+        user_id=user_id, bucket_start=datetime(2026, 1, 1, 6), event_type="generation",
+        events=3, credits_used=30, duration_ms=900
+    ))
+    db.commit()
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=user_id)
+    return TestClient(app)
+
+
+def test_z_suffixed_range():
+    """A Z-suffixed range is accepted and binned in UTC"""
+    print("\n=== Testing Z-suffixed range ===")
+
+    response = _client().get(HISTOGRAM_URL, params={
+        "start": "2026-01-01T00:00:00Z", "end": "2026-01-02T00:00:00Z", "bins": 24
+    })
+    assert response.status_code == 200, response.text
+    assert response.json()["bins"] == [
+        {"px": 6, "event_type": "generation", "count": 3, "credits_used": 30, "duration_ms": 900}
+    ]
+    print("✅ Z-suffixed range binned at hour 6")
+
+
+def test_offset_range():
+    """An offset range is converted to naive UTC"""
+    print("\n=== Testing +02:00 range ===")
+
+    response = _client().get(HISTOGRAM_URL, params={
+        "start": "2026-01-01T02:00:00+02:00", "end": "2026-01-02T02:00:00+02:00", "bins": 24
+    })
+    assert response.status_code == 200, response.text
+    assert response.json()["start"] == "2026-01-01T00:00:00"
+    assert response.json()["bins"][0]["px"] == 6
+    print("✅ Offset range normalized to UTC")
+
+
+def test_inverted_aware_range():
+    """An inverted aware range is a 400, not a 500"""
+    print("\n=== Testing inverted aware range ===")
+
+    response = _client().get(HISTOGRAM_URL, params={
+        "start": "2026-01-02T00:00:00Z", "end": "2026-01-01T00:00:00Z"
+    })
+    assert response.status_code == 400, response.text
+    print("✅ Inverted range rejected")
+
+
+if __name__ == "__main__":
+    print("="*60)
+    print("  EVENT HISTOGRAM TESTING SUITE")
+    print("="*60)
+
+    failed = 0
+    for test in (test_z_suffixed_range, test_offset_range, test_inverted_aware_range):
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("\n" + "="*60)
+    print(f"  TESTING COMPLETE: {failed} failed")
+    print("="*60)
+    if failed:
+        sys.exit(1)
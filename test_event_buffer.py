@@ -0,0 +1,118 @@
+"""
+Test the analytics EventBuffer flush path
+Tests: rows with differing keys, retry of a batch holding a bad row
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.pool import StaticPool
+
+from backend.db import bulk
+from backend.db.base import Base, _import_models
+from backend.models.analytics import Analytics, AnalyticsCube
+
+
+def _buffer_engine():
+    """Point the sync bulk writer at a fresh in-memory database"""
+    _import_models()
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    bulk.engine = engine
+    bulk.async_engine = None
+    return engine
+
+
+def _event(user_id, **extra) -> dict:
+    return {"user_id": user_id, "event_type": "generation", **extra}
+
+
+def test_mixed_keys():
+    """Rows that don't share one key set are written in one batch"""
+    print("\n=== Testing rows with differing keys ===")
+
+    engine = _buffer_engine()
+    user_id = uuid.uuid4()
+    buffer = bulk.EventBuffer()
+    buffer._events = [_event(user_id, credits_used=1), _event(user_id), _event(user_id, duration_ms=20)]
+    asyncio.run(buffer.flush())
+
+    with engine.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(Analytics)) == 3
+        assert connection.scalar(select(func.sum(AnalyticsCube.events))) == 3
+        assert connection.scalar(select(func.sum(AnalyticsCube.credits_used))) == 1
+    print("✅ Mixed rows written together")
+
+
+def test_bad_row_retry():
+    """A bad row costs only its slice of the batch; the rest is written once"""
+    print("\n=== Testing retry of a batch holding a bad row ===")
+
+    engine = _buffer_engine()
+    user_id = uuid.uuid4()
+    buffer = bulk.EventBuffer()
+    good = [_event(user_id, credits_used=1) for _ in range(63)]
+    bad = {"user_id": user_id, "event_type": None}  # NOT NULL violation
+    buffer._events = good[:40] + [bad] + good[40:]
+    asyncio.run(buffer.flush())
+
+    written = 64 - 2 ** (6 - bulk.FLUSH_SPLIT_DEPTH)  # Everything outside the bad row's slice
+    with engine.connect() as connection:
+        rows = connection.scalar(select(func.count()).select_from(Analytics))
+        ids = connection.scalar(select(func.count(func.distinct(Analytics.id))))
+        cube = connection.scalar(select(func.sum(AnalyticsCube.events)))
+    assert rows == ids == written, (rows, ids, written)
+    assert cube == written, cube
+    print(f"✅ {written} of 63 good rows written once, rollups match")
+
+
+def test_retry_keeps_primary_key():
+    """Ids and timestamps are fixed before the first attempt"""
+    print("\n=== Testing primary key stability across attempts ===")
+
+    _buffer_engine()
+    attempts = []
+
+    def failing_write(events, views):
+        attempts.append([(row["id"], row["created_at"]) for row in events])
+        raise RuntimeError("write failed")
+
+    original = bulk._write_batch
+    bulk._write_batch = failing_write
+    try:
+        buffer = bulk.EventBuffer()
+        buffer._events = [_event(uuid.uuid4()) for _ in range(4)]
+        asyncio.run(buffer.flush())
+    finally:
+        bulk._write_batch = original
+
+    first = set(attempts[0])
+    assert len(attempts) == 7, len(attempts)  # 4 rows: whole, 2 halves, 4 singles
+    assert all(set(attempt) <= first for attempt in attempts)
+    assert {key for attempt in attempts if len(attempt) == 1 for key in attempt} == first
+    print("✅ Retries reuse the same (created_at, id)")
+
+
+if __name__ == "__main__":
+    print("="*60)
+    print("  EVENT BUFFER TESTING SUITE")
+    print("="*60)
+
+    failed = 0
+    for test in (test_mixed_keys, test_bad_row_retry, test_retry_keeps_primary_key):
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("\n" + "="*60)
+    print(f"  TESTING COMPLETE: {failed} failed")
+    print("="*60)
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,99 @@
+"""
+Test that listing webpages costs a fixed number of queries
+Tests: list_webpages with folder/domain relationships at several limits
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.db.base import Base, get_db, _import_models
+from backend.models.custom_domain import CustomDomain
+from backend.models.folder import Folder
+from backend.models.webpage import Webpage
+from backend.utils.auth import get_current_user
+from backend.api.webpages import router
+
+MAX_LIST_QUERIES = 3
+
+
+@contextmanager
+def count_queries(engine):
+    """Collect the SQL statements the engine executes inside the block"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _setup(pages: int):
+    """In-memory database with `pages` webpages, each in its own folder and domain"""
+    _import_models()
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    for i in range(pages):
+        folder = Folder(name=f"folder {i}", user_id=1)
+        domain = CustomDomain(domain=f"site{i}.example.com", user_id=1)
+        db.add(Webpage(
+            title=f"page {i}", content_json='{"sections": []}', author_id=1,
+            folder=folder, custom_domain=domain
+        ))
+    db.commit()
+    db.expunge_all()
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1, plan="free")
+    return engine, TestClient(app)
+
+
+def test_list_query_count():
+    """Query count doesn't grow with the number of rows listed"""
+    print("\n=== Testing list_webpages query count ===")
+
+    engine, client = _setup(pages=30)
+    for limit in (1, 10, 30):
+        with count_queries(engine) as statements:
+            response = client.get("/api/v1/webpages/", params={"limit": limit})
+        assert response.status_code == 200, response.text
+        assert len(response.json()) == limit
+        assert len(statements) <= MAX_LIST_QUERIES, statements
+        print(f"✅ limit={limit}: {len(statements)} queries")
+
+
+if __name__ == "__main__":
+    print("="*60)
+    print("  WEBPAGE QUERY COUNT TESTING SUITE")
+    print("="*60)
+
+    failed = 0
+    for test in (test_list_query_count,):
+        try:
+            test()
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print("\n" + "="*60)
+    print(f"  TESTING COMPLETE: {failed} failed")
+    print("="*60)
+    if failed:
+        sys.exit(1)